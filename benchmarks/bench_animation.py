@@ -0,0 +1,53 @@
+"""Counts the render work per tick of the 3D snake view as the snake grows.
+
+Run from the project root:
+    python benchmarks/bench_animation.py
+
+Drives segment_animation.SegmentAnimator (the policy SnakeView follows) with
+a headless snake_core_3d.Snake, so Ursina isn't needed. Before the animator,
+the view rewrote every segment's position every frame, i.e. length x frames
+updates per tick; with it, tweens and position updates per tick should be
+constant in length for both modes.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from segment_animation import ANIMATION_MODE_ENDS, ANIMATION_MODE_FULL, SegmentAnimator
+from snake_core_3d import Snake
+
+LENGTHS = [10, 100, 1000, 10000, 100000]
+TICKS = 5000
+FRAMES_PER_TICK = 4 # e.g. 60 fps against the 0.2 s/0.07 s game speeds
+GROW_EVERY = 10     # Ticks between meals, so the scale-in tween shows up too
+
+
+def run(length, mode, ticks=TICKS):
+    """Returns (tweens/tick, position updates/tick, us/tick) for one mode."""
+    snake = Snake(start_pos=(length, 0, 0), start_length=length)
+    animator = SegmentAnimator(snake, mode)
+    # The snake heads along +x forever; Snake itself doesn't know about walls.
+    start = time.perf_counter()
+    for tick in range(ticks):
+        grew = tick % GROW_EVERY == 0
+        if grew:
+            snake.grow()
+        snake.move()
+        animator.on_moved(grew)
+        for _ in range(FRAMES_PER_TICK):
+            animator.frame()
+    elapsed = time.perf_counter() - start
+    summary = animator.stats.summary()
+    return summary['tweens_per_tick'], summary['updates_per_tick'], elapsed / ticks * 1e6
+
+
+if __name__ == '__main__':
+    print(f"{'length':>8}  {'mode':>5}  {'tweens/tick':>11}  {'updates/tick':>12}  "
+          f"{'before':>10}  {'us/tick':>8}")
+    for length in LENGTHS:
+        for mode in (ANIMATION_MODE_ENDS, ANIMATION_MODE_FULL):
+            tweens, updates, us = run(length, mode)
+            print(f"{length:>8}  {mode:>5}  {tweens:>11.2f}  {updates:>12.1f}  "
+                  f"{length * FRAMES_PER_TICK:>10}  {us:>8.2f}")
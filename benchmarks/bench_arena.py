@@ -0,0 +1,60 @@
+"""Ticks per second of the multi-snake arena as the number of snakes grows.
+
+Run from the project root:
+    python benchmarks/bench_arena.py
+
+Snakes turn at random now and then, die, and respawn, so the board stays
+busy. 'scan ms' is what just the collision checks of one tick cost when done
+by scanning every snake's body list, for comparison with the whole arena
+tick resolved through the shared occupancy index.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from arena import Arena
+
+BOARD = (200, 200)
+SNAKE_COUNTS = [10, 100, 300, 1000]
+WARMUP_TICKS = 200
+TICKS = 500
+TURN_CHANCE = 0.2
+
+
+def random_actions(rng, count):
+    return [rng.randrange(4) if rng.random() < TURN_CHANCE else None for _ in range(count)]
+
+
+def scan_collisions(arena):
+    """Collision checks against plain body lists: O(snakes x total length)."""
+    bodies = [list(snake.body) for snake in arena.snakes if snake.alive]
+    hits = 0
+    for body in bodies:
+        head = body[0]
+        for other in bodies:
+            if head in (other[1:] if other is body else other):
+                hits += 1
+    return hits
+
+
+if __name__ == '__main__':
+    print(f"{'snakes':>7}  {'mean length':>11}  {'ticks/s':>9}  {'us/snake':>9}  {'scan ms':>9}")
+    for count in SNAKE_COUNTS:
+        rng = random.Random(0)
+        arena = Arena(count, *BOARD, num_food=count, start_length=5, seed=0)
+        for _ in range(WARMUP_TICKS):
+            arena.step(random_actions(rng, count))
+        actions = [random_actions(rng, count) for _ in range(TICKS)]
+        start = time.perf_counter()
+        for tick_actions in actions:
+            arena.step(tick_actions)
+        elapsed = time.perf_counter() - start
+        lengths = [len(snake.body) for snake in arena.snakes if snake.alive]
+        start = time.perf_counter()
+        scan_collisions(arena)
+        scan = time.perf_counter() - start
+        print(f"{count:>7}  {sum(lengths) / max(len(lengths), 1):>11.1f}  {TICKS / elapsed:>9.0f}  "
+              f"{elapsed / TICKS / count * 1e6:>9.2f}  {scan * 1000:>9.2f}")
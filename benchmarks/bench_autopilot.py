@@ -0,0 +1,63 @@
+"""Plays whole games with the autopilot and times its decisions.
+
+Run from the project root:
+    python benchmarks/bench_autopilot.py
+
+Reports the final length and the mean / 99th percentile / max time per
+decide() call on the 20x20 2D board and the 10x10x10 3D board.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import snake_core_3d
+import snake_game_2d
+from autopilot import Autopilot
+
+GAMES = 5
+MAX_TICKS_2D = 40000 # Enough to fill the board on the cycle
+MAX_TICKS_3D = 20000
+
+
+def timed(times, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    times.append(time.perf_counter() - start)
+    return result
+
+
+def play_2d(seed, pilot, times):
+    game = snake_game_2d.Game(seed=seed)
+    while not (game.game_over or game.won) and game.ticks < MAX_TICKS_2D:
+        game.step(timed(times, pilot.direction_2d, game))
+    return len(game.snake.body)
+
+
+def play_3d(seed, pilot, times):
+    game = snake_core_3d.Game(seed=seed)
+    game.set_state(snake_core_3d.GameState.PLAYING)
+    for _ in range(MAX_TICKS_3D):
+        if game.state != snake_core_3d.GameState.PLAYING:
+            break
+        game.change_direction(timed(times, pilot.direction_3d, game))
+        game.step()
+    return len(game.snake.body)
+
+
+def report(name, cells, play, pilot):
+    times = []
+    lengths = [play(seed, pilot, times) for seed in range(GAMES)]
+    times.sort()
+    print(f"{name:>9}  {sum(lengths) / len(lengths):>7.0f}/{cells:<5}  "
+          f"{sum(times) / len(times) * 1e6:>8.1f}  {times[int(len(times) * 0.99)] * 1e6:>8.1f}  "
+          f"{times[-1] * 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    print(f"{'board':>9}  {'mean length':>13}  {'mean us':>8}  {'p99 us':>8}  {'max us':>9}")
+    w, h = snake_game_2d.BOARD_WIDTH, snake_game_2d.BOARD_HEIGHT
+    report(f"{w}x{h}", w * h, play_2d, Autopilot((w, h)))
+    size = (snake_core_3d.BOARD_WIDTH, snake_core_3d.BOARD_HEIGHT, snake_core_3d.BOARD_DEPTH)
+    report('x'.join(map(str, size)), size[0] * size[1] * size[2], play_3d, Autopilot(size))
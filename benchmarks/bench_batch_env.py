@@ -0,0 +1,61 @@
+"""Compares BatchSnakeEnv steps/second with a loop over scalar 2D games.
+
+Run from the project root (requires NumPy):
+    python benchmarks/bench_batch_env.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+
+from batch_env import BatchSnakeEnv, DIRECTION_NAMES
+from snake_game_2d import BOARD_WIDTH, BOARD_HEIGHT, Snake, Food, check_collision_wall
+
+SCALAR_STEPS = 200000
+BATCH_SIZES = [1024, 8192, 65536]
+BATCH_STEPS = 200
+
+
+def new_scalar_game():
+    snake = Snake(start_pos=(max(2, BOARD_WIDTH // 4), BOARD_HEIGHT // 2), start_length=3,
+                  board_size=(BOARD_WIDTH, BOARD_HEIGHT))
+    return snake, Food(BOARD_WIDTH, BOARD_HEIGHT, snake.cells, snake.free_cells)
+
+
+def scalar_steps_per_second(steps=SCALAR_STEPS):
+    """One game at a time, the way the __main__ loop drives it (minus the sleep)."""
+    rng = random.Random(0)
+    snake, food = new_scalar_game()
+    start = time.perf_counter()
+    for _ in range(steps):
+        snake.change_direction(DIRECTION_NAMES[rng.randrange(4)])
+        snake.move()
+        done = False
+        if snake.body[0] == food.position:
+            snake.grow()
+            done = not food.spawn(BOARD_WIDTH, BOARD_HEIGHT, snake.cells, snake.free_cells)
+        if done or check_collision_wall(snake.body[0]) or snake.check_collision_self():
+            snake, food = new_scalar_game()
+    return steps / (time.perf_counter() - start)
+
+
+def batch_steps_per_second(num_games, steps=BATCH_STEPS):
+    env = BatchSnakeEnv(num_games, seed=0)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 4, size=(steps, num_games))
+    start = time.perf_counter()
+    for t in range(steps):
+        env.step(actions[t])
+    return num_games * steps / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    scalar = scalar_steps_per_second()
+    print(f"{'scalar loop':>14}  {scalar:>14,.0f} steps/s")
+    for n in BATCH_SIZES:
+        rate = batch_steps_per_second(n)
+        print(f"{'batch ' + str(n):>14}  {rate:>14,.0f} steps/s  ({rate / scalar:.0f}x)")
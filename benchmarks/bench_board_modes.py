@@ -0,0 +1,81 @@
+"""Throughput and memory of dense vs sparse games across board sizes.
+
+Run from the project root:
+    python benchmarks/bench_board_modes.py
+
+Dense games keep Snake.free_cells, a list and dict over every board cell,
+so memory grows with the board; sparse games only hash the snake's own
+cells. Dense runs on boards above DENSE_MAX_CELLS are skipped.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import snake_core_3d
+import snake_game_2d
+
+BOARDS_2D = [(20, 20), (200, 200), (1000, 1000), (10000, 10000)]
+BOARDS_3D = [(10, 10, 10), (100, 100, 100), (1000, 1000, 1000)]
+DENSE_MAX_CELLS = 10 ** 6
+TICKS = 20000
+LAP = 4 # Side of the square the snake drives around, so it never hits anything
+
+
+def lap_2d():
+    return ["RIGHT"] * LAP + ["DOWN"] * LAP + ["LEFT"] * LAP + ["UP"] * LAP
+
+
+def lap_3d():
+    d = snake_core_3d.DIRECTIONS
+    return [d["RIGHT_X"]] * LAP + [d["FORWARD_Z"]] * LAP + [d["LEFT_X"]] * LAP + [d["BACKWARD_Z"]] * LAP
+
+
+def run_2d(board, sparse):
+    game = snake_game_2d.Game(*board, seed=0, sparse=sparse)
+    moves = lap_2d()
+    start = time.perf_counter()
+    for tick in range(TICKS):
+        game.step(moves[tick % len(moves)])
+    return time.perf_counter() - start
+
+
+def run_3d(board, sparse):
+    game = snake_core_3d.Game(seed=0, board_size=board, sparse=sparse)
+    game.set_state(snake_core_3d.GameState.PLAYING)
+    moves = lap_3d()
+    start = time.perf_counter()
+    for tick in range(TICKS):
+        game.change_direction(moves[tick % len(moves)])
+        game.step()
+    return time.perf_counter() - start
+
+
+def measure(run, board, sparse):
+    """(ticks per second, peak MB allocated including game setup)."""
+    tracemalloc.start()
+    elapsed = run(board, sparse)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Time again without tracemalloc's overhead
+    elapsed = min(elapsed, run(board, sparse))
+    return TICKS / elapsed, peak / 2 ** 20
+
+
+if __name__ == '__main__':
+    print(f"{'board':>16}  {'mode':>6}  {'ticks/s':>10}  {'peak MB':>9}")
+    for boards, run in ((BOARDS_2D, run_2d), (BOARDS_3D, run_3d)):
+        for board in boards:
+            cells = 1
+            for d in board:
+                cells *= d
+            name = 'x'.join(map(str, board))
+            for sparse in (False, True):
+                mode = 'sparse' if sparse else 'dense'
+                if not sparse and cells > DENSE_MAX_CELLS:
+                    print(f"{name:>16}  {mode:>6}  {'skipped':>10}")
+                    continue
+                rate, peak = measure(run, board, sparse)
+                print(f"{name:>16}  {mode:>6}  {rate:>10.0f}  {peak:>9.2f}")
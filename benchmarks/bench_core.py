@@ -0,0 +1,269 @@
+"""Benchmark suite for the game core's hot paths, with regression tracking.
+
+Run from the project root:
+    python benchmarks/bench_core.py                      # print results
+    python benchmarks/bench_core.py --save base.json     # store a baseline
+    python benchmarks/bench_core.py --compare base.json  # flag regressions
+
+Cases, each reported as ops/s and per-op latency percentiles:
+
+    move         Snake.move() on an unbounded board, by snake length
+    collision    Snake.check_collision_self(), by snake length
+    spawn        Food.spawn() by board and fill ratio (the fraction of the
+                 board the snake covers), with the free-cell list ('dense')
+                 and by rejection sampling ('sparse')
+    safe_pos     snake_core_3d.get_random_position_safe(), likewise
+    tick         a whole Game.step() with the snake running a Hamiltonian
+                 cycle of the board, so it never dies, by board and fill
+
+Micro-ops are timed in batches of BATCH calls; a latency sample is one
+batch's mean. Ticks are timed one by one. Each case keeps the fastest of
+REPEATS runs. --compare exits with status 1 if
+any case's ops/s fell more than --threshold below the baseline. Baselines
+are only comparable on the same machine and Python. Nothing here imports
+Ursina.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import snake_core_3d
+import snake_game_2d
+from autopilot import board_cycle
+from grid import DIRECTION_CODES, DIRECTION_DELTAS
+
+LENGTHS = [10, 1000, 100000]
+BOARDS = [(20, 20), (100, 100), (10, 10, 10), (30, 30, 30)]
+FILL_RATIOS = [0.1, 0.5, 0.9]
+BATCH = 100
+MICRO_OPS = 20000
+TICKS = 5000
+REPEATS = 3      # Each case runs this many times and keeps its fastest run, to damp noise
+THRESHOLD = 0.10 # Default allowed drop in ops/s before a case counts as regressed
+
+
+def percentile(ordered, p):
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def summarize(samples):
+    """samples: seconds per op."""
+    ordered = sorted(samples)
+    return {
+        'ops_per_s': len(samples) / sum(samples),
+        'p50_us': percentile(ordered, 0.50) * 1e6,
+        'p90_us': percentile(ordered, 0.90) * 1e6,
+        'p99_us': percentile(ordered, 0.99) * 1e6,
+        'max_us': ordered[-1] * 1e6,
+    }
+
+
+def time_batches(op, total):
+    """Calls op() total times; one sample (mean seconds per call) per BATCH."""
+    samples = []
+    clock = time.perf_counter
+    for _ in range(max(total // BATCH, 1)):
+        start = clock()
+        for _ in range(BATCH):
+            op()
+        samples.append((clock() - start) / BATCH)
+    return summarize(samples)
+
+
+def straight_snake(dims, length):
+    """A snake with no walls or free-cell list, heading along +x."""
+    if dims == 2:
+        return snake_game_2d.Snake(start_pos=(length, 0), start_length=length)
+    return snake_core_3d.Snake(start_pos=(length, 0, 0), start_length=length)
+
+
+def filled_body(board, fill):
+    """A body covering fill of the board along its Hamiltonian cycle, head
+    first, so moving on along the cycle never hits anything."""
+    cycle = board_cycle(board)
+    length = max(int(len(cycle) * fill), 2)
+    return cycle[:length][::-1], cycle
+
+
+def cycle_directions(cycle):
+    """cell -> direction code of the move to the next cell of the cycle."""
+    codes = DIRECTION_CODES[len(cycle[0])]
+    nxt = cycle[1:] + cycle[:1]
+    return {cell: codes[tuple(b - a for a, b in zip(cell, following))] for cell, following in zip(cycle, nxt)}
+
+
+def bench_move(dims, length):
+    snake = straight_snake(dims, length)
+    return time_batches(snake.move, MICRO_OPS)
+
+
+def bench_collision(dims, length):
+    snake = straight_snake(dims, length)
+    return time_batches(snake.check_collision_self, MICRO_OPS)
+
+
+def filled_snake(board, fill, dense):
+    body, _ = filled_body(board, fill)
+    if len(board) == 2:
+        snake = snake_game_2d.Snake(start_pos=body[0], board_size=board if dense else None)
+    else:
+        snake = snake_core_3d.Snake(start_pos=body[0], board_size=board if dense else None)
+    snake.load_body(body)
+    return snake
+
+
+def bench_spawn(board, fill, dense):
+    snake = filled_snake(board, fill, dense)
+    rng = random.Random(0)
+    if len(board) == 2:
+        food = snake_game_2d.Food(*board, snake.cells, snake.free_cells, rng=rng)
+        def op():
+            food.spawn(board[0], board[1], snake.cells, snake.free_cells)
+    else:
+        food = snake_core_3d.Food(*board, snake.cells, snake.free_cells, rng=rng)
+        def op():
+            food.spawn(snake.cells, snake.free_cells)
+    return time_batches(op, MICRO_OPS)
+
+
+def bench_safe_pos(board, fill, dense):
+    snake = filled_snake(board, fill, dense)
+    if len(board) == 2: # As a one-cell-deep 3D board
+        board += (1,)
+        body = [cell + (0,) for cell in snake.body]
+        snake = snake_core_3d.Snake(start_pos=body[0], board_size=board if dense else None)
+        snake.load_body(body)
+    rng = random.Random(0)
+    food = snake_core_3d.Food(*board, snake.cells, snake.free_cells, rng=rng)
+    def op():
+        snake_core_3d.get_random_position_safe(*board, snake.cells, food.position,
+                                               free_cells=snake.free_cells, rng=rng)
+    return time_batches(op, MICRO_OPS)
+
+
+def tick_game(board, fill):
+    """A game (not sparse) with its snake laid on the board's cycle; returns
+    (game, step function taking a direction code, the cycle)."""
+    body, cycle = filled_body(board, fill)
+    if len(board) == 2:
+        game = snake_game_2d.Game(*board, seed=0)
+        game.snake.load_body(body)
+        names = snake_game_2d.DIRECTION_NAMES
+        game.snake.direction = names[DIRECTION_CODES[2][(body[0][0] - body[1][0], body[0][1] - body[1][1])]]
+        game.food.spawn(*board, game.snake.cells, game.snake.free_cells)
+        def step(code):
+            game.step(names[code])
+        return game, step, cycle
+    game = snake_core_3d.Game(seed=0, board_size=board)
+    game.set_state(snake_core_3d.GameState.PLAYING)
+    snake = game.snake
+    snake.load_body(body)
+    game.items.reset(snake.free_cells)
+    game.food.spawn(snake.cells, snake.free_cells, game.items)
+    game.items.add(game.food.position, snake_core_3d.ItemKind.FOOD)
+    deltas = DIRECTION_DELTAS[3]
+    def step(code):
+        game.change_direction(deltas[code])
+        game.step()
+    return game, step, cycle
+
+
+def game_ended(game):
+    if isinstance(game, snake_game_2d.Game):
+        return game.game_over or game.won
+    return game.state != snake_core_3d.GameState.PLAYING
+
+
+def bench_tick(board, fill):
+    game, step, cycle = tick_game(board, fill)
+    directions = cycle_directions(cycle)
+    start_state = game.snapshot()
+    samples = []
+    clock = time.perf_counter
+    for _ in range(TICKS):
+        if game_ended(game): # The snake filled the board: start over at the same fill
+            game.restore(start_state)
+        code = directions[game.snake.body[0]]
+        start = clock()
+        step(code)
+        samples.append(clock() - start)
+    return summarize(samples)
+
+
+def board_name(board):
+    return 'x'.join(map(str, board))
+
+
+def cases():
+    """(name, thunk) for every case."""
+    for dims in (2, 3):
+        for length in LENGTHS:
+            yield f'move/{dims}d/len={length}', lambda dims=dims, length=length: bench_move(dims, length)
+            yield f'collision/{dims}d/len={length}', lambda dims=dims, length=length: bench_collision(dims, length)
+    for board in BOARDS:
+        for fill in FILL_RATIOS:
+            for dense in (True, False):
+                mode = 'dense' if dense else 'sparse'
+                yield (f'spawn/{board_name(board)}/fill={fill}/{mode}',
+                       lambda board=board, fill=fill, dense=dense: bench_spawn(board, fill, dense))
+                yield (f'safe_pos/{board_name(board)}/fill={fill}/{mode}',
+                       lambda board=board, fill=fill, dense=dense: bench_safe_pos(board, fill, dense))
+            yield f'tick/{board_name(board)}/fill={fill}', lambda board=board, fill=fill: bench_tick(board, fill)
+
+
+def compare(results, baseline, threshold):
+    """Names of cases whose ops/s dropped more than threshold below baseline."""
+    regressed = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is not None and result['ops_per_s'] < base['ops_per_s'] * (1 - threshold):
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--save', metavar='PATH', help="write the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare with a JSON baseline")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="allowed fractional drop in ops/s (default %(default)s)")
+    parser.add_argument('--filter', default='', help="only run cases whose name contains this")
+    parser.add_argument('--repeat', type=int, default=REPEATS, help="runs per case (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['cases']
+
+    results = {}
+    print(f"{'case':<40} {'ops/s':>12} {'p50 us':>9} {'p99 us':>9} {'vs base':>8}")
+    for name, run in cases():
+        if args.filter not in name:
+            continue
+        result = results[name] = max((run() for _ in range(args.repeat)), key=lambda r: r['ops_per_s'])
+        base = baseline.get(name)
+        change = f"{result['ops_per_s'] / base['ops_per_s'] - 1:>+8.1%}" if base else ''
+        print(f"{name:<40} {result['ops_per_s']:>12.0f} {result['p50_us']:>9.2f} {result['p99_us']:>9.2f} {change}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'cases': results}, f, indent=1, sort_keys=True)
+    if args.compare:
+        regressed = compare(results, baseline, args.threshold)
+        for name in regressed:
+            print(f"REGRESSION {name}: {results[name]['ops_per_s']:.0f} ops/s, "
+                  f"baseline {baseline[name]['ops_per_s']:.0f}")
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
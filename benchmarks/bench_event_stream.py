@@ -0,0 +1,51 @@
+"""Cost of keeping spectators up to date: copying the body vs the delta stream.
+
+Run from the project root:
+    python benchmarks/bench_event_stream.py
+
+Each of SPECTATORS observers keeps its own copy of the snake. 'copy' re-reads
+the whole body every tick, as observers did before the stream existed.
+'stream' subscribes a BodyMirror per spectator to Game.stream, so a tick
+costs the same however long the snake is. 'bare' is the game with no
+subscribers, which builds no events at all.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from event_stream import BodyMirror
+from snake_game_2d import Game
+
+LENGTHS = [10, 100, 1000, 10000]
+SPECTATORS = 10
+TICKS = 2000
+
+
+def new_game(length):
+    # A 3-row board just long enough to drive straight right for TICKS
+    return Game(length + TICKS + 2, 3, start_length=length, seed=0, sparse=True)
+
+
+def run(length, mode):
+    game = new_game(length)
+    copies = [None] * SPECTATORS
+    if mode == 'stream':
+        for _ in range(SPECTATORS):
+            game.stream.subscribe(BodyMirror(game.snake.body))
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        game.step("RIGHT")
+        if mode == 'copy':
+            for i in range(SPECTATORS):
+                copies[i] = list(game.snake.body)
+    return (time.perf_counter() - start) / TICKS * 1e6
+
+
+if __name__ == '__main__':
+    print(f"{SPECTATORS} spectators, us per tick")
+    print(f"{'length':>7}  {'bare':>8}  {'stream':>8}  {'copy':>10}")
+    for length in LENGTHS:
+        bare, stream, copy = (run(length, mode) for mode in ('bare', 'stream', 'copy'))
+        print(f"{length:>7}  {bare:>8.2f}  {stream:>8.2f}  {copy:>10.2f}")
@@ -0,0 +1,101 @@
+"""Load generator for the asyncio game server.
+
+Run from the project root:
+    python benchmarks/bench_game_server.py [sessions] [host:port]
+
+Without host:port a server is started in this process, so the clients and
+the server share one core. Each client opens a session, mirrors its game
+from the server's frames and turns at random now and then. A few clients
+never read, to exercise backpressure. After the run, every reading client's
+mirrored snake is checked against the server's game (in-process only).
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from game_server import ClientMirror, GameServer, encode_start, encode_turn, read_frame
+
+SESSIONS = 1000
+BOARD = (20, 20)
+TICK_MS = (50, 100, 200) # Sessions cycle through these tick speeds
+WARMUP = 2.0           # Seconds for every client to connect before measuring
+DURATION = 10.0
+TURN_CHANCE = 0.1
+STALLED_EVERY = 100      # Every this many-th client stops reading
+
+
+async def client(host, port, index, mirrors, stop):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode_start(*BOARD, TICK_MS[index % len(TICK_MS)], index))
+    if index % STALLED_EVERY == STALLED_EVERY - 1:
+        writer.transport.pause_reading()
+        await stop.wait()
+        writer.close()
+        return
+    rng = random.Random(index)
+    mirror = mirrors[index] = ClientMirror()
+    while not stop.is_set():
+        payload = await read_frame(reader)
+        if payload is None:
+            break
+        mirror.apply(payload)
+        if rng.random() < TURN_CHANCE:
+            writer.write(encode_turn(rng.randrange(4)))
+    writer.close()
+
+
+def check_mirrors(server, mirrors):
+    """Sessions whose mirrored snake is not the server's. Only meaningful
+    once both sides are at the same tick."""
+    mismatched = 0
+    for session in server.sessions.values():
+        mirror = mirrors.get(session.seed) # Each client seeds its session with its index
+        if mirror is None or mirror.tick != session.game.ticks:
+            continue
+        if list(mirror.body) != list(session.game.snake.body):
+            mismatched += 1
+    return mismatched
+
+
+async def main(sessions, address):
+    server = None
+    if address is None:
+        server = await GameServer().start()
+        host, port = server.host, server.port
+    else:
+        host, port = address.rsplit(':', 1)
+    mirrors = {}
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(client(host, int(port), i, mirrors, stop)) for i in range(sessions)]
+    await asyncio.sleep(WARMUP)
+    if server is not None:
+        server.reset_metrics()
+    for mirror in mirrors.values():
+        mirror.frames = mirror.bytes = 0
+    started = time.perf_counter()
+    await asyncio.sleep(DURATION)
+    elapsed = time.perf_counter() - started
+    frames = sum(mirror.frames for mirror in mirrors.values())
+    received = sum(mirror.bytes for mirror in mirrors.values())
+    print(f"{sessions} sessions for {elapsed:.1f}s, {frames / elapsed:.0f} frames/s, "
+          f"{received / elapsed / 1024:.0f} KiB/s received")
+    if server is not None:
+        metrics = server.metrics()
+        print(f"server: {metrics['server_ticks'] / elapsed:.0f} ticks/s, lateness mean {metrics['mean_ms']:.2f} ms, "
+              f"p50 {metrics['p50_ms']:.2f} ms, p99 {metrics['p99_ms']:.2f} ms, max {metrics['max_ms']:.2f} ms")
+        print(f"server: {metrics['bytes_sent'] / metrics['server_ticks']:.1f} bytes/tick, "
+              f"{metrics['stalls']} stalled flushes, {metrics['resyncs']} resyncs")
+        print(f"mirrors out of sync: {check_mirrors(server, mirrors)}")
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if server is not None:
+        await server.close()
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else SESSIONS
+    asyncio.run(main(count, sys.argv[2] if len(sys.argv) > 2 else None))
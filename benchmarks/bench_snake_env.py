@@ -0,0 +1,60 @@
+"""Microseconds per step of the RL environments, against the bare game tick.
+
+Run from the project root (requires NumPy):
+    python benchmarks/bench_snake_env.py
+
+A random agent plays; episodes that end are reset outside the timed step.
+'game' is the tick the environment wraps, so 'env' minus 'game' is the cost
+of the observation update, reward and bookkeeping.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from snake_env import SnakeEnv2D, SnakeEnv3D
+
+STEPS = 200000
+
+
+def time_env(env, steps=STEPS):
+    rng = random.Random(0)
+    actions = [rng.randrange(env.num_actions) for _ in range(steps)]
+    env.reset(seed=0)
+    clock = time.perf_counter
+    env_time = game_time = 0.0
+    for action in actions:
+        start = clock()
+        _, _, terminated, truncated, _ = env.step(action)
+        env_time += clock() - start
+        if terminated or truncated:
+            env.reset()
+    # The same actions straight into the game, for comparison
+    env.reset(seed=0)
+    game = env.game
+    three_d = len(env.board_size) == 3
+    for action in actions:
+        start = clock()
+        if three_d:
+            game.snake.turn(action)
+            game.step()
+            ended = game.state != game.state.PLAYING
+        else:
+            game.snake.turn(action)
+            game.step()
+            ended = game.game_over or game.won
+        game_time += clock() - start
+        if ended:
+            env.reset()
+            game = env.game
+    return env_time / steps * 1e6, game_time / steps * 1e6
+
+
+if __name__ == '__main__':
+    print(f"{'env':<22}  {'env us':>8}  {'game us':>8}")
+    for name, env in (('SnakeEnv2D 20x20', SnakeEnv2D(20, 20)),
+                      ('SnakeEnv3D 10x10x10', SnakeEnv3D((10, 10, 10)))):
+        env_us, game_us = time_env(env)
+        print(f"{name:<22}  {env_us:>8.2f}  {game_us:>8.2f}")
@@ -0,0 +1,30 @@
+"""Measures the cost of Snake.move() as the snake gets longer.
+
+Run from the project root:
+    python benchmarks/bench_snake_move.py
+
+With the deque-backed body the per-tick cost should stay flat across lengths.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from snake_game_2d import Snake
+
+LENGTHS = [10, 100, 1000, 10000, 100000]
+TICKS = 20000
+
+
+def time_moves(length, ticks=TICKS):
+    """Returns the mean seconds per move() for a snake of the given length."""
+    snake = Snake(start_pos=(length, 0), start_length=length)
+    # The snake heads right forever; Snake itself doesn't know about walls.
+    return min(timeit.repeat(snake.move, number=ticks, repeat=3)) / ticks
+
+
+if __name__ == '__main__':
+    print(f"{'length':>8}  {'ns/tick':>10}")
+    for length in LENGTHS:
+        print(f"{length:>8}  {time_moves(length) * 1e9:>10.1f}")
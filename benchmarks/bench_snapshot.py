@@ -0,0 +1,60 @@
+"""Measures Game.snapshot() and Game.restore() on 2D and 3D games.
+
+Run from the project root:
+    python benchmarks/bench_snapshot.py
+
+'board' snapshots hold only the packed state; 'exact' ones also carry the
+RNG state and free-cell order so a restored game replays identically.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import snake_core_3d
+import snake_game_2d
+
+LENGTHS = [3, 30, 100]
+NUMBER = 5000
+
+
+def grown_2d(length):
+    """A 2D game whose snake snakes back and forth over the top rows."""
+    game = snake_game_2d.Game(seed=0)
+    width = game.board_width
+    body = [(i % width if (i // width) % 2 == 0 else width - 1 - i % width, i // width)
+            for i in range(length - 1, -1, -1)]
+    game.snake.load_body(body)
+    return game
+
+
+def grown_3d(length):
+    game = snake_core_3d.Game(seed=0)
+    w, h = snake_core_3d.BOARD_WIDTH, snake_core_3d.BOARD_HEIGHT
+    body = []
+    for i in range(length - 1, -1, -1):
+        z, rest = divmod(i, w * h)
+        y, x = divmod(rest, w)
+        x = x if y % 2 == 0 else w - 1 - x
+        y = y if z % 2 == 0 else h - 1 - y
+        body.append((x, y, z))
+    game.snake.load_body(body)
+    game.items.reset(game.snake.free_cells)
+    return game
+
+
+def time_us(fn):
+    return min(timeit.repeat(fn, number=NUMBER, repeat=3)) / NUMBER * 1e6
+
+
+if __name__ == '__main__':
+    print(f"{'game':>4}  {'length':>6}  {'mode':>5}  {'snapshot us':>11}  {'restore us':>10}  {'bytes':>5}")
+    for name, make in (('2D', grown_2d), ('3D', grown_3d)):
+        for length in LENGTHS:
+            game = make(length)
+            for exact in (False, True):
+                snap = game.snapshot(exact)
+                print(f"{name:>4}  {length:>6}  {'exact' if exact else 'board':>5}  "
+                      f"{time_us(lambda: game.snapshot(exact)):>11.1f}  "
+                      f"{time_us(lambda: game.restore(snap)):>10.1f}  {len(snap.to_bytes()):>5}")
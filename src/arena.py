@@ -0,0 +1,184 @@
+"""Many 2D snakes and many food items on one board, moving simultaneously.
+
+All snakes share one occupancy index (cell -> number of segments on it)
+and one free-cell set, so resolving a tick costs a few dict operations per
+snake, however long the snakes are. The rules within a tick:
+
+  * Every live snake moves at once. A tail leaves its cell in the same tick,
+    so a head may enter the cell another snake's (or its own) tail is
+    leaving, unless that snake is growing.
+  * A head off the board or on a segment that stays occupied dies.
+  * Heads that meet on the same cell: the strictly longest snake survives
+    the meeting; if there is no single longest, all of them die. Snakes
+    swapping cells head to head run into each other's necks, so both die.
+  * A surviving head on food eats it: score + 1, and the snake grows by
+    one segment on its next move. Eaten food respawns on a free cell.
+  * Dead snakes are removed from the board; with respawn they come back at
+    a random free cell with one segment and grow back to start_length.
+
+Directions are the codes of snake_game_2d.DIRECTION_NAMES (clockwise, so
+the reverse of d is d ^ 2); trying to reverse keeps the current direction,
+as Snake.change_direction does.
+"""
+import random
+from collections import deque
+
+from free_cells import FreeCells
+from item_index import ItemIndex, ItemKind
+from grid import DIRECTION_DELTAS
+
+_DELTAS = DIRECTION_DELTAS[2]
+
+
+class ArenaSnake:
+    __slots__ = ('id', 'body', 'direction', 'grow', 'alive', 'score', 'deaths')
+
+    def __init__(self, snake_id):
+        self.id = snake_id
+        self.body = deque()
+        self.direction = 0
+        self.grow = 0      # Moves left on which the tail stays put
+        self.alive = False
+        self.score = 0
+        self.deaths = 0
+
+
+class Arena:
+    """num_snakes snakes and num_food food items on a board_width x
+    board_height board. step() runs one simultaneous tick."""
+
+    def __init__(self, num_snakes, board_width, board_height, num_food=1, start_length=3,
+                 respawn=True, seed=None):
+        self.board_width = board_width
+        self.board_height = board_height
+        self.start_length = start_length
+        self.respawn = respawn
+        self.rng = random.Random(seed)
+        self.ticks = 0
+        self.cells = {} # Occupancy index shared by every snake: cell -> segment count
+        self.free_cells = FreeCells((board_width, board_height))
+        self.items = ItemIndex(self.free_cells)
+        self.snakes = [ArenaSnake(i) for i in range(num_snakes)]
+        for snake in self.snakes:
+            self._spawn_snake(snake)
+        for _ in range(num_food):
+            self._spawn_food()
+
+    def _occupy(self, cell):
+        count = self.cells.get(cell, 0)
+        self.cells[cell] = count + 1
+        if count == 0:
+            self.free_cells.discard(cell)
+
+    def _vacate(self, cell):
+        count = self.cells[cell]
+        if count == 1:
+            del self.cells[cell]
+            self.free_cells.add(cell)
+        else:
+            self.cells[cell] = count - 1
+
+    def _spawn_snake(self, snake):
+        """Puts a dead snake back as one segment on a random free cell;
+        returns False if the board has no room."""
+        cell = self.free_cells.sample(self.rng)
+        if cell is None:
+            return False
+        snake.body.clear()
+        snake.body.append(cell)
+        snake.direction = self.rng.randrange(4)
+        snake.grow = self.start_length - 1
+        snake.alive = True
+        self._occupy(cell)
+        return True
+
+    def _spawn_food(self):
+        cell = self.free_cells.sample(self.rng)
+        if cell is not None:
+            self.items.add(cell, ItemKind.FOOD)
+        return cell
+
+    def _kill(self, snake):
+        snake.alive = False
+        snake.deaths += 1
+        for cell in snake.body:
+            self._vacate(cell)
+        snake.body.clear()
+
+    def step(self, actions=None):
+        """Runs one tick. actions[i] is a direction code for snake i, or None
+        to keep going; actions itself may be None. Returns the snakes that
+        died this tick."""
+        w, h = self.board_width, self.board_height
+        cells = self.cells
+        moving = []
+        heads = {}   # new head cell -> snakes moving there
+        current = {} # current head cell -> snake, to spot swaps
+        leaving = {} # cell -> tails leaving it this tick
+        for snake in self.snakes:
+            if not snake.alive:
+                continue
+            if actions is not None:
+                action = actions[snake.id]
+                if action is not None and (action ^ 2 != snake.direction or len(snake.body) == 1):
+                    snake.direction = action
+            x, y = snake.body[0]
+            dx, dy = _DELTAS[snake.direction]
+            head = (x + dx, y + dy)
+            moving.append((snake, head))
+            heads.setdefault(head, []).append(snake)
+            current[snake.body[0]] = (snake, head)
+            if not snake.grow:
+                tail = snake.body[-1]
+                leaving[tail] = leaving.get(tail, 0) + 1
+
+        dead = []
+        for snake, head in moving:
+            x, y = head
+            if not (0 <= x < w and 0 <= y < h):
+                dead.append(snake)
+                continue
+            if cells.get(head, 0) - leaving.get(head, 0) > 0:
+                dead.append(snake)
+                continue
+            # Swapping cells with another head: the tail credit above lets a
+            # one-segment pair slip through each other, so check it directly
+            other = current.get(head)
+            if other is not None and other[0] is not snake and other[1] == snake.body[0]:
+                dead.append(snake)
+                continue
+            rivals = heads[head]
+            if len(rivals) > 1:
+                longest = max(len(rival.body) for rival in rivals)
+                winners = [rival for rival in rivals if len(rival.body) == longest]
+                if len(winners) > 1 or winners[0] is not snake:
+                    dead.append(snake)
+
+        dead_ids = {snake.id for snake in dead}
+        eaten = 0
+        for snake, head in moving:
+            if snake.id in dead_ids:
+                continue
+            snake.body.appendleft(head)
+            self._occupy(head)
+            if snake.grow:
+                snake.grow -= 1
+            else:
+                self._vacate(snake.body.pop())
+            if self.items.take(head) is ItemKind.FOOD:
+                snake.score += 1
+                snake.grow += 1
+                eaten += 1
+        for snake in dead:
+            self._kill(snake)
+        for _ in range(eaten):
+            self._spawn_food()
+        if self.respawn:
+            for snake in dead:
+                self._spawn_snake(snake)
+        self.ticks += 1
+        return dead
+
+    @property
+    def alive(self):
+        return sum(1 for snake in self.snakes if snake.alive)
@@ -0,0 +1,117 @@
+"""Lazy, cached loading of the game's models, textures and sounds.
+
+The manager knows nothing about Ursina: the front end passes in one loader
+function per asset kind (e.g. load_model, load_texture, Audio). An asset is
+loaded the first time get() asks for it, or earlier by preload(), which can
+run on a background thread while the start screen is up. Every load is timed.
+
+A loader that raises (say, Audio on a machine with no sound device) doesn't
+stop the game: get() returns None for that asset and the error is kept in
+failures.
+"""
+import os
+import threading
+import time
+
+ASSET_ROOT = 'assets'
+KIND_DIRECTORIES = {'models': 'model', 'textures': 'texture', 'sounds': 'sound'}
+
+
+class AssetManager:
+    """Registry of asset paths plus a cache of loaded handles.
+
+    Assets are keyed by path, exactly as the front end names them (e.g.
+    'assets/textures/snake_skin.png'); their kind comes from the directory
+    they are in. Options given to register() are passed to the loader."""
+
+    def __init__(self, loaders, root=ASSET_ROOT):
+        self.loaders = loaders   # kind -> callable(path, **options) returning a handle
+        self.root = root
+        self.timings = {}        # path -> seconds the load took
+        self.failures = {}       # path -> exception the loader raised
+        self._options = {}       # path -> loader keyword arguments
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._preload_thread = None
+
+    def scan(self):
+        """Registers every file under root/models, root/textures and
+        root/sounds. Nothing is loaded. Returns the registered paths."""
+        paths = []
+        for directory in KIND_DIRECTORIES:
+            folder = os.path.join(self.root, directory)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                if name.startswith('.'): # .gitkeep and the like
+                    continue
+                path = f'{self.root}/{directory}/{name}'
+                self._options.setdefault(path, {})
+                paths.append(path)
+        return paths
+
+    def register(self, path, **options):
+        self._options[path] = options
+
+    def kind_of(self, path):
+        directory = os.path.basename(os.path.dirname(path))
+        try:
+            return KIND_DIRECTORIES[directory]
+        except KeyError:
+            raise ValueError(f"Can't tell the asset kind of {path!r}") from None
+
+    def is_loaded(self, path):
+        return path in self._cache
+
+    def get(self, path):
+        """The loaded handle for path, loading it now if needed (None if its
+        loader failed)."""
+        try:
+            return self._cache[path]
+        except KeyError:
+            pass
+        with self._lock: # Another thread may be loading it right now
+            if path not in self._cache:
+                self._load(path)
+            return self._cache[path]
+
+    def _load(self, path):
+        loader = self.loaders[self.kind_of(path)]
+        start = time.perf_counter()
+        try:
+            handle = loader(path, **self._options.get(path, {}))
+        except Exception as e:
+            handle = None
+            self.failures[path] = e
+        self.timings[path] = time.perf_counter() - start
+        self._cache[path] = handle
+
+    def preload(self, paths=None, background=True):
+        """Loads paths (default: everything registered) ahead of use. With
+        background, loads run on a daemon thread and this returns at once;
+        get() on an asset the thread is still loading waits for it."""
+        paths = list(self._options if paths is None else paths)
+        if not background:
+            self._load_all(paths)
+            return None
+        if self.preloading:
+            return self._preload_thread
+        self._preload_thread = threading.Thread(target=self._load_all, args=(paths,),
+                                                name='asset-preload', daemon=True)
+        self._preload_thread.start()
+        return self._preload_thread
+
+    def _load_all(self, paths):
+        for path in paths:
+            self.get(path)
+
+    @property
+    def preloading(self):
+        return self._preload_thread is not None and self._preload_thread.is_alive()
+
+    def report(self):
+        """Load times, slowest first, as text lines."""
+        lines = [f'{seconds * 1000.0:8.1f} ms  {path}'
+                 for path, seconds in sorted(self.timings.items(), key=lambda item: -item[1])]
+        lines += [f'  failed    {path}: {error}' for path, error in self.failures.items()]
+        return '\n'.join(lines)
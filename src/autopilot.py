@@ -0,0 +1,304 @@
+"""Pathfinding autopilot for the 2D and 3D snake games.
+
+On a board with a Hamiltonian cycle, the snake follows the cycle, taking
+shortcuts towards the food. This is safe as long as the body lies along the
+cycle in order, tail first: the positions of the body cells then increase
+from tail to head, with gaps where shortcuts skipped cells. A move to any
+neighbour whose cycle position lies after the head and before the tail
+keeps that order and can't hit the body. A shortcut is only taken while
+the free cells ahead of the new head still outnumber the body and the gaps
+it leaves behind. Near the end there are too few free cells ahead, so the
+snake follows the cycle strictly and, as the cycle covers every cell,
+fills the board. A new 2D snake on a board of even width starts in order
+(the cycle crosses those rows in increasing x); any other snake plays as
+below until its body falls into order.
+
+Otherwise (odd boards, or a body that isn't in cycle order, e.g. after a
+restore), each decision, in order of preference:
+  1. BFS a shortest path to the food through cells the snake doesn't cover,
+     and take it if, once the snake has followed it and eaten, its head can
+     still reach its tail (so it can't have boxed itself in).
+  2. Otherwise take the next cell of a Hamiltonian cycle over the board,
+     if that move passes the same tail-reachability check.
+  3. Otherwise the safe neighbour from which the tail is farthest, to stall
+     for space; failing that, any free neighbour.
+Stalling can go on forever, so after idle_limit decisions without eating,
+the snake takes any path to the food, tail check or not.
+
+Search runs on flat cell indices (see grid.cell_index) with buffers
+allocated once per board: visited marks use a generation counter instead
+of being cleared, and the BFS queue is a fixed-size list. A safe path to the
+food stays valid while the snake follows it, so it is kept and replayed one
+move per tick; the board is only searched again after the food is eaten or
+the game went somewhere the plan didn't.
+"""
+from itertools import islice
+
+from snake_game_2d import DIRECTION_NAMES
+from grid import DIRECTION_DELTAS, strides
+
+
+def grid_cycle(width, height):
+    """A Hamiltonian cycle over a width x height grid as a list of (x, y),
+    or None if there isn't one (an odd number of cells, or a 1-wide grid)."""
+    if width < 2 or height < 2 or (width * height) % 2:
+        return None
+    if width % 2: # Build it with an even number of columns, then transpose
+        return [(x, y) for y, x in grid_cycle(height, width)]
+    # Serpentine through rows 1.. column by column, then home along row 0
+    cycle = [(0, 0)]
+    for x in range(width):
+        rows = range(1, height) if x % 2 == 0 else range(height - 1, 0, -1)
+        cycle.extend((x, y) for y in rows)
+    cycle.extend((x, 0) for x in range(width - 1, 0, -1))
+    return cycle
+
+
+def board_cycle(board_size):
+    """A Hamiltonian cycle over a 2D or 3D board, or None."""
+    if len(board_size) == 2:
+        return grid_cycle(*board_size)
+    width, height, depth = board_size
+    layer = grid_cycle(width, height)
+    if layer is None:
+        return None
+    # Cycle (layer position, z) over a len(layer) x depth grid, which also
+    # steps between neighbouring cells: consecutive layer positions are
+    # adjacent in the layer, and consecutive z are adjacent layers.
+    outer = grid_cycle(len(layer), depth)
+    if outer is None:
+        return None
+    return [layer[i] + (z,) for i, z in outer]
+
+
+class Autopilot:
+    """Chooses moves for a snake on one board size.
+
+    decide() takes the snake's body (head first, e.g. Snake.body), the food
+    cell and whether the snake grows on its next move, and returns a
+    direction code: an index into grid.DIRECTION_DELTAS[dims], which is
+    snake_game_2d.DIRECTION_NAMES order in 2D and snake_core_3d.DIRECTIONS
+    order in 3D. Use direction_2d()/direction_3d() to drive a game directly.
+
+    idle_limit defaults to two laps of the board."""
+
+    def __init__(self, board_size, idle_limit=None):
+        self.board_size = tuple(board_size)
+        self.dims = len(self.board_size)
+        self._strides = strides(self.board_size)
+        cells = 1
+        for d in self.board_size:
+            cells *= d
+        self.num_cells = cells
+        self.idle_limit = 2 * cells if idle_limit is None else idle_limit
+
+        # neighbours[c]: (direction code, neighbour index) for each in-bounds neighbour
+        deltas = DIRECTION_DELTAS[self.dims]
+        self.neighbours = []
+        for index in range(cells):
+            cell = self._cell(index)
+            found = []
+            for code, delta in enumerate(deltas):
+                nxt = tuple(c + d for c, d in zip(cell, delta))
+                if all(0 <= c < d for c, d in zip(nxt, self.board_size)):
+                    found.append((code, self._index(nxt)))
+            self.neighbours.append(tuple(found))
+
+        cycle = board_cycle(self.board_size)
+        self.cycle_next = None # cell index -> (code, next index) along the cycle
+        self.cycle_pos = None  # cell index -> position along the cycle
+        if cycle is not None:
+            self.cycle_next = [None] * cells
+            self.cycle_pos = [0] * cells
+            flat = [self._index(cell) for cell in cycle]
+            for i, index in enumerate(flat):
+                self.cycle_pos[index] = i
+                nxt = flat[(i + 1) % len(flat)]
+                self.cycle_next[index] = next(pair for pair in self.neighbours[index] if pair[1] == nxt)
+
+        # Search buffers, reused by every decision
+        self._generation = 0
+        self._visited = [0] * cells
+        self._blocked = [0] * cells
+        self._parent = [0] * cells
+        self._parent_code = [0] * cells
+        self._depth = [0] * cells
+        self._queue = [0] * cells
+
+        self._plan = []           # Remaining (code, cell) moves of a safe food path, last move first
+        self._plan_head = None    # Where the head must be for the plan to still apply
+        self._plan_food = None
+        self._idle = 0            # Decisions since the snake last ate
+        self._last_length = 0
+
+    def _index(self, cell):
+        return sum(c * s for c, s in zip(cell, self._strides))
+
+    def _cell(self, index):
+        cell = []
+        for d in self.board_size:
+            index, c = divmod(index, d)
+            cell.append(c)
+        return tuple(cell)
+
+    def _next_generation(self):
+        self._generation += 1
+        return self._generation
+
+    def _block(self, cells):
+        """Marks cells as blocked for the next search; returns the mark."""
+        mark = self._next_generation()
+        blocked = self._blocked
+        for cell in cells:
+            blocked[cell] = mark
+        return mark
+
+    def _bfs(self, start, target, mark):
+        """Breadth-first search from start over cells not blocked with mark;
+        target counts as open. Returns the depth of target (None if it can't
+        be reached), leaving parents in the buffers for _path()."""
+        visited, blocked, neighbours = self._visited, self._blocked, self.neighbours
+        parent, parent_code, depth, queue = self._parent, self._parent_code, self._depth, self._queue
+        seen = self._next_generation()
+        visited[start] = seen
+        depth[start] = 0
+        queue[0] = start
+        read, write = 0, 1
+        while read < write:
+            cell = queue[read]
+            read += 1
+            for code, nxt in neighbours[cell]:
+                if visited[nxt] == seen or (blocked[nxt] == mark and nxt != target):
+                    continue
+                visited[nxt] = seen
+                parent[nxt] = cell
+                parent_code[nxt] = code
+                depth[nxt] = depth[cell] + 1
+                if nxt == target:
+                    return depth[nxt]
+                queue[write] = nxt
+                write += 1
+        return None
+
+    def _path(self, start, target):
+        """(code, cell) moves from start to target, last move first."""
+        moves = []
+        cell = target
+        while cell != start:
+            moves.append((self._parent_code[cell], cell))
+            cell = self._parent[cell]
+        return moves
+
+    def _tail_distance(self, path_cells, body, growing, eats=False):
+        """Follows path_cells (head side first) from body and returns how far
+        the head then is from the tail, or None if the tail can't be reached.
+        eats means the path ends on the food, so the snake grows next move."""
+        steps = len(path_cells)
+        length = len(body) + (1 if growing else 0)
+        virtual = list(islice(path_cells, length)) + body[:max(length - steps, 0)]
+        if len(virtual) < 2:
+            return 1
+        mark = self._block(virtual)
+        distance = self._bfs(virtual[0], virtual[-1], mark)
+        # After eating the tail stays put for a move: stepping onto it then would be a collision
+        if eats and distance is not None and distance < 2 and len(virtual) > 2:
+            return None
+        return distance
+
+    def _cycle_move(self, flat, food, growing):
+        """Direction code of the move along the cycle, with a shortcut if one
+        is safe, or None if the body isn't in cycle order (or, in a lost
+        position, nothing is safe)."""
+        pos, n = self.cycle_pos, self.num_cells
+        head, tail = flat[0], flat[-1]
+        base = pos[tail]
+        previous = -1
+        for i in range(len(flat) - 1, -1, -1): # Tail to head, positions relative to the tail's
+            at = (pos[flat[i]] - base) % n
+            if at <= previous:
+                return None
+            previous = at
+        length = len(flat)
+        head_pos = pos[head]
+        to_tail = (base - head_pos) % n or n
+        to_food = n if food is None else (pos[food] - head_pos) % n
+        new_tail = tail if growing or length == 1 else flat[-2]
+        new_length = length + 1 if growing else length
+        best, best_step = None, 0
+        for code, cell in self.neighbours[head]:
+            step = (pos[cell] - head_pos) % n
+            # Onto the tail only when it moves away, and never back onto the neck
+            if step == 0 or step > to_tail or (step == to_tail and (growing or length <= 2)):
+                continue
+            if step > 1: # A shortcut: the cells it skips become gaps behind the head
+                ahead = (pos[new_tail] - pos[cell]) % n - 1
+                gaps = n - ahead - new_length
+                if ahead <= gaps + new_length:
+                    continue
+            # Furthest along without passing the food
+            if step <= to_food and step > best_step:
+                best, best_step = code, step
+        if best is None and to_tail == 1 and not growing and length > 2:
+            return None
+        return best
+
+    def decide(self, body, food, growing=False):
+        index = self._index
+        head = index(body[0])
+        food = None if food is None else index(food)
+        if len(body) != self._last_length:
+            self._idle, self._last_length = 0, len(body)
+        self._idle += 1
+
+        if self.cycle_pos is not None:
+            code = self._cycle_move([index(cell) for cell in body], food, growing)
+            if code is not None:
+                self._plan = []
+                return code
+
+        if self._plan and self._plan_head == head and self._plan_food == food:
+            code, cell = self._plan.pop()
+            self._plan_head = cell
+            return code
+        self._plan = []
+
+        flat = [index(cell) for cell in body]
+        # The tail moves out of the way this tick unless the snake is growing
+        mark = self._block(flat if growing else islice(flat, 0, len(flat) - 1))
+        # Before any other search re-marks the buffers
+        open_moves = [(code, cell) for code, cell in self.neighbours[head] if self._blocked[cell] != mark]
+
+        if food is not None and self._bfs(head, food, mark) is not None:
+            moves = self._path(head, food)
+            path_cells = [cell for _, cell in moves]
+            if (self._idle > self.idle_limit # Stalled too long: go for it regardless
+                    or self._tail_distance(path_cells, flat, growing, eats=True) is not None):
+                code, cell = moves.pop()
+                self._plan, self._plan_head, self._plan_food = moves, cell, food
+                return code
+
+        if not open_moves:
+            return None
+        if self.cycle_next is not None:
+            code, cell = self.cycle_next[head]
+            if (code, cell) in open_moves and self._tail_distance([cell], flat, growing) is not None:
+                return code
+
+        best, best_distance = open_moves[0][0], -1
+        for code, cell in open_moves:
+            distance = self._tail_distance([cell], flat, growing)
+            if distance is not None and distance > best_distance:
+                best, best_distance = code, distance
+        return best
+
+    def direction_2d(self, game):
+        """Direction name for a snake_game_2d.Game's next step()."""
+        snake = game.snake
+        code = self.decide(snake.body, game.food.position, snake._should_grow)
+        return snake.direction if code is None else DIRECTION_NAMES[code]
+
+    def direction_3d(self, game):
+        """Direction vector for a snake_core_3d.Game's change_direction()."""
+        snake = game.snake
+        code = self.decide(snake.body, game.food.position, snake._should_grow)
+        return snake.direction if code is None else DIRECTION_DELTAS[3][code]
@@ -0,0 +1,190 @@
+"""Steps many 2D snake games at once with NumPy.
+
+BatchSnakeEnv follows the rules of snake_game_2d (Snake, Food and
+check_collision_wall as driven by its __main__ loop) for N boards in lockstep.
+Requires NumPy, which the scalar game does not.
+"""
+import numpy as np
+
+from snake_game_2d import BOARD_WIDTH, BOARD_HEIGHT, DIRECTION_NAMES
+
+# Action codes, clockwise so that the reverse of a is a ^ 2
+ACTIONS = {name: code for code, name in enumerate(DIRECTION_NAMES)}
+
+REWARD_FOOD = 1.0
+REWARD_DEATH = -1.0
+
+# Stamp of the border cells; higher than any real step count, so walls always read as occupied
+_WALL = np.iinfo(np.int32).max
+
+# Rejection draws tried for every respawning game before falling back to an exact scan
+_SPAWN_TRIES = 8
+
+
+class BatchSnakeEnv:
+    """N independent 2D snake games advanced by one vectorized step().
+
+    Each board is stored padded by a one-cell border, (H+2) x (W+2), flattened;
+    padded cell index = (x+1) + (W+2)*(y+1). Instead of 0/1 occupancy a cell
+    holds the step count at which a head last entered it. With steps[g] heads
+    placed so far and a body of length[g], the body is exactly the cells whose
+    stamp is in (steps - length, steps], so the stamps double as the body ring:
+    the tail drops out when steps advances, and growing is just length + 1.
+    Border cells hold _WALL, which makes a wall hit an ordinary occupied-cell
+    hit. One extra trailing cell per board absorbs writes from games a step
+    leaves alone.
+
+    Games that end are reset in the same step when auto_reset is set;
+    otherwise they stay frozen until reset() is called for them."""
+
+    def __init__(self, num_games, board_width=BOARD_WIDTH, board_height=BOARD_HEIGHT,
+                 start_length=3, auto_reset=True, seed=None):
+        self.num_games = num_games
+        self.board_width = board_width
+        self.board_height = board_height
+        self.num_cells = board_width * board_height
+        self.start_length = start_length
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+
+        n, w, h = num_games, board_width, board_height
+        self._stride = w + 2
+        self._padded = self._stride * (h + 2)
+        self._sink = self._padded # The extra trailing cell
+        self._delta = np.array([1, self._stride, -1, -self._stride], dtype=np.int64) # Matches ACTIONS
+        # Padded index of every board cell, in x + W*y order
+        xs, ys = np.meshgrid(np.arange(w), np.arange(h))
+        self._interior = ((xs + 1) + self._stride * (ys + 1)).reshape(-1)
+
+        stamps = np.full((h + 2, w + 2), _WALL, dtype=np.int32)
+        stamps[1:-1, 1:-1] = 0
+        self.stamps = np.empty((n, self._padded + 1), dtype=np.int32)
+        self.stamps[:, :self._padded] = stamps.reshape(-1)
+        self.stamps[:, self._sink] = 0
+        self._stamps_flat = self.stamps.reshape(-1)
+        self._base = np.arange(n, dtype=np.int64) * (self._padded + 1)
+
+        # Same placement as the scalar __main__: head at (max(len-1, W//4), H//2) facing RIGHT
+        start_x = max(start_length - 1, w // 4)
+        start_y = h // 2
+        self._start_cells = np.array([self._cell(start_x - i, start_y) for i in range(start_length)],
+                                     dtype=np.int64)
+
+        self.head = np.zeros(n, dtype=np.int64) # Padded cell index
+        self.steps = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int64)
+        self.food = np.zeros(n, dtype=np.int64) # Padded cell index; the sink when there is none
+        self.growing = np.zeros(n, dtype=bool)
+        self.alive = np.zeros(n, dtype=bool)
+        self.won = np.zeros(n, dtype=bool)
+        self.reset()
+
+    def _cell(self, x, y):
+        return (x + 1) + self._stride * (y + 1)
+
+    def _position(self, cell):
+        return (int(cell) % self._stride - 1, int(cell) // self._stride - 1)
+
+    def head_position(self, game):
+        """Head of one game as an (x, y) tuple."""
+        return self._position(self.head[game])
+
+    def food_position(self, game):
+        """Food of one game as an (x, y) tuple, or None on a full board."""
+        return None if self.food[game] == self._sink else self._position(self.food[game])
+
+    def observation(self, out=None):
+        """Occupancy of every board as an (N, H, W) bool array, walls excluded."""
+        w, h, s = self.board_width, self.board_height, self._stride
+        board = self.stamps[:, :self._padded].reshape(self.num_games, h + 2, s)[:, 1:-1, 1:-1]
+        threshold = (self.steps - self.length)[:, None, None]
+        return np.greater(board, threshold, out=out)
+
+    def body(self, game):
+        """Body of one game as a list of (x, y) tuples, head first."""
+        interior = self._interior
+        stamps = self.stamps[game, interior]
+        on_body = np.flatnonzero(stamps > self.steps[game] - self.length[game])
+        order = on_body[np.argsort(-stamps[on_body])]
+        return [self._position(interior[i]) for i in order]
+
+    def reset(self, mask=None):
+        """Resets the games selected by the boolean mask (all games by default)."""
+        rows = np.arange(self.num_games) if mask is None else np.flatnonzero(mask)
+        if rows.size == 0:
+            return
+        # No clearing needed: lifting steps past every old stamp frees the whole board
+        k = self.start_length
+        first = self.steps[rows] + 1
+        self.steps[rows] += k
+        self.length[rows] = k
+        # Tail gets the oldest stamp, head the newest
+        stamps = first[:, None] + np.arange(k - 1, -1, -1, dtype=np.int32)
+        self._stamps_flat[self._base[rows, None] + self._start_cells] = stamps
+        self.head[rows] = self._start_cells[0]
+        self.direction[rows] = ACTIONS["RIGHT"]
+        self.growing[rows] = False
+        self.alive[rows] = True
+        self.won[rows] = False
+        self._spawn_food(rows)
+
+    def _spawn_food(self, rows):
+        """Places food on a uniformly random free cell for each game in rows.
+        Games with no free cell are marked as won."""
+        stamps, base, threshold = self._stamps_flat, self._base, self.steps - self.length
+        full = self.length[rows] >= self.num_cells
+        if full.any():
+            self.food[rows[full]] = self._sink
+            self.won[rows[full]] = True
+            rows = rows[~full]
+        pending = rows
+        for _ in range(_SPAWN_TRIES):
+            if pending.size == 0:
+                return
+            cand = self._interior[self.rng.integers(0, self.num_cells, size=pending.size)]
+            free = stamps[base[pending] + cand] <= threshold[pending]
+            self.food[pending[free]] = cand[free]
+            pending = pending[~free]
+        for row in pending: # Nearly full boards: pick from the free cells exactly
+            free_cells = self._interior[self.stamps[row, self._interior] <= threshold[row]]
+            self.food[row] = free_cells[self.rng.integers(free_cells.size)]
+
+    def step(self, actions):
+        """Advances every live game by one tick.
+
+        actions is an int array of codes from ACTIONS; reversing into the body
+        is ignored, as in Snake.change_direction. Returns (rewards, dones):
+        rewards is +1 for food, -1 for a wall or self collision, else 0; dones
+        is True for games that ended this step (collision or a full board)."""
+        alive = self.alive
+        direction = self.direction
+        actions = np.asarray(actions, dtype=np.int64)
+        # Blend with arithmetic rather than np.where; data-dependent masks make where slow
+        turn = actions != direction ^ 2
+        direction += turn * (actions - direction)
+
+        new_head = self.head + self._delta.take(direction)
+        steps = self.steps + 1
+        length = self.length + self.growing
+        # Walls carry _WALL, and the cell the tail just left is already below the threshold
+        dead = alive & (self._stamps_flat.take(self._base + new_head) > steps - length)
+        moving = alive & ~dead
+
+        self.steps += moving
+        self.length += moving & self.growing
+        self.head += moving * (new_head - self.head)
+        target = self._sink + moving * (new_head - self._sink)
+        self._stamps_flat[self._base + target] = self.steps
+
+        eat = moving & (new_head == self.food)
+        self.growing = eat
+        if eat.any():
+            self._spawn_food(np.flatnonzero(eat))
+
+        rewards = eat * np.float32(REWARD_FOOD) + dead * np.float32(REWARD_DEATH)
+        dones = dead | (eat & self.won)
+        self.alive &= ~dones
+        if self.auto_reset and dones.any():
+            self.reset(dones)
+        return rewards, dones
@@ -0,0 +1,110 @@
+"""Typed per-tick deltas of a snake game, fanned out to any number of observers.
+
+A tick only ever adds a head cell and maybe drops the tail cell, so that is
+what gets published, never the body. Both games publish on their `stream`:
+
+    Moved(head, tail)           the head entered head; tail is the cell the
+                                tail left, or None if the snake grew
+    Grew(length)                the tail stayed put; the snake is now length long
+    FoodEaten(cell, score)
+    FoodSpawned(cell)
+    PowerUpSpawned(cell)        3D only
+    PowerUpCollected(cell)      3D only
+    GameOver(score, won)
+    Reset()                     the whole state was replaced (new game or a
+                                restore); re-read it once from the game
+
+Events are immutable tuples and every subscriber is handed the same object,
+so fanning out costs one call per subscriber, whatever the snake's length.
+A game with no subscribers doesn't build events at all.
+"""
+from collections import deque, namedtuple
+
+Moved = namedtuple('Moved', 'head tail')
+Grew = namedtuple('Grew', 'length')
+FoodEaten = namedtuple('FoodEaten', 'cell score')
+FoodSpawned = namedtuple('FoodSpawned', 'cell')
+PowerUpSpawned = namedtuple('PowerUpSpawned', 'cell')
+PowerUpCollected = namedtuple('PowerUpCollected', 'cell')
+GameOver = namedtuple('GameOver', 'score won')
+Reset = namedtuple('Reset', '')
+
+RESET = Reset()
+
+
+class EventStream:
+    """Calls every subscriber with each published event, in subscription order."""
+
+    def __init__(self):
+        self._subscribers = () # Replaced, not mutated, so publish() can iterate while callbacks unsubscribe
+
+    def __bool__(self):
+        return bool(self._subscribers)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, callback):
+        """Adds callback(event); returns it, for unsubscribe()."""
+        self._subscribers += (callback,)
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers = tuple(s for s in self._subscribers if s is not callback)
+
+    def publish(self, event):
+        for callback in self._subscribers:
+            callback(event)
+
+
+class EventLog:
+    """Records a stream so any number of readers can catch up at their own
+    pace: each keeps an integer cursor and read() hands back what's new.
+    With maxlen, at least the latest maxlen events are kept (older ones are
+    trimmed in batches); a reader that falls further behind gets the oldest
+    kept events and should resync."""
+
+    def __init__(self, stream=None, maxlen=None):
+        self.events = []
+        self.maxlen = maxlen
+        self.dropped = 0 # Events trimmed off the front
+        if stream is not None:
+            stream.subscribe(self.append)
+
+    def append(self, event):
+        events = self.events
+        events.append(event)
+        if self.maxlen is not None and len(events) > 2 * self.maxlen:
+            trim = len(events) - self.maxlen
+            del events[:trim]
+            self.dropped += trim
+
+    def __len__(self):
+        """Events recorded so far, trimmed ones included: the cursor of the next event."""
+        return self.dropped + len(self.events)
+
+    def read(self, cursor=0):
+        """(events from cursor on, next cursor)."""
+        return self.events[max(cursor - self.dropped, 0):], self.dropped + len(self.events)
+
+
+class BodyMirror:
+    """A spectator's copy of the snake body, kept up to date from Moved
+    events. It copies the body once when created or reset, then does O(1)
+    work per tick."""
+
+    def __init__(self, body):
+        self.body = deque(body)
+        self.food = None
+
+    def __call__(self, event):
+        if type(event) is Moved:
+            self.body.appendleft(event.head)
+            if event.tail is not None:
+                self.body.pop()
+        elif type(event) is FoodSpawned:
+            self.food = event.cell
+
+    def reset(self, body, food=None):
+        self.body = deque(body)
+        self.food = food
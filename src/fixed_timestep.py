@@ -0,0 +1,92 @@
+"""Fixed-timestep scheduling for frame-driven game loops.
+
+Frames arrive with whatever dt the renderer manages; logic should advance in
+whole, equal steps regardless. FixedTimestep keeps the leftover time between
+frames, runs as many steps as have built up (capped, so one long hitch can't
+stall the next frames too), and reports how far into the next step the
+current frame is so the renderer can interpolate.
+"""
+MAX_STEPS_PER_FRAME = 5
+
+
+class FrameStats:
+    """Timing of the most recent frame plus running totals."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.steps = 0             # Logic steps run, all frames
+        self.steps_skipped = 0     # Steps dropped by the per-frame cap, all frames
+        self.logic_time = 0.0      # Seconds spent in logic, all frames
+        self.render_time = 0.0     # Seconds spent rendering, all frames
+        self.frame_steps = 0       # Steps run in the last frame
+        self.frame_skipped = 0     # Steps dropped in the last frame
+        self.frame_logic_time = 0.0
+        self.frame_render_time = 0.0
+
+    def record_logic(self, seconds):
+        """Time the game spent in update() this frame, steps included."""
+        self.frame_logic_time = seconds
+        self.logic_time += seconds
+
+    def record_render(self, seconds):
+        """For the front end to report how long it spent drawing this frame."""
+        self.frame_render_time = seconds
+        self.render_time += seconds
+
+    def summary(self):
+        frames = self.frames or 1
+        return {
+            'frames': self.frames,
+            'steps': self.steps,
+            'steps_skipped': self.steps_skipped,
+            'avg_logic_ms': self.logic_time / frames * 1000.0,
+            'avg_render_ms': self.render_time / frames * 1000.0,
+        }
+
+
+class FixedTimestep:
+    """Turns variable frame times into a count of fixed-length logic steps.
+
+    The step length is passed to advance() each frame rather than fixed at
+    construction, since the game changes speed (e.g. during a speed boost)."""
+
+    def __init__(self, max_steps_per_frame=MAX_STEPS_PER_FRAME):
+        self.max_steps_per_frame = max_steps_per_frame
+        self.accumulator = 0.0
+        self.step_seconds = None
+        self.stats = FrameStats()
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, dt, step_seconds):
+        """Adds dt seconds and returns how many steps of step_seconds to run
+        now. Time beyond max_steps_per_frame steps is dropped in whole steps
+        and counted as skipped; the part of a step left over carries forward."""
+        self.step_seconds = step_seconds
+        self.accumulator += dt
+        steps = int(self.accumulator // step_seconds)
+        skipped = 0
+        if steps > self.max_steps_per_frame:
+            skipped = steps - self.max_steps_per_frame
+            steps = self.max_steps_per_frame
+        self.accumulator -= (steps + skipped) * step_seconds
+
+        stats = self.stats
+        stats.frames += 1
+        stats.steps += steps
+        stats.steps_skipped += skipped
+        stats.frame_steps = steps
+        stats.frame_skipped = skipped
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction (0..1) of the next step that has already elapsed; the
+        renderer draws that far between the previous and current state."""
+        if not self.step_seconds:
+            return 1.0
+        return min(self.accumulator / self.step_seconds, 1.0)
@@ -0,0 +1,102 @@
+import random
+from itertools import product
+
+from grid import board_grid
+
+
+class _FullBoard:
+    """Every cell of a board free: the list and cell -> index map new
+    FreeCells copy, and the bounds table add() checks against."""
+    __slots__ = ('cells', 'index')
+
+    def __init__(self, grid):
+        # The grid's own tuples, so a cell is one object here and in the snakes' bodies
+        self.cells = [grid.cells[grid.index(cell)] for cell in product(*(range(d) for d in grid.board_size))]
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+
+
+def _full_board(grid):
+    """The grid's _FullBoard, built once and kept by the grid: it lives as
+    long as anything (a snake, a FreeCells) holds that grid, so replacing a
+    game's FreeCells, as every restore does, doesn't rebuild it."""
+    if grid.full_board is None:
+        grid.full_board = _FullBoard(grid)
+    return grid.full_board
+
+
+class FreeCells:
+    """Set of unoccupied board cells with O(1) add, discard and uniform sampling.
+
+    Cells live in a flat list with a cell -> index map; removing a cell swaps
+    the last cell into its slot, so the list never has holes and sampling is a
+    single randrange no matter how full the board is."""
+
+    def __init__(self, board_size):
+        """board_size is a tuple of dimensions, e.g. (width, height) or
+        (width, height, depth). Every in-bounds cell starts out free."""
+        self.board_size = tuple(board_size)
+        self._grid = grid = board_grid(self.board_size) # Keeps the shared full board alive
+        full = _full_board(grid)
+        self._board = full.index # Every in-bounds cell, for add()'s bounds check
+        # Copying the prebuilt board is much cheaper than enumerating it again,
+        # which matters when games are reset or restored many times
+        self._cells = full.cells.copy()
+        self._index = full.index.copy()
+
+    @classmethod
+    def from_order(cls, board_size, cells):
+        """A FreeCells holding exactly cells, in that order, e.g. order() of
+        another instance. Sampling depends on the order, so this is what makes
+        a restored game draw the same cells as the original."""
+        free = cls.__new__(cls)
+        free.board_size = tuple(board_size)
+        free._grid = board_grid(free.board_size)
+        free._board = _full_board(free._grid).index
+        free._cells = list(cells)
+        free._index = dict(zip(free._cells, range(len(free._cells))))
+        return free
+
+    def order(self):
+        return tuple(self._cells)
+
+    def __len__(self):
+        return len(self._cells)
+
+    def __contains__(self, cell):
+        return cell in self._index
+
+    def __iter__(self):
+        return iter(self._cells)
+
+    def add(self, cell):
+        """Marks cell as free. Out-of-bounds and already-free cells are ignored."""
+        # One lookup in the shared table of board cells instead of a per-axis bounds check
+        if cell in self._index or cell not in self._board:
+            return
+        self._index[cell] = len(self._cells)
+        self._cells.append(cell)
+
+    def discard(self, cell):
+        """Marks cell as occupied. Cells that aren't free are ignored."""
+        i = self._index.pop(cell, None)
+        if i is None:
+            return
+        last = self._cells.pop()
+        if i < len(self._cells):
+            self._cells[i] = last
+            self._index[last] = i
+
+    def sample(self, rng=random, exclude=()):
+        """Returns a uniformly random free cell not in exclude, or None if there
+        is none. exclude is meant for a handful of item positions; they are
+        taken out for the draw and put back, so the cost is O(len(exclude))."""
+        removed = [cell for cell in exclude if cell in self._index]
+        for cell in removed:
+            self.discard(cell)
+        try:
+            if not self._cells:
+                return None
+            return self._cells[rng.randrange(len(self._cells))]
+        finally:
+            for cell in removed:
+                self.add(cell)
@@ -0,0 +1,423 @@
+"""asyncio server running 2D snake games for many remote clients at once.
+
+Every TCP connection is one session: one snake_game_2d.Game ticking at the
+speed the client asked for. Instead of the whole board, the server sends what
+changed each tick (the new head, whether the tail stayed, new food), batched
+into binary frames. All sessions tick from one scheduler task ordered by a
+heap of due times, so thousands of sessions cost one timer, not thousands.
+
+Wire format. Every frame is a u32 payload length, then the payload, which
+starts with a u8 message type. All integers are little-endian.
+
+  Client -> server
+    START      1, u16 width, u16 height, u16 tick_ms, i64 seed
+    TURN       2, u8 direction code (snake_game_2d.DIRECTION_NAMES order)
+
+  Server -> client
+    STATE      1, u32 tick, u16 width, u16 height, i16 food x, i16 food y
+               (-1, -1: none), u32 length, then length x (i16 x, i16 y),
+               head first. Sent at the start of every game and whenever the
+               client fell too far behind for diffs. Once a client has had a
+               game's STATE, that game's last tick, with GAME_OVER or WON,
+               always reaches it before the next game's STATE.
+    DIFF       2, u32 first tick, u16 tick count, then per tick: u8 flags,
+               i16 head x, i16 head y, and i16 food x, i16 food y if the
+               NEW_FOOD flag is set. The client pushes the head and drops
+               its tail unless GREW is set. A DIFF never spans two games.
+
+A session sends at most one frame per flush_interval, so fast sessions put
+several ticks in each frame: on a loopback socket the send call costs more
+than the tick itself.
+
+Backpressure: a session's diffs pile up while its socket's write buffer is
+over max_buffer bytes and are sent together once it drains. If more than
+max_pending_ticks of one game pile up, they are replaced by a STATE of the
+board at that tick, so a stalled client costs bounded memory; a game's
+final tick is never dropped. A game that starts and ends while the client
+is stalled is skipped whole: its STATE was never sent, so the client goes
+straight from the previous game to the next one.
+
+A START whose width or height is outside min_board..max_board closes the
+connection: games are built on the event loop, so one huge board would
+stall every other session.
+
+Run a server with `python src/game_server.py [port]`; see
+benchmarks/bench_game_server.py for a load generator.
+"""
+import asyncio
+import heapq
+import struct
+import sys
+import time
+from collections import deque
+
+from snake_game_2d import DIRECTION_NAMES, Game
+
+START = 1
+TURN = 2
+STATE = 1
+DIFF = 2
+
+# DIFF tick flags
+GREW = 1
+NEW_FOOD = 2
+GAME_OVER = 4
+WON = 8
+
+MAX_BUFFER = 64 * 1024
+MAX_PENDING_TICKS = 256
+FLUSH_INTERVAL = 0.1   # Seconds between a session's frames, at most
+LATENCY_SAMPLES = 1024 # Recent tick lateness samples kept per session
+MAX_CATCH_UP = 5       # A session more than this many ticks late skips ahead
+MIN_BOARD = 4          # Smallest board width or height a client may ask for
+MAX_BOARD = 256        # Largest; a dense Game costs memory and build time per cell
+
+_LENGTH = struct.Struct('<I')
+_START = struct.Struct('<BHHHq')
+_TURN = struct.Struct('<BB')
+_STATE_HEAD = struct.Struct('<BIHHhhI')
+_CELL = struct.Struct('<hh')
+_DIFF_HEAD = struct.Struct('<BIH')
+_TICK = struct.Struct('<Bhh')
+
+
+def frame(payload):
+    return _LENGTH.pack(len(payload)) + payload
+
+
+async def read_frame(reader):
+    """The next frame's payload, or None at end of stream."""
+    try:
+        header = await reader.readexactly(_LENGTH.size)
+        return await reader.readexactly(_LENGTH.unpack(header)[0])
+    except asyncio.IncompleteReadError:
+        return None
+
+
+def encode_start(board_width, board_height, tick_ms, seed):
+    return frame(_START.pack(START, board_width, board_height, tick_ms, seed))
+
+
+def encode_turn(direction_code):
+    return frame(_TURN.pack(TURN, direction_code))
+
+
+def encode_state(game):
+    food = game.food.position or (-1, -1)
+    body = game.snake.body
+    parts = [_STATE_HEAD.pack(STATE, game.ticks, game.board_width, game.board_height, food[0], food[1], len(body))]
+    parts.extend(_CELL.pack(x, y) for x, y in body)
+    return frame(b''.join(parts))
+
+
+class LatencyStats:
+    """How late ticks ran relative to their schedule, in seconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, lateness):
+        self.count += 1
+        self.total += lateness
+        if lateness > self.max:
+            self.max = lateness
+        self.samples.append(lateness)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        def pct(p):
+            return ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000.0 if ordered else 0.0
+        return {
+            'ticks': self.count,
+            'mean_ms': self.total / self.count * 1000.0 if self.count else 0.0,
+            'p50_ms': pct(0.5),
+            'p99_ms': pct(0.99),
+            'max_ms': self.max * 1000.0,
+        }
+
+
+class Session:
+    """One client's game, its outgoing diff buffer and its tick metrics."""
+
+    def __init__(self, session_id, writer, board_width, board_height, tick_seconds, seed,
+                 max_pending_ticks=MAX_PENDING_TICKS):
+        self.id = session_id
+        self.writer = writer
+        self.tick_seconds = tick_seconds
+        self.seed = seed
+        self.max_pending_ticks = max_pending_ticks
+        self.games = 0
+        self.direction = None
+        self.closed = False
+        self.latency = LatencyStats()
+        self.bytes_sent = 0
+        self.stalls = 0      # Flushes held back by a full write buffer
+        self.resyncs = 0     # Times the pending diffs were dropped for a STATE
+        self._frames = []    # Finished frames not yet sent, in order
+        self._state = None   # STATE frame of the current game that the pending ticks follow
+        self._pending = []   # Encoded ticks of the current game not yet sent
+        self._pending_first = 0
+        self._resync = False # The current game's STATE is owed; it is encoded when sent
+        self.next_flush = 0.0
+        self.new_game(board_width, board_height)
+
+    def new_game(self, board_width, board_height):
+        self._cut() # The last game's ticks go out in their own DIFF
+        self.game = Game(board_width, board_height, seed=self.seed + self.games)
+        self.games += 1
+        self._resync = True # The client needs the whole new board
+
+    def _cut(self):
+        """Closes the current game's queued STATE and ticks into frames."""
+        if self._state is not None:
+            self._frames.append(self._state)
+            self._state = None
+        if self._pending:
+            self._frames.append(frame(_DIFF_HEAD.pack(DIFF, self._pending_first, len(self._pending))
+                                      + b''.join(self._pending)))
+            self._pending.clear()
+
+    def tick(self):
+        """Steps the game once and queues the tick's diff."""
+        game = self.game
+        if game.game_over or game.won:
+            self.new_game(game.board_width, game.board_height)
+            return
+        length = len(game.snake.body)
+        food = game.food.position
+        if self.direction is not None:
+            game.snake.turn(self.direction)
+            self.direction = None
+        game.step()
+        flags = GREW if len(game.snake.body) > length else 0
+        if game.food.position != food:
+            flags |= NEW_FOOD
+        if game.game_over:
+            flags |= GAME_OVER
+        if game.won:
+            flags |= WON
+        if self._resync:
+            return # The STATE still owed for this game will show this tick
+        x, y = game.snake.body[0]
+        if not self._pending:
+            self._pending_first = game.ticks
+        encoded = _TICK.pack(flags, x, y)
+        if flags & NEW_FOOD:
+            fx, fy = game.food.position or (-1, -1)
+            encoded += _CELL.pack(fx, fy)
+        self._pending.append(encoded)
+        if len(self._pending) > self.max_pending_ticks and not flags & (GAME_OVER | WON):
+            # The board as of now stands in for the dropped ticks; it is
+            # encoded right away because the game may end before the next flush
+            self._state = encode_state(game)
+            self._pending.clear()
+            self.resyncs += 1
+
+    def flush(self, max_buffer=MAX_BUFFER):
+        """Sends what's pending unless the socket is backed up."""
+        if self.closed or not (self._frames or self._state or self._pending or self._resync):
+            return
+        transport = self.writer.transport
+        if transport.is_closing():
+            self.closed = True
+            return
+        if transport.get_write_buffer_size() > max_buffer:
+            self.stalls += 1
+            return
+        self._cut()
+        data = b''.join(self._frames)
+        self._frames.clear()
+        if self._resync and not (self.game.game_over or self.game.won):
+            # A game that ended unseen is skipped; the next game's STATE is owed instead
+            data += encode_state(self.game)
+            self._resync = False
+        if not data:
+            return
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+    def turn(self, direction_code):
+        if 0 <= direction_code < len(DIRECTION_NAMES):
+            self.direction = direction_code
+
+
+class GameServer:
+    """Accepts sessions on host:port and ticks all of them from one task."""
+
+    def __init__(self, host='127.0.0.1', port=0, max_buffer=MAX_BUFFER, flush_interval=FLUSH_INTERVAL,
+                 min_board=MIN_BOARD, max_board=MAX_BOARD, max_pending_ticks=MAX_PENDING_TICKS):
+        self.host = host
+        self.port = port
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self.max_pending_ticks = max_pending_ticks
+        self.min_board = min_board
+        self.max_board = max_board
+        self.sessions = {}
+        self._next_id = 0
+        self._schedule = [] # (due time, session id), earliest first
+        self._wakeup = None
+        self._server = None
+        self._ticker = None
+        self.ticks = 0
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ticker = asyncio.create_task(self._run_ticks())
+        return self
+
+    async def close(self):
+        self._ticker.cancel()
+        self._server.close()
+        for session in self.sessions.values():
+            session.writer.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        payload = await read_frame(reader)
+        if payload is None or payload[0] != START or len(payload) != _START.size:
+            writer.close()
+            return
+        _, width, height, tick_ms, seed = _START.unpack(payload)
+        if not (self.min_board <= width <= self.max_board and self.min_board <= height <= self.max_board):
+            writer.close()
+            return
+        session_id = self._next_id
+        self._next_id += 1
+        session = Session(session_id, writer, width, height, max(tick_ms, 1) / 1000.0, seed,
+                          self.max_pending_ticks)
+        self.sessions[session_id] = session
+        session.flush(self.max_buffer) # Initial STATE
+        heapq.heappush(self._schedule, (time.perf_counter() + session.tick_seconds, session_id))
+        self._wakeup.set()
+        try:
+            while True:
+                payload = await read_frame(reader)
+                if payload is None:
+                    break
+                if payload[0] == TURN and len(payload) == _TURN.size:
+                    session.turn(payload[1])
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            session.closed = True
+            del self.sessions[session_id]
+            writer.close()
+
+    async def _run_ticks(self):
+        schedule = self._schedule
+        while True:
+            if not schedule:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            now = time.perf_counter()
+            due, session_id = schedule[0]
+            if due > now:
+                self._wakeup.clear()
+                try: # Sleep until the next tick is due or a session joins
+                    await asyncio.wait_for(self._wakeup.wait(), due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(schedule)
+            session = self.sessions.get(session_id)
+            if session is None or session.closed:
+                continue
+            session.latency.record(now - due)
+            session.tick()
+            if now >= session.next_flush:
+                session.flush(self.max_buffer)
+                session.next_flush = now + self.flush_interval
+            self.ticks += 1
+            next_due = due + session.tick_seconds
+            if now - next_due > MAX_CATCH_UP * session.tick_seconds:
+                next_due = now + session.tick_seconds # Too far behind: skip ahead
+            heapq.heappush(schedule, (next_due, session_id))
+            if self.ticks % 256 == 0:
+                await asyncio.sleep(0) # Let reads and new connections in
+
+    def reset_metrics(self):
+        for session in self.sessions.values():
+            session.latency = LatencyStats()
+        self.ticks = 0
+
+    def metrics(self):
+        """Server totals plus tick lateness across all live sessions."""
+        combined = LatencyStats()
+        for session in self.sessions.values():
+            for sample in session.latency.samples:
+                combined.record(sample)
+        summary = combined.summary()
+        summary.update({
+            'sessions': len(self.sessions),
+            'server_ticks': self.ticks,
+            'bytes_sent': sum(session.bytes_sent for session in self.sessions.values()),
+            'stalls': sum(session.stalls for session in self.sessions.values()),
+            'resyncs': sum(session.resyncs for session in self.sessions.values()),
+        })
+        return summary
+
+
+class ClientMirror:
+    """Client-side copy of a session's game, rebuilt from STATE and DIFF
+    frames. Only the snake body, food and flags are tracked."""
+
+    def __init__(self):
+        self.tick = 0
+        self.body = deque()
+        self.food = None
+        self.game_over = False
+        self.won = False
+        self.games_ended = 0 # DIFF ticks seen with GAME_OVER or WON
+        self.frames = 0
+        self.bytes = 0
+
+    def apply(self, payload):
+        self.frames += 1
+        self.bytes += _LENGTH.size + len(payload)
+        if payload[0] == STATE:
+            _, self.tick, _, _, fx, fy, length = _STATE_HEAD.unpack_from(payload)
+            self.food = None if fx < 0 else (fx, fy)
+            offset = _STATE_HEAD.size
+            self.body = deque(_CELL.unpack_from(payload, offset + i * _CELL.size) for i in range(length))
+            self.game_over = self.won = False
+            return
+        _, first, count = _DIFF_HEAD.unpack_from(payload)
+        offset = _DIFF_HEAD.size
+        body = self.body
+        for _ in range(count):
+            flags, x, y = _TICK.unpack_from(payload, offset)
+            offset += _TICK.size
+            body.appendleft((x, y))
+            if not flags & GREW:
+                body.pop()
+            if flags & NEW_FOOD:
+                fx, fy = _CELL.unpack_from(payload, offset)
+                offset += _CELL.size
+                self.food = None if fx < 0 else (fx, fy)
+            self.game_over = bool(flags & GAME_OVER)
+            self.won = bool(flags & WON)
+            if flags & (GAME_OVER | WON):
+                self.games_ended += 1
+        self.tick = first + count - 1
+
+
+async def _main(port):
+    server = await GameServer(port=port).start()
+    print(f"Serving snake sessions on {server.host}:{server.port}")
+    while True:
+        await asyncio.sleep(5)
+        print(server.metrics())
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(_main(int(sys.argv[1]) if len(sys.argv) > 1 else 0))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,90 @@
+"""Flat cell indices, interned cell tuples and direction codes for bounded boards.
+
+A cell (x, y[, z]) has the flat index x + W*y [+ W*H*z] (cell_index).
+Direction codes index DIRECTION_DELTAS: snake_game_2d.DIRECTION_NAMES order in
+2D, snake_core_3d.DIRECTIONS order in 3D. OPPOSITE[dims][code] is the code of
+the reverse move.
+
+The snakes of both games keep their head as a flat index, -1 once it is off
+the board, and take the new head's tuple from BoardGrid.cells instead of
+building one: the same tuple object stands for a cell every time, so a move
+allocates nothing and the body costs a pointer per segment. Tuples stay the
+currency of every public API (Snake.body, Snake.cells, events, snapshots).
+"""
+from weakref import WeakValueDictionary
+
+# Move deltas by direction code: snake_game_2d.DIRECTION_NAMES order for 2D
+# boards, snake_core_3d.DIRECTIONS order for 3D ones
+DIRECTION_DELTAS = {
+    2: ((1, 0), (0, 1), (-1, 0), (0, -1)),
+    3: ((1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)),
+}
+DIRECTION_CODES = {dims: {delta: code for code, delta in enumerate(deltas)} for dims, deltas in DIRECTION_DELTAS.items()}
+OPPOSITE = {dims: tuple(deltas.index(tuple(-c for c in delta)) for delta in deltas)
+            for dims, deltas in DIRECTION_DELTAS.items()}
+
+_FLAT_STRIDES = {} # board_size -> per-axis stride of the flat cell index
+
+
+def strides(board_size):
+    found = _FLAT_STRIDES.get(board_size)
+    if found is None:
+        found, step = [], 1
+        for d in board_size:
+            found.append(step)
+            step *= d
+        found = _FLAT_STRIDES[board_size] = tuple(found)
+    return found
+
+
+def cell_index(cell, board_size):
+    """Flat index x + W*y [+ W*H*z] of an in-bounds cell."""
+    return sum(c * s for c, s in zip(cell, strides(board_size)))
+
+
+def index_cell(index, board_size):
+    cell = []
+    for d in board_size:
+        index, c = divmod(index, d)
+        cell.append(c)
+    return tuple(cell)
+
+
+def in_bounds(cell, board_size):
+    for c, d in zip(cell, board_size):
+        if c < 0 or c >= d:
+            return False
+    return True
+
+
+# board_size -> BoardGrid. The tuples never change, so games of one size share
+# them; each Snake holds its grid, and a size nobody plays any more is dropped
+# rather than kept forever (clients pick board sizes in game_server).
+_GRIDS = WeakValueDictionary()
+
+
+class BoardGrid:
+    __slots__ = ('board_size', 'cells', 'full_board', '__weakref__')
+
+    def __init__(self, board_size):
+        self.board_size = board_size = tuple(board_size)
+        size = 1
+        for d in board_size:
+            size *= d
+        self.cells = tuple(index_cell(index, board_size) for index in range(size)) # By flat index
+        self.full_board = None # free_cells' table of the board with every cell free, once built
+
+    def index(self, cell):
+        """Flat index of cell, or -1 if it is off the board."""
+        if not in_bounds(cell, self.board_size):
+            return -1
+        return cell_index(cell, self.board_size)
+
+
+def board_grid(board_size):
+    """The shared BoardGrid of a board size."""
+    board_size = tuple(board_size)
+    grid = _GRIDS.get(board_size)
+    if grid is None:
+        grid = _GRIDS[board_size] = BoardGrid(board_size)
+    return grid
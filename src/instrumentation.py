@@ -0,0 +1,174 @@
+"""Optional counters, timers and a sampling profiler for the game loops.
+
+Both Game classes have a `metrics` attribute that is None unless a Metrics is
+attached; their hot paths test it once per tick, so instrumentation that is
+off costs an attribute check. With a Metrics attached they record:
+
+    timers     move, collision, spawn (food and power-ups), update (3D,
+               the whole Game.update() call), render (3D view)
+    counters   spawn_attempts (cells drawn before a free one was found; more
+               than one per spawn means rejection-sampling retries),
+               powerup_spawns, and from the 3D view entities_created,
+               entities_reused, entities_destroyed and tweens
+
+MetricsExporter writes a summary every interval seconds, as one JSON line
+per export to a file and/or to a callback (the 3D game's overlay Text).
+SamplingProfiler is a toggle: while running, a background thread samples the
+game thread's stack and counts where it is, to find hot spots without the
+cost of a tracing profiler.
+"""
+import json
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_INTERVAL = 0.005 # Seconds between profiler samples
+
+
+class TimerStats:
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class Metrics:
+    """Named counters and timers."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counters = Counter()
+        self.timers = {}
+        self.started = time.perf_counter()
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def add_time(self, name, seconds):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = TimerStats()
+        timer.count += 1
+        timer.total += seconds
+        if seconds > timer.max:
+            timer.max = seconds
+
+    def summary(self):
+        timers = {}
+        for name, timer in self.timers.items():
+            timers[name] = {
+                'count': timer.count,
+                'total_ms': timer.total * 1000.0,
+                'mean_us': timer.total / timer.count * 1e6,
+                'max_us': timer.max * 1e6,
+            }
+        return {
+            'elapsed_s': time.perf_counter() - self.started,
+            'counters': dict(self.counters),
+            'timers': timers,
+        }
+
+    def report(self):
+        """A few lines of text, e.g. for an on-screen overlay."""
+        lines = [f"{name}: {timer.count} x {timer.total / timer.count * 1e6:.1f} us (max {timer.max * 1e6:.0f})"
+                 for name, timer in sorted(self.timers.items())]
+        lines += [f"{name}: {value}" for name, value in sorted(self.counters.items())]
+        return '\n'.join(lines)
+
+
+class MetricsExporter:
+    """Exports a Metrics summary every interval seconds from poll(): appended
+    to path as one JSON line, and/or handed to on_export(metrics)."""
+
+    def __init__(self, metrics, path=None, interval=1.0, on_export=None):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.on_export = on_export
+        self._next = time.perf_counter() + interval
+
+    def poll(self):
+        """Call once per frame or loop iteration; exports when due."""
+        now = time.perf_counter()
+        if now < self._next:
+            return False
+        self._next = now + self.interval
+        self.export()
+        return True
+
+    def export(self):
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'time': time.time(), **self.metrics.summary()}) + '\n')
+        if self.on_export is not None:
+            self.on_export(self.metrics)
+
+
+class SamplingProfiler:
+    """Samples one thread's stack every interval seconds from a background
+    thread. `own` counts the function each sample was in; `total` counts
+    every function on the stack, callers included."""
+
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.own = Counter()
+        self.total = Counter()
+        self.samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def toggle(self):
+        """Starts or stops sampling; returns whether it is now running."""
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+        return self.running
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            code = frame.f_code
+            self.own[(code.co_filename, code.co_name)] += 1
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_filename, code.co_name)
+                if key not in seen: # Count recursive functions once per sample
+                    seen.add(key)
+                    self.total[key] += 1
+                frame = frame.f_back
+
+    def report(self, limit=15):
+        """The functions seen most often, with their share of samples."""
+        samples = self.samples or 1
+        lines = [f"{self.samples} samples   own%  total%"]
+        for (filename, name), own in self.own.most_common(limit):
+            total = self.total[(filename, name)]
+            lines.append(f"{name} ({filename.rsplit('/', 1)[-1]})  {own / samples:6.1%}  {total / samples:6.1%}")
+        return '\n'.join(lines)
@@ -0,0 +1,63 @@
+from enum import Enum
+
+
+class ItemKind(Enum):
+    FOOD = 1
+    SPEED_BOOST = 2
+
+
+class ItemIndex:
+    """Every pickup on the board, keyed by grid cell.
+
+    Game rules look up the snake's head cell once per tick (take()), so
+    collecting an item costs one dict lookup whatever the number of items,
+    and it never depends on where the renderer has animated anything to.
+
+    With free_cells (Snake.free_cells), item cells are taken out of the free
+    set while the item lies there, so spawn draws never land on another item
+    and need no exclude list. An item picked up by the snake stays out of the
+    set, because the snake's head now occupies that cell."""
+
+    def __init__(self, free_cells=None):
+        self.free_cells = free_cells
+        self._items = {} # cell -> ItemKind
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, cell):
+        return cell in self._items
+
+    def __iter__(self):
+        return iter(self._items.items())
+
+    def kind_at(self, cell):
+        return self._items.get(cell)
+
+    def positions(self, kind):
+        return [cell for cell, item_kind in self._items.items() if item_kind is kind]
+
+    def add(self, cell, kind):
+        if cell in self._items:
+            raise ValueError(f"Cell {cell} already holds {self._items[cell].name}")
+        self._items[cell] = kind
+        if self.free_cells is not None:
+            self.free_cells.discard(cell)
+
+    def remove(self, cell):
+        """Removes the item at cell without the snake taking it, freeing the
+        cell again. Returns its kind, or None if there was nothing there."""
+        kind = self._items.pop(cell, None)
+        if kind is not None and self.free_cells is not None:
+            self.free_cells.add(cell)
+        return kind
+
+    def take(self, cell):
+        """Removes and returns the kind of the item at cell (the snake's head
+        cell), or None if there is none."""
+        return self._items.pop(cell, None)
+
+    def reset(self, free_cells=None):
+        """Drops every item. Pass the new free set after the snake was reset."""
+        self._items.clear()
+        self.free_cells = free_cells
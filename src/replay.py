@@ -0,0 +1,157 @@
+"""Compact replays of 2D games: the seed plus two bits of input per tick.
+
+A snake_game_2d.Game is fully determined by its board size, board mode
+(sparse games draw food differently), seed and the direction passed to
+step() each tick, so that is all a replay stores. Any tick's state is
+rebuilt by re-simulating from the nearest keyframe.
+
+Binary layout (little-endian):
+    magic b'SNKR', version u8, board width u16, board height u16,
+    start length u16, seed i64, tick count u32, flags u8 (1 = sparse),
+    then the direction codes, four per byte, lowest bits first.
+Version 1 replays have no flags byte and are always dense.
+"""
+import random
+import struct
+
+from snake_game_2d import DIRECTION_NAMES, Game
+
+MAGIC = b'SNKR'
+VERSION = 2
+KEYFRAME_INTERVAL = 256
+
+_HEADER_V1 = struct.Struct('<4sBHHHqI')
+_HEADER = struct.Struct('<4sBHHHqIB')
+_SPARSE = 1
+_CODES = {name: code for code, name in enumerate(DIRECTION_NAMES)}
+
+
+class Replay:
+    """Seed, board parameters and packed per-tick direction codes."""
+
+    def __init__(self, board_width, board_height, start_length, seed, ticks=0, data=None, sparse=False):
+        self.board_width = board_width
+        self.board_height = board_height
+        self.start_length = start_length
+        self.seed = seed
+        self.sparse = sparse
+        self.ticks = ticks
+        self.data = bytearray(data or b'')
+
+    def __len__(self):
+        return self.ticks
+
+    def append(self, direction):
+        code = _CODES[direction]
+        shift = (self.ticks & 3) * 2
+        if shift == 0:
+            self.data.append(code)
+        else:
+            self.data[-1] |= code << shift
+        self.ticks += 1
+
+    def direction_at(self, tick):
+        """Direction passed to Game.step() on the given tick (0-based)."""
+        return DIRECTION_NAMES[(self.data[tick >> 2] >> ((tick & 3) * 2)) & 3]
+
+    def new_game(self):
+        """A fresh Game in the replay's starting state."""
+        return Game(self.board_width, self.board_height, self.start_length, seed=self.seed,
+                    sparse=self.sparse)
+
+    def to_bytes(self):
+        header = _HEADER.pack(MAGIC, VERSION, self.board_width, self.board_height,
+                              self.start_length, self.seed, self.ticks, _SPARSE if self.sparse else 0)
+        return header + bytes(self.data)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        magic, version, width, height, start_length, seed, ticks = _HEADER_V1.unpack_from(blob)
+        if magic != MAGIC:
+            raise ValueError("Not a snake replay")
+        if version == 1:
+            flags, data = 0, blob[_HEADER_V1.size:]
+        elif version == VERSION:
+            flags, data = _HEADER.unpack_from(blob)[-1], blob[_HEADER.size:]
+        else:
+            raise ValueError(f"Unsupported replay version {version}")
+        if len(data) != (ticks + 3) // 4:
+            raise ValueError("Replay data is truncated")
+        return cls(width, height, start_length, seed, ticks, data, sparse=bool(flags & _SPARSE))
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """Wraps a Game and records the direction used on every step().
+
+    The game must have an integer seed; if it was created without one, pass
+    no game and the recorder makes one with a fresh random seed."""
+
+    def __init__(self, game=None):
+        if game is None:
+            game = Game(seed=random.getrandbits(63))
+        if not isinstance(game.seed, int):
+            raise ValueError("Only games created with an integer seed can be recorded")
+        if game.ticks:
+            raise ValueError("Recording must start from a fresh game")
+        self.game = game
+        self.replay = Replay(game.board_width, game.board_height, len(game.snake.body), game.seed,
+                             sparse=game.sparse)
+
+    def step(self, direction=None):
+        # No direction means "keep going", which is the same as asking for the current one
+        direction = direction or self.game.snake.direction
+        self.replay.append(direction)
+        return self.game.step(direction)
+
+
+class ReplayPlayer:
+    """Rebuilds the game state at any tick of a replay.
+
+    A snapshot of the game (Game.snapshot()) is kept every keyframe_interval
+    ticks, so once the keyframes up to a tick exist, seeking there
+    re-simulates at most keyframe_interval ticks however long the replay is.
+    Keyframes are built lazily the first time playback passes them."""
+
+    def __init__(self, replay, keyframe_interval=KEYFRAME_INTERVAL):
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self._keyframes = [replay.new_game().snapshot()] # _keyframes[k] is the state after k * interval ticks
+
+    def _advance(self, game, start, stop):
+        direction_at = self.replay.direction_at
+        for tick in range(start, stop):
+            game.step(direction_at(tick))
+
+    def state_at(self, tick):
+        """Game as it was after the given number of ticks (a new copy)."""
+        if not 0 <= tick <= self.replay.ticks:
+            raise IndexError(f"Tick {tick} outside replay of {self.replay.ticks} ticks")
+        interval = self.keyframe_interval
+        k = tick // interval
+        game = self.replay.new_game()
+        while len(self._keyframes) <= k:
+            game.restore(self._keyframes[-1])
+            start = (len(self._keyframes) - 1) * interval
+            self._advance(game, start, start + interval)
+            self._keyframes.append(game.snapshot())
+        game.restore(self._keyframes[k])
+        self._advance(game, k * interval, tick)
+        return game
+
+    def play(self):
+        """Yields the same Game object after each tick, fast-forwarding through
+        the whole replay without copying."""
+        game = self.replay.new_game()
+        direction_at = self.replay.direction_at
+        for tick in range(self.replay.ticks):
+            game.step(direction_at(tick))
+            yield game
@@ -0,0 +1,228 @@
+"""Runs many independent 2D snake games across worker processes.
+
+Each worker owns a contiguous shard of games and steps them with the scalar
+rules from snake_game_2d. Observations, actions, rewards and done flags all
+live in one multiprocessing.shared_memory block, so a step costs the parent
+one tiny command per worker and nothing is pickled per game. Requires NumPy.
+"""
+import multiprocessing as mp
+import os
+import random
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch_env import ACTIONS, DIRECTION_NAMES, REWARD_DEATH, REWARD_FOOD
+from snake_game_2d import BOARD_WIDTH, BOARD_HEIGHT, Food, Snake
+
+# Cell codes written into the observation boards
+EMPTY = 0
+BODY = 1
+HEAD = 2
+FOOD = 3
+
+_STEP = 'step'
+_RESET = 'reset'
+_CLOSE = 'close'
+
+_JOIN_TIMEOUT = 5.0
+
+
+def _layout(num_games, board_width, board_height):
+    """Byte offsets of each array in the shared block, and its total size."""
+    obs_size = num_games * board_height * board_width
+    actions_at = obs_size
+    rewards_at = actions_at + num_games
+    rewards_at += -rewards_at % 4 # float32 alignment
+    dones_at = rewards_at + 4 * num_games
+    return actions_at, rewards_at, dones_at, dones_at + num_games
+
+
+def _views(buf, num_games, board_width, board_height):
+    """NumPy views of (observations, actions, rewards, dones) over buf."""
+    actions_at, rewards_at, dones_at, _ = _layout(num_games, board_width, board_height)
+    obs = np.ndarray((num_games, board_height, board_width), dtype=np.uint8, buffer=buf)
+    actions = np.ndarray((num_games,), dtype=np.int8, buffer=buf, offset=actions_at)
+    rewards = np.ndarray((num_games,), dtype=np.float32, buffer=buf, offset=rewards_at)
+    dones = np.ndarray((num_games,), dtype=np.bool_, buffer=buf, offset=dones_at)
+    return obs, actions, rewards, dones
+
+
+class _Game:
+    """One scalar game, mirrored into its observation board cell by cell."""
+
+    def __init__(self, board_width, board_height, board, rng):
+        self.board_width = board_width
+        self.board_height = board_height
+        self.board = board
+        self.rng = rng
+        self.reset()
+
+    def reset(self):
+        w, h = self.board_width, self.board_height
+        self.snake = Snake(start_pos=(max(2, w // 4), h // 2), start_length=3, board_size=(w, h))
+        self.food = Food(w, h, self.snake.cells, self.snake.free_cells, rng=self.rng)
+        board = self.board
+        board[:] = EMPTY
+        for x, y in self.snake.body:
+            board[y, x] = BODY
+        x, y = self.snake.body[0]
+        board[y, x] = HEAD
+        x, y = self.food.position
+        board[y, x] = FOOD
+
+    def step(self, action):
+        """Runs one tick; returns (reward, done). Only the cells that changed
+        are rewritten."""
+        snake, board = self.snake, self.board
+        w, h = self.board_width, self.board_height
+        old_x, old_y = snake.body[0]
+        snake.change_direction(DIRECTION_NAMES[action])
+        tail = snake.move()
+        if tail is not None:
+            board[tail[1], tail[0]] = EMPTY
+
+        x, y = snake.body[0]
+        if not (0 <= x < w and 0 <= y < h) or snake.check_collision_self():
+            return REWARD_DEATH, True
+        board[old_y, old_x] = BODY
+        board[y, x] = HEAD
+
+        if snake.body[0] == self.food.position:
+            snake.grow()
+            if not self.food.spawn(w, h, snake.cells, snake.free_cells):
+                return REWARD_FOOD, True # Board full: the snake has won
+            fx, fy = self.food.position
+            board[fy, fx] = FOOD
+            return REWARD_FOOD, False
+        return 0.0, False
+
+
+def _worker(conn, shm_name, first, last, num_games, board_width, board_height, seed):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    obs, actions, rewards, dones = _views(shm.buf, num_games, board_width, board_height)
+    games = []
+    try:
+        # Seeded per game, so results don't depend on how games are sharded
+        games = [_Game(board_width, board_height, obs[i], random.Random(None if seed is None else f"{seed}:{i}"))
+                 for i in range(first, last)]
+        conn.send(True)
+        while True:
+            command = conn.recv()
+            if command == _STEP:
+                for i, game in enumerate(games, first):
+                    reward, done = game.step(actions[i])
+                    if done: # Auto-reset; the board now shows the next game's start
+                        game.reset()
+                    rewards[i] = reward
+                    dones[i] = done
+            elif command == _RESET:
+                for game in games:
+                    game.reset()
+            elif command == _CLOSE:
+                break
+            conn.send(True)
+    except (KeyboardInterrupt, EOFError):
+        pass # Parent went away or Ctrl+C; fall through to cleanup
+    finally:
+        # Views must go before the mapping can be closed
+        del games, obs, actions, rewards, dones
+        shm.close()
+        conn.close()
+
+
+class RolloutPool:
+    """Shards num_games independent 2D games across num_workers processes.
+
+    observations is an (N, H, W) uint8 array of cell codes (EMPTY, BODY, HEAD,
+    FOOD) in shared memory, updated in place by the workers. step() takes an
+    array of ACTIONS codes and returns (rewards, dones), which are also views
+    of shared memory and are overwritten by the next step. Finished games are
+    reset immediately, so their board shows the start of the next game.
+
+    Use as a context manager, or call close() to stop the workers and free
+    the shared block."""
+
+    def __init__(self, num_games, num_workers=None, board_width=BOARD_WIDTH, board_height=BOARD_HEIGHT,
+                 seed=None):
+        num_workers = min(num_workers or os.cpu_count() or 1, num_games)
+        self.num_games = num_games
+        self.num_workers = num_workers
+        self.board_width = board_width
+        self.board_height = board_height
+
+        size = _layout(num_games, board_width, board_height)[-1]
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self.observations, self._actions, self.rewards, self.dones = _views(
+            self._shm.buf, num_games, board_width, board_height)
+        self._actions[:] = ACTIONS["RIGHT"]
+        self.rewards[:] = 0
+        self.dones[:] = False
+
+        self._conns = []
+        self._procs = []
+        bounds = np.linspace(0, num_games, num_workers + 1).astype(int)
+        try:
+            for k in range(num_workers):
+                parent_conn, child_conn = mp.Pipe()
+                proc = mp.Process(target=_worker, daemon=True,
+                                  args=(child_conn, self._shm.name, bounds[k], bounds[k + 1],
+                                        num_games, board_width, board_height, seed))
+                proc.start()
+                child_conn.close()
+                self._conns.append(parent_conn)
+                self._procs.append(proc)
+            self._wait()
+        except BaseException:
+            self.close()
+            raise
+
+    def _broadcast(self, command):
+        for conn in self._conns:
+            conn.send(command)
+        self._wait()
+
+    def _wait(self):
+        for conn in self._conns:
+            conn.recv()
+
+    def step(self, actions):
+        self._actions[:] = actions
+        self._broadcast(_STEP)
+        return self.rewards, self.dones
+
+    def reset(self):
+        self._broadcast(_RESET)
+        return self.observations
+
+    def close(self):
+        """Stops the workers and releases the shared block. Safe to call twice."""
+        if self._shm is None:
+            return
+        for conn in self._conns:
+            try:
+                conn.send(_CLOSE)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(_JOIN_TIMEOUT)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+        for conn in self._conns:
+            conn.close()
+        self._conns, self._procs = [], []
+        self.observations = self._actions = self.rewards = self.dones = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, '_shm', None) is not None:
+            self.close()
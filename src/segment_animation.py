@@ -0,0 +1,107 @@
+"""Decides which snake segments a renderer moves each frame and each tick.
+
+A move only changes the ends of the snake: a cell is added in front of the
+old head and one is dropped at the tail. If entity i always draws body[i]
+and the tail entity is carried to the front on every move (see
+snake_game_3d.SnakeView), every middle entity is already sitting on its new
+cell, so only the ends need to animate.
+
+SegmentAnimator holds that policy without touching any rendering library:
+
+    'ends'  Per frame, only the head and tail are interpolated. Per tick,
+            one entity is placed in the old head's cell.
+    'full'  Every segment slides from the cell behind it, driven by the one
+            shared interpolation alpha rather than a tween per segment. At
+            most `budget` segments from the head are moved per frame. The
+            rest hold still on their cells, which is exactly where they
+            would be at alpha == 1.
+
+Either way the work per frame and per tick is bounded by a constant, not by
+the snake's length. The only tween created is the scale-in of a new segment
+when the snake grows.
+"""
+from itertools import islice
+
+ANIMATION_MODE_ENDS = 'ends'
+ANIMATION_MODE_FULL = 'full'
+ANIMATION_BUDGET = 32 # Segments interpolated per frame in 'full' mode, head first
+
+
+class AnimationStats:
+    """Counts of render-side work, totalled and for the latest tick."""
+
+    def __init__(self):
+        self.ticks = 0
+        self.frames = 0
+        self.tweens = 0            # Tweens started, all ticks
+        self.position_updates = 0  # Entity positions written, all ticks and frames
+        self.tick_tweens = 0       # Tweens started by the latest tick
+        self.tick_updates = 0      # Positions written by the latest tick and its frames
+
+    def summary(self):
+        ticks = self.ticks or 1
+        return {
+            'ticks': self.ticks,
+            'frames': self.frames,
+            'tweens_per_tick': self.tweens / ticks,
+            'updates_per_tick': self.position_updates / ticks,
+        }
+
+
+class SegmentAnimator:
+    """Animation policy for a snake whose entities are kept in body order."""
+
+    def __init__(self, snake, mode=ANIMATION_MODE_ENDS, budget=ANIMATION_BUDGET):
+        if mode not in (ANIMATION_MODE_ENDS, ANIMATION_MODE_FULL):
+            raise ValueError(f"Unknown animation mode {mode!r}")
+        self.snake = snake
+        self.mode = mode
+        self.budget = max(budget, 1)
+        self.stats = AnimationStats()
+        self.has_moved = False
+
+    def reset(self):
+        self.has_moved = False
+
+    def on_moved(self, grew):
+        """Called after every single move, before the next one (e.g. from the
+        game's Moved events, which fire inside each step); the placements are
+        read off the current body, so calling it once after several moves
+        would leave the skipped old heads unplaced. grew says whether a new
+        segment (and its scale-in tween) was added. Returns the (index, cell)
+        pairs to place exactly."""
+        body = self.snake.body
+        placements = [(1, body[1])] # The segment that now fills the old head's cell
+        if self.mode == ANIMATION_MODE_FULL and len(body) - 1 > self.budget:
+            # Segment that just left the animated window: settle it on its cell
+            placements.append((self.budget, body[self.budget]))
+        stats = self.stats
+        stats.ticks += 1
+        stats.tick_tweens = 1 if grew else 0
+        stats.tweens += stats.tick_tweens
+        stats.tick_updates = len(placements)
+        stats.position_updates += len(placements)
+        self.has_moved = True
+        return placements
+
+    def frame(self):
+        """(index, previous cell, current cell) for every segment to
+        interpolate this frame; the caller lerps between the two cells."""
+        if not self.has_moved:
+            return ()
+        body = self.snake.body
+        last = len(body) - 1
+        prev_tail = self.snake.last_vacated or body[last]
+        if self.mode == ANIMATION_MODE_ENDS or last == 0:
+            moves = [(0, body[min(1, last)], body[0])]
+        else:
+            count = min(last, self.budget)
+            cells = list(islice(body, count + 1)) # Indexing mid-deque is O(n)
+            moves = [(i, cells[i + 1], cells[i]) for i in range(count)]
+        if last >= len(moves):
+            moves.append((last, prev_tail, body[last]))
+        stats = self.stats
+        stats.frames += 1
+        stats.tick_updates += len(moves)
+        stats.position_updates += len(moves)
+        return moves
@@ -0,0 +1,504 @@
+"""Rules of the 3D snake game, with no rendering or audio imports.
+
+snake_game_3d.py is the Ursina front end over this module; anything that only
+needs the rules (tests, batch jobs, tools) can import it without a window.
+"""
+import random
+import time
+from collections import deque
+from enum import Enum
+
+from event_stream import (RESET, EventStream, FoodEaten, FoodSpawned, GameOver, Grew, Moved,
+                          PowerUpCollected, PowerUpSpawned)
+from fixed_timestep import FixedTimestep
+from free_cells import FreeCells
+from grid import DIRECTION_CODES, DIRECTION_DELTAS, OPPOSITE, board_grid
+from item_index import ItemIndex, ItemKind
+from snapshot import GameSnapshot
+
+# --- Game Configuration ---
+BOARD_WIDTH = 10
+BOARD_HEIGHT = 10
+BOARD_DEPTH = 10
+GAME_SPEED_INITIAL = 0.20
+ORIGINAL_GAME_SPEED = GAME_SPEED_INITIAL # For power-up logic
+BOOSTED_GAME_SPEED = ORIGINAL_GAME_SPEED / 2.0
+SPEED_BOOST_DURATION = 5.0
+POWERUP_FIRST_SPAWN_DELAY = 5.0
+
+
+# --- Game States ---
+class GameState(Enum):
+    START_SCREEN = 1
+    PLAYING = 2
+    GAME_OVER = 3
+    WON = 4 # Snake filled the board; no free cell left for food
+
+
+# --- Events reported by Game.update()/Game.step() for the front end ---
+class GameEvent(Enum):
+    MOVED = 1
+    ATE_FOOD = 2
+    POWERUP_SPAWNED = 3
+    POWERUP_COLLECTED = 4
+    BOOST_ENDED = 5
+    GAME_OVER = 6
+    WON = 7
+
+
+DIRECTIONS = {
+    "RIGHT_X": (1, 0, 0), "LEFT_X": (-1, 0, 0),
+    "UP_Y": (0, 1, 0), "DOWN_Y": (0, -1, 0),
+    "FORWARD_Z": (0, 0, 1), "BACKWARD_Z": (0, 0, -1),
+}
+_DELTAS = DIRECTION_DELTAS[3]
+_CODES = DIRECTION_CODES[3]
+_OPPOSITE = OPPOSITE[3]
+
+
+# --- Helper Functions ---
+def get_random_position_safe(board_width, board_height, board_depth, snake_body, food_pos, current_powerup_pos=None, free_cells=None, rng=random):
+    """Gets a random position ensuring it's not on snake, food, or existing powerup.
+    With free_cells (Snake.free_cells) the draw needs no retries; returns None
+    if no such position exists. Draws come from rng (a random.Random)."""
+    if free_cells is not None:
+        return free_cells.sample(rng, exclude=(food_pos, current_powerup_pos))
+    if len(snake_body) + 2 >= board_width * board_height * board_depth:
+        # Too few cells to be sure a retry loop would ever finish
+        candidates = [pos for pos in FreeCells((board_width, board_height, board_depth))
+                      if pos not in snake_body and pos != food_pos and pos != current_powerup_pos]
+        return rng.choice(candidates) if candidates else None
+    while True:
+        pos = get_random_position(board_width, board_height, board_depth, rng)
+        if pos not in snake_body and pos != food_pos and (current_powerup_pos is None or pos != current_powerup_pos):
+            return pos
+
+def get_random_position(board_width, board_height, board_depth, rng=random): # Original remains for Food
+    x = rng.randint(0, board_width - 1)
+    y = rng.randint(0, board_height - 1)
+    z = rng.randint(0, board_depth - 1)
+    return (x, y, z)
+
+def check_collision_wall(snake_head_position, board_width=BOARD_WIDTH, board_height=BOARD_HEIGHT, board_depth=BOARD_DEPTH):
+    x, y, z = snake_head_position
+    return not (0 <= x < board_width and 0 <= y < board_height and 0 <= z < board_depth)
+
+
+# --- Game Object Classes ---
+class Snake:
+    def __init__(self, start_pos, start_length=3, initial_direction_vector=(1,0,0), board_size=None):
+        self.start_pos_init = start_pos
+        self.board_size = board_size # (w, h, d); enables self.free_cells
+        # With a board, the head is also kept as a flat cell index (see grid)
+        self.grid = board_grid(board_size) if board_size is not None else None
+        self.start_length_init = start_length
+        self.initial_direction_vector_init = initial_direction_vector
+        self.reset()
+
+    def reset(self):
+        self.body = deque([self.start_pos_init])
+        self.direction = self.initial_direction_vector_init
+        self._should_grow = False
+        self.last_vacated = None # Tail cell freed by the latest move, for renderers
+
+        current_x, current_y, current_z = self.start_pos_init
+        inv_dx, inv_dy, inv_dz = _DELTAS[_OPPOSITE[self.code]]
+        for i in range(1, self.start_length_init):
+            self.body.append((current_x + inv_dx * i, current_y + inv_dy * i, current_z + inv_dz * i))
+        self.load_body(self.body)
+
+    @property
+    def direction(self):
+        """Current direction vector; the snake itself keeps the code, an
+        index into grid.DIRECTION_DELTAS[3] (DIRECTIONS order)."""
+        return _DELTAS[self.code]
+
+    @direction.setter
+    def direction(self, vector):
+        self.code = _CODES[tuple(vector)]
+
+    def load_body(self, body, free_cells=None):
+        """Replaces the body (head first) and rebuilds the occupancy index.
+        free_cells, if given, is used as is instead of being rebuilt."""
+        self.body = deque(body)
+        # Occupancy index (cell -> segment count), kept in step with self.body
+        self.cells = {}
+        self.free_cells = free_cells
+        if free_cells is None and self.board_size is not None:
+            self.free_cells = FreeCells(self.board_size)
+        for segment_pos in self.body:
+            self._occupy(segment_pos)
+        self.head_index = self.grid.index(self.body[0]) if self.grid is not None and self.body else -1
+
+    def _occupy(self, pos):
+        count = self.cells.get(pos, 0)
+        self.cells[pos] = count + 1
+        if count == 0 and self.free_cells is not None:
+            self.free_cells.discard(pos)
+
+    def move(self):
+        """Moves the head one cell along self.direction. Returns the vacated
+        tail cell, or None if the snake grew this step."""
+        head_x, head_y, head_z = self.body[0]
+        dx, dy, dz = _DELTAS[self.code]
+        x, y, z = head_x + dx, head_y + dy, head_z + dz
+        if self.grid is None:
+            new_head_pos = (x, y, z)
+        else:
+            width, height, depth = self.board_size
+            if 0 <= x < width and 0 <= y < height and 0 <= z < depth:
+                self.head_index = index = x + width * (y + height * z)
+                new_head_pos = self.grid.cells[index] # The board's own tuple for the cell
+            else:
+                self.head_index = -1
+                new_head_pos = (x, y, z)
+        # Occupancy bookkeeping inlined, as this runs every tick
+        cells, free_cells = self.cells, self.free_cells
+        self.body.appendleft(new_head_pos)
+        count = cells.get(new_head_pos, 0)
+        cells[new_head_pos] = count + 1
+        if count == 0 and free_cells is not None:
+            free_cells.discard(new_head_pos)
+
+        if self._should_grow:
+            self._should_grow = False
+            self.last_vacated = None
+            return None
+        tail_pos = self.body.pop()
+        count = cells[tail_pos]
+        if count == 1:
+            del cells[tail_pos]
+            if free_cells is not None:
+                free_cells.add(tail_pos)
+        else:
+            cells[tail_pos] = count - 1
+        self.last_vacated = tail_pos
+        return tail_pos
+
+    def grow(self): self._should_grow = True
+    def change_direction(self, new_direction_vector):
+        """Turns to a unit vector of DIRECTIONS unless that is a reversal;
+        other vectors are ignored."""
+        code = _CODES.get(tuple(new_direction_vector))
+        if code is not None and code != _OPPOSITE[self.code]:
+            self.code = code
+    def turn(self, code):
+        """change_direction() by direction code."""
+        if code != _OPPOSITE[self.code]:
+            self.code = code
+    def check_collision_self(self):
+        if not self.body: return False
+        return self.cells[self.body[0]] > 1
+    def occupies(self, pos): return pos in self.cells
+
+class Food:
+    def __init__(self, board_width, board_height, board_depth, snake_body_initial, free_cells=None, rng=None):
+        self.board_width = board_width
+        self.board_height = board_height
+        self.board_depth = board_depth
+        self.rng = rng if rng is not None else random # random.Random for reproducible games
+        self.position = None
+        self.attempts = 0 # Cells drawn by the latest spawn()
+        self.spawn(snake_body_initial, free_cells)
+
+    def spawn(self, snake_body, free_cells=None, items=None):
+        # snake_body is any container of occupied cells (Snake.cells is O(1)).
+        # free_cells (Snake.free_cells) makes the draw retry-free; without it,
+        # cells in items (an ItemIndex) are avoided as well.
+        # Returns False, leaving position as None, if the board is full.
+        self.attempts = 1
+        if free_cells is not None:
+            self.position = free_cells.sample(self.rng)
+            return self.position is not None
+        if len(snake_body) >= self.board_width * self.board_height * self.board_depth:
+            self.position = None
+            self.attempts = 0
+            return False
+        new_pos = get_random_position(self.board_width, self.board_height, self.board_depth, self.rng)
+        while new_pos in snake_body or (items is not None and new_pos in items): # Ensure not on snake or an item
+            new_pos = get_random_position(self.board_width, self.board_height, self.board_depth, self.rng)
+            self.attempts += 1
+        self.position = new_pos
+        return True
+
+    def reset(self, snake_body, free_cells=None):
+        return self.spawn(snake_body, free_cells)
+
+
+# --- Game ---
+class Game:
+    """One 3D snake game: snake, food, power-up timers, score and GameState.
+
+    Front ends feed it frame times through update(dt), which runs grid ticks
+    on a fixed timestep of game_speed seconds (see self.scheduler), or call
+    step() directly to run one tick; both return the list of GameEvents that
+    happened. Observers that need what changed, not just what happened,
+    subscribe to self.stream (see event_stream) for the cells involved.
+    Attach an instrumentation.Metrics as self.metrics to time update() and
+    the move, collision and spawn phases of each tick.
+    Food and power-ups are registered in self.items (an ItemIndex by cell);
+    each tick looks up the head cell there once, so pickups don't depend on
+    frame rate or on where the renderer has drawn anything.
+    All randomness comes from self.rng, seeded with seed, so the same seed and
+    inputs replay the same game.
+    board_size is (width, height, depth). With sparse, no per-cell board is
+    kept (no Snake.free_cells): memory follows the snake's length, not the
+    board's volume, and spawns use rejection sampling, which stays quick
+    while most of the board is empty."""
+
+    def __init__(self, seed=None, board_size=(BOARD_WIDTH, BOARD_HEIGHT, BOARD_DEPTH), sparse=False):
+        self.board_width, self.board_height, self.board_depth = self.board_size = tuple(board_size)
+        self.sparse = sparse
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.state = GameState.START_SCREEN
+        self.score = 0
+        self.game_speed = GAME_SPEED_INITIAL # This will be modified by power-up
+        self.scheduler = FixedTimestep()
+        self.autopilot = None # An autopilot.Autopilot steers every tick when set
+        self.stream = EventStream()
+        self.metrics = None # An instrumentation.Metrics records tick phases when set
+        w, h, d = self.board_size
+        self.snake = Snake(start_pos=(w // 2, h // 2, d // 2), start_length=3,
+                           board_size=None if sparse else self.board_size)
+        self.food = Food(w, h, d, self.snake.cells, self.snake.free_cells, rng=self.rng)
+        # Every pickup on the board by cell; the head cell is looked up once per tick
+        self.items = ItemIndex(self.snake.free_cells)
+        self.items.add(self.food.position, ItemKind.FOOD)
+
+        # --- Power-up Variables ---
+        self.powerup_position = None
+        self.is_powerup_item_active = False # Is the power-up item currently spawned
+        self.powerup_spawn_timer = POWERUP_FIRST_SPAWN_DELAY # Time until next power-up spawn attempt
+        self.speed_boost_active = False     # Is the speed boost currently active
+        self.speed_boost_timer = 0.0        # Remaining duration of the speed boost
+
+    def reset(self):
+        self.score = 0
+        self.scheduler.reset()
+        self.game_speed = ORIGINAL_GAME_SPEED # Reset game speed
+
+        start_length = 3
+        initial_direction_vec = DIRECTIONS["RIGHT_X"]
+        min_coord_vals = [(start_length - 1) * abs(d_val) for d_val in initial_direction_vec]
+        start_x = max(min_coord_vals[0], self.board_width // 2)
+        start_y = max(min_coord_vals[1], self.board_height // 2)
+        start_z = max(min_coord_vals[2], self.board_depth // 2)
+
+        self.snake.start_pos_init = (start_x, start_y, start_z)
+        self.snake.start_length_init = start_length
+        self.snake.initial_direction_vector_init = initial_direction_vec
+        self.snake.reset()
+        self.items.reset(self.snake.free_cells)
+        self.food.reset(self.snake.cells, self.snake.free_cells)
+        self.items.add(self.food.position, ItemKind.FOOD)
+
+        # Reset power-up state
+        self.powerup_position = None
+        self.is_powerup_item_active = False
+        self.speed_boost_active = False
+        self.powerup_spawn_timer = POWERUP_FIRST_SPAWN_DELAY
+        self.speed_boost_timer = 0.0
+        if self.stream:
+            self.stream.publish(RESET)
+
+    def set_state(self, new_state):
+        self.state = new_state
+        if new_state == GameState.PLAYING:
+            self.reset()
+        elif new_state in (GameState.GAME_OVER, GameState.WON):
+            # Reset active speed boost effect immediately
+            self.is_powerup_item_active = False # Ensure no new powerups spawn
+            self.speed_boost_active = False
+            self.game_speed = ORIGINAL_GAME_SPEED
+
+    def change_direction(self, new_direction_vector):
+        self.snake.change_direction(new_direction_vector)
+
+    def spawn_powerup(self):
+        # Avoid snake and food (items are already out of the free set)
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+            metrics.count('powerup_spawns')
+        self.powerup_position = get_random_position_safe(self.board_width, self.board_height, self.board_depth,
+                                                         self.snake.cells, self.food.position,
+                                                         free_cells=self.snake.free_cells, rng=self.rng)
+        self.is_powerup_item_active = self.powerup_position is not None # None: no room left on the board
+        if self.is_powerup_item_active:
+            self.items.add(self.powerup_position, ItemKind.SPEED_BOOST)
+            if self.stream:
+                self.stream.publish(PowerUpSpawned(self.powerup_position))
+        if metrics is not None:
+            metrics.add_time('spawn', time.perf_counter() - start)
+        return self.is_powerup_item_active
+
+    def collect_powerup(self):
+        self.powerup_position = None
+        self.is_powerup_item_active = False
+        self.speed_boost_active = True
+        self.speed_boost_timer = SPEED_BOOST_DURATION
+        self.game_speed = BOOSTED_GAME_SPEED
+
+    def update(self, dt):
+        """Advances timers by dt seconds and runs one grid tick per game_speed
+        seconds built up, carrying the remainder to the next frame. Does
+        nothing outside GameState.PLAYING."""
+        if self.state != GameState.PLAYING:
+            return []
+        start = time.perf_counter()
+        events = self.advance_timers(dt)
+
+        # Game Tick Logic
+        for _ in range(self.scheduler.advance(dt, self.game_speed)):
+            events.extend(self.step())
+            if self.state != GameState.PLAYING:
+                self.scheduler.reset()
+                break
+        elapsed = time.perf_counter() - start
+        self.scheduler.stats.record_logic(elapsed)
+        if self.metrics is not None:
+            self.metrics.add_time('update', elapsed)
+        return events
+
+    def advance_timers(self, dt):
+        """Runs the power-up spawn and speed boost timers for dt seconds,
+        without ticking; returns the GameEvents that caused."""
+        events = []
+        # Power-up Spawning Logic
+        if not self.is_powerup_item_active and not self.speed_boost_active:
+            self.powerup_spawn_timer -= dt
+            if self.powerup_spawn_timer <= 0:
+                if self.spawn_powerup():
+                    events.append(GameEvent.POWERUP_SPAWNED)
+                self.powerup_spawn_timer = self.rng.uniform(10, 20) # Reset for next potential spawn
+
+        # Speed Boost Active Timer
+        if self.speed_boost_active:
+            self.speed_boost_timer -= dt
+            if self.speed_boost_timer <= 0:
+                self.speed_boost_active = False
+                self.game_speed = ORIGINAL_GAME_SPEED
+                # Spawn timer for next powerup starts counting down AFTER boost ends.
+                self.powerup_spawn_timer = self.rng.uniform(5,10)
+                events.append(GameEvent.BOOST_ENDED)
+        return events
+
+    def snapshot(self, exact=True):
+        """Bit-packed copy of the game state (snake, items, score, state,
+        speed and power-up timers); see snapshot.GameSnapshot. exact also
+        keeps the RNG state and free-cell order, for identical replay."""
+        snake = self.snake
+        items = [(cell, kind.value) for cell, kind in self.items]
+        scalars = (self.state.value, self.score, self.game_speed, self.powerup_spawn_timer,
+                   self.speed_boost_active, self.speed_boost_timer, self.scheduler.accumulator)
+        return GameSnapshot.capture(self.board_size, snake.body,
+                                    snake.code, snake._should_grow, items, scalars,
+                                    self.rng.getstate() if exact else None,
+                                    snake.free_cells.order() if exact and not self.sparse else None,
+                                    with_occupancy=not self.sparse)
+
+    def restore(self, snapshot):
+        """Puts the game back in the state snapshot() captured. The RNG is
+        only rewound if the snapshot carries its state."""
+        board_size = self.board_size
+        if snapshot.board_size != board_size:
+            raise ValueError(f"Snapshot is of a {snapshot.board_size} board")
+        snake = self.snake
+        free_cells = None
+        if snapshot.free_order is not None: # Already excludes the item cells
+            free_cells = FreeCells.from_order(board_size, snapshot.free_order)
+        snake.load_body(snapshot.body(), free_cells)
+        snake.code = snapshot.direction
+        snake._should_grow = snapshot.grow_pending
+        snake.last_vacated = None
+
+        self.items.reset(snake.free_cells)
+        self.food.position = self.powerup_position = None
+        for cell, kind in snapshot.item_cells():
+            kind = ItemKind(kind)
+            self.items.add(cell, kind)
+            if kind is ItemKind.FOOD:
+                self.food.position = cell
+            elif kind is ItemKind.SPEED_BOOST:
+                self.powerup_position = cell
+        self.is_powerup_item_active = self.powerup_position is not None
+
+        state, score, game_speed, spawn_timer, boost_active, boost_timer, accumulator = snapshot.scalars
+        self.state = GameState(int(state))
+        self.score = int(score)
+        self.game_speed = game_speed
+        self.powerup_spawn_timer = spawn_timer
+        self.speed_boost_active = bool(boost_active)
+        self.speed_boost_timer = boost_timer
+        self.scheduler.accumulator = accumulator
+        if snapshot.rng_state is not None:
+            self.rng.setstate(snapshot.rng_state)
+        if self.stream:
+            self.stream.publish(RESET)
+
+    def step(self):
+        """Runs one grid tick: move, pick up whatever is at the head, collide.
+        Does nothing outside GameState.PLAYING, like update()."""
+        if self.state != GameState.PLAYING:
+            return []
+        snake = self.snake
+        if self.autopilot is not None:
+            self.change_direction(self.autopilot.direction_3d(self))
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+        tail = snake.move()
+        head = snake.body[0]
+        if metrics is not None:
+            metrics.add_time('move', time.perf_counter() - start)
+        events = [GameEvent.MOVED]
+        stream = self.stream or None # Only build deltas when someone listens
+        if stream:
+            stream.publish(Moved(head, tail))
+            if tail is None:
+                stream.publish(Grew(len(snake.body)))
+
+        item = self.items.take(head)
+        if item is ItemKind.FOOD:
+            snake.grow()
+            self.score += 1
+            events.append(GameEvent.ATE_FOOD)
+            if stream:
+                stream.publish(FoodEaten(head, self.score))
+            if metrics is not None:
+                start = time.perf_counter()
+            spawned = self.food.spawn(snake.cells, snake.free_cells, self.items)
+            if metrics is not None:
+                metrics.add_time('spawn', time.perf_counter() - start)
+                metrics.count('spawn_attempts', self.food.attempts)
+            if not spawned:
+                self.set_state(GameState.WON)
+                events.append(GameEvent.WON)
+                if stream:
+                    stream.publish(GameOver(self.score, True))
+                return events
+            self.items.add(self.food.position, ItemKind.FOOD)
+            if stream:
+                stream.publish(FoodSpawned(self.food.position))
+        elif item is ItemKind.SPEED_BOOST:
+            self.collect_powerup()
+            events.append(GameEvent.POWERUP_COLLECTED)
+            if stream:
+                stream.publish(PowerUpCollected(head))
+
+        if metrics is not None:
+            start = time.perf_counter()
+        if snake.grid is not None:
+            off_board = snake.head_index < 0
+        else:
+            off_board = check_collision_wall(head, *self.board_size)
+        collided = off_board or snake.check_collision_self()
+        if metrics is not None:
+            metrics.add_time('collision', time.perf_counter() - start)
+        if collided:
+            self.set_state(GameState.GAME_OVER)
+            events.append(GameEvent.GAME_OVER)
+            if stream:
+                stream.publish(GameOver(self.score, False))
+        return events
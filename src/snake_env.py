@@ -0,0 +1,274 @@
+"""reset()/step(action) environments over the 2D and 3D snake rules, for RL.
+
+The interface follows Gymnasium's without depending on it:
+
+    obs, info = env.reset(seed=None)
+    obs, reward, terminated, truncated, info = env.step(action)
+
+Actions are integer direction codes: ACTIONS_2D (snake_game_2d.DIRECTION_NAMES
+order) or ACTIONS_3D (snake_core_3d.DIRECTIONS order); step() raises
+ValueError for anything outside range(env.num_actions). A reversing action
+is ignored, as Snake.change_direction ignores it.
+
+The observation is one preallocated float32 array of shape (channels, H, W)
+in 2D and (channels, D, H, W) in 3D, channel c being CHANNELS_2D/3D[c]:
+occupancy (body cells), head, food, and in 3D power-up. obs[c] flattened is
+indexed by grid.cell_index, i.e. obs[c, y, x] / obs[c, z, y, x]. step()
+rewrites only the cells that changed (new head, vacated tail, moved food) in
+that same array, so it neither allocates nor scans the body; copy it if you
+need to keep an old observation. info is also one dict, updated in place.
+
+Reward per step, all keyword arguments of the constructor:
+
+    reward_food       eating food
+    reward_death      hitting a wall or the snake
+    reward_win        filling the board
+    reward_step       every step (negative to hurry the agent along)
+    reward_approach   times the drop in Manhattan distance from head to food
+    reward_powerup    collecting a power-up (3D)
+
+max_idle_steps truncates an episode that goes that many steps without eating.
+Requires NumPy, which the games themselves do not.
+"""
+import random
+
+import numpy as np
+
+from snake_core_3d import DIRECTIONS, Game as Game3D, GameEvent, GameState
+from snake_game_2d import DIRECTION_NAMES, Game as Game2D
+from grid import DIRECTION_DELTAS
+
+ACTIONS_2D = {name: code for code, name in enumerate(DIRECTION_NAMES)}
+ACTIONS_3D = {name: code for code, name in enumerate(DIRECTIONS)}
+CHANNELS_2D = ('occupancy', 'head', 'food')
+CHANNELS_3D = ('occupancy', 'head', 'food', 'powerup')
+
+REWARD_FOOD = 1.0
+REWARD_DEATH = -1.0
+REWARD_WIN = 1.0
+REWARD_STEP = 0.0
+REWARD_APPROACH = 0.0
+REWARD_POWERUP = 0.0
+
+
+class _SnakeEnv:
+    """The observation bookkeeping and reward logic shared by both envs."""
+
+    def __init__(self, board_size, channels, reward_food, reward_death, reward_win, reward_step,
+                 reward_approach, reward_powerup, max_idle_steps):
+        self.board_size = board_size
+        self.channels = channels
+        self.num_actions = len(DIRECTION_DELTAS[len(board_size)])
+        self.reward_food = reward_food
+        self.reward_death = reward_death
+        self.reward_win = reward_win
+        self.reward_step = reward_step
+        self.reward_approach = reward_approach
+        self.reward_powerup = reward_powerup
+        self.max_idle_steps = max_idle_steps
+
+        self.num_cells = 1
+        for d in board_size:
+            self.num_cells *= d
+        self.observation = np.zeros((len(channels),) + tuple(reversed(board_size)), dtype=np.float32)
+        self._flat = self.observation.reshape(-1) # A view: writes land in observation
+        self._head_channel = channels.index('head') * self.num_cells
+        self._food_channel = channels.index('food') * self.num_cells
+        self.info = {'score': 0, 'length': 0, 'steps': 0}
+        self.game = None
+        self.steps = 0
+        self._idle = 0
+        self._head = None
+        self._tail = None
+        self._food = None
+
+    def _redraw(self):
+        """Rewrites the whole observation from the game; used on reset."""
+        flat = self._flat
+        flat.fill(0.0)
+        body = self.game.snake.body
+        for cell in body:
+            flat[self._index(cell)] = 1.0
+        self._head = self._index(body[0])
+        flat[self._head_channel + self._head] = 1.0
+        self._tail = body[-1]
+        self._food = self._food_cell()
+        if self._food is not None:
+            flat[self._food_channel + self._index(self._food)] = 1.0
+
+    def _update_observation(self, grew):
+        """Applies one tick's changes: at most a vacated tail, a new head and a
+        moved food item."""
+        flat = self._flat
+        body = self.game.snake.body
+        if not grew:
+            flat[self._index(self._tail)] = 0.0
+        self._tail = body[-1]
+        head = self.game.snake.head_index # The snake keeps it as a flat index already
+        flat[self._head_channel + self._head] = 0.0
+        if head >= 0: # Off the board only on the tick that ends the game
+            flat[head] = 1.0
+            flat[self._head_channel + head] = 1.0
+        self._head = head
+        food = self._food_cell()
+        if food != self._food:
+            if self._food is not None:
+                flat[self._food_channel + self._index(self._food)] = 0.0
+            if food is not None:
+                flat[self._food_channel + self._index(food)] = 1.0
+            self._food = food
+
+    def _check_action(self, action):
+        # Snake.turn stores any code: a negative one would index from the end of
+        # the direction table and a too-large one fail deep inside the move
+        if not 0 <= action < self.num_actions:
+            raise ValueError(f"action must be in range({self.num_actions}), got {action!r}")
+
+    def _distance(self, head):
+        food = self._food
+        if food is None:
+            return 0
+        return sum(abs(h - f) for h, f in zip(head, food))
+
+    def _finish_step(self, length, score, distance, dead, won):
+        """Observation, reward and flags once the game has ticked."""
+        game = self.game
+        body = game.snake.body
+        self.steps += 1
+        self._update_observation(len(body) > length)
+
+        reward = self.reward_step
+        ate = game.score > score
+        if ate:
+            reward += self.reward_food
+            self._idle = 0
+        else:
+            self._idle += 1
+        if self.reward_approach and not (ate or dead): # Eating moves the food; no distance to compare
+            reward += self.reward_approach * (distance - self._distance(body[0]))
+        if dead:
+            reward += self.reward_death
+        elif won:
+            reward += self.reward_win
+        truncated = (not (dead or won) and self.max_idle_steps is not None
+                     and self._idle >= self.max_idle_steps)
+
+        info = self.info
+        info['score'] = game.score
+        info['length'] = len(body)
+        info['steps'] = self.steps
+        return self.observation, reward, dead or won, truncated, info
+
+    def _start(self):
+        self.steps = 0
+        self._idle = 0
+        self._redraw()
+        info = self.info
+        info['score'] = self.game.score
+        info['length'] = len(self.game.snake.body)
+        info['steps'] = 0
+        return self.observation, info
+
+
+class SnakeEnv2D(_SnakeEnv):
+    """snake_game_2d.Game as an environment; a new Game per episode."""
+
+    def __init__(self, board_width=20, board_height=20, start_length=3, seed=None,
+                 reward_food=REWARD_FOOD, reward_death=REWARD_DEATH, reward_win=REWARD_WIN,
+                 reward_step=REWARD_STEP, reward_approach=REWARD_APPROACH, max_idle_steps=None):
+        super().__init__((board_width, board_height), CHANNELS_2D, reward_food, reward_death, reward_win,
+                         reward_step, reward_approach, 0.0, max_idle_steps)
+        self.start_length = start_length
+        self.rng = random.Random(seed)
+
+    def _food_cell(self):
+        return self.game.food.position
+
+    def _index(self, cell):
+        """Flat index of an in-bounds cell, or -1."""
+        x, y = cell
+        width, height = self.board_size
+        if 0 <= x < width and 0 <= y < height:
+            return x + width * y
+        return -1
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
+        width, height = self.board_size
+        self.game = Game2D(width, height, self.start_length, seed=self.rng.getrandbits(32))
+        return self._start()
+
+    def step(self, action):
+        self._check_action(action)
+        game = self.game
+        snake = game.snake
+        length, score = len(snake.body), game.score
+        distance = self._distance(snake.body[0]) if self.reward_approach else 0
+        snake.turn(action)
+        game.step()
+        return self._finish_step(length, score, distance, game.game_over, game.won)
+
+
+class SnakeEnv3D(_SnakeEnv):
+    """snake_core_3d.Game as an environment. Each step is one grid tick, and
+    the power-up timers advance by that tick's length (game.game_speed), so
+    power-ups appear on the same schedule they do in play."""
+
+    def __init__(self, board_size=(10, 10, 10), seed=None,
+                 reward_food=REWARD_FOOD, reward_death=REWARD_DEATH, reward_win=REWARD_WIN,
+                 reward_step=REWARD_STEP, reward_approach=REWARD_APPROACH, reward_powerup=REWARD_POWERUP,
+                 max_idle_steps=None):
+        super().__init__(tuple(board_size), CHANNELS_3D, reward_food, reward_death, reward_win,
+                         reward_step, reward_approach, reward_powerup, max_idle_steps)
+        self.game = Game3D(seed=seed, board_size=self.board_size)
+        self._powerup_channel = CHANNELS_3D.index('powerup') * self.num_cells
+        self._powerup = None
+
+    def _food_cell(self):
+        return self.game.food.position
+
+    def _index(self, cell):
+        """Flat index of an in-bounds cell, or -1."""
+        x, y, z = cell
+        width, height, depth = self.board_size
+        if 0 <= x < width and 0 <= y < height and 0 <= z < depth:
+            return x + width * (y + height * z)
+        return -1
+
+    def _redraw(self):
+        super()._redraw()
+        self._powerup = self.game.powerup_position
+        if self._powerup is not None:
+            self._flat[self._powerup_channel + self._index(self._powerup)] = 1.0
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.game.rng.seed(seed)
+        self.game.set_state(GameState.PLAYING)
+        return self._start()
+
+    def step(self, action):
+        self._check_action(action)
+        game = self.game
+        snake = game.snake
+        length, score = len(snake.body), game.score
+        distance = self._distance(snake.body[0]) if self.reward_approach else 0
+        snake.turn(action)
+        events = game.advance_timers(game.game_speed) # One tick's worth of time
+        events += game.step()
+        state = game.state
+        # From the events, not the position: a power-up can spawn and be collected in one step
+        reward_powerup = self.reward_powerup if GameEvent.POWERUP_COLLECTED in events else 0.0
+
+        powerup = game.powerup_position
+        if powerup != self._powerup:
+            flat = self._flat
+            if self._powerup is not None:
+                flat[self._powerup_channel + self._index(self._powerup)] = 0.0
+            if powerup is not None:
+                flat[self._powerup_channel + self._index(powerup)] = 1.0
+            self._powerup = powerup
+        obs, reward, terminated, truncated, info = self._finish_step(
+            length, score, distance, state == GameState.GAME_OVER, state == GameState.WON)
+        return obs, reward + reward_powerup, terminated, truncated, info
@@ -1,30 +1,48 @@
 import random
 import time
+from collections import deque
+
+from event_stream import RESET, EventStream, FoodEaten, FoodSpawned, GameOver, Grew, Moved
+from free_cells import FreeCells
+from grid import DIRECTION_DELTAS, OPPOSITE, board_grid
+from item_index import ItemKind
+from snapshot import GameSnapshot
 
 # Global variables/constants for the game board
 BOARD_WIDTH = 20
 BOARD_HEIGHT = 20
 
+# Direction names, clockwise; their index is the compact code used by replays and batch envs
+DIRECTION_NAMES = ("RIGHT", "DOWN", "LEFT", "UP")
+_NAME_CODES = {name: code for code, name in enumerate(DIRECTION_NAMES)}
+_DELTAS = DIRECTION_DELTAS[2]
+_OPPOSITE = OPPOSITE[2]
+
 # Helper functions
-def get_random_position(board_width, board_height):
-    """Returns a random (x,y) within board limits."""
-    x = random.randint(0, board_width - 1)
-    y = random.randint(0, board_height - 1)
+def get_random_position(board_width, board_height, rng=random):
+    """Returns a random (x,y) within board limits, drawn from rng
+    (a random.Random; the global random module by default)."""
+    x = rng.randint(0, board_width - 1)
+    y = rng.randint(0, board_height - 1)
     return (x, y)
 
-def check_collision_wall(snake_head_position):
+def check_collision_wall(snake_head_position, board_width=BOARD_WIDTH, board_height=BOARD_HEIGHT):
     """Takes the snake's head position (x,y) and returns True if it's outside
-    BOARD_WIDTH or BOARD_HEIGHT, False otherwise."""
+    a board_width x board_height board, False otherwise."""
     x, y = snake_head_position
-    if x < 0 or x >= BOARD_WIDTH or y < 0 or y >= BOARD_HEIGHT:
+    if x < 0 or x >= board_width or y < 0 or y >= board_height:
         return True
     return False
 
 class Snake:
-    def __init__(self, start_pos, start_length=3):
-        """Initializes body segments (list of tuples (x, y)), initial direction."""
-        self.body = [start_pos]  # Head is the first segment
-        self.direction = "RIGHT"  # Initial direction
+    def __init__(self, start_pos, start_length=3, board_size=None):
+        """Initializes body segments (deque of tuples (x, y)), initial direction.
+
+        If board_size (width, height) is given, the snake also maintains
+        self.free_cells, the set of in-bounds cells it doesn't cover."""
+        # Head is the first segment; a deque gives O(1) push-head/pop-tail in move()
+        self.body = deque([start_pos])
+        self.code = 0 # Direction code (index into DIRECTION_NAMES); starts "RIGHT"
         self._should_grow = False # Flag for growth
 
         # Add initial segments to the left of the head, consistent with "RIGHT" initial direction
@@ -32,157 +50,337 @@ class Snake:
         current_x, current_y = start_pos
         for i in range(1, start_length):
             self.body.append((current_x - i, current_y))
+        self.board_size = board_size
+        # With a board, the head is also kept as a flat cell index (see grid)
+        self.grid = board_grid(board_size) if board_size is not None else None
+        self.load_body(self.body)
+
+    @property
+    def direction(self):
+        """Current direction name; the snake itself keeps the code."""
+        return DIRECTION_NAMES[self.code]
+
+    @direction.setter
+    def direction(self, name):
+        self.code = _NAME_CODES[name]
+
+    def load_body(self, body, free_cells=None):
+        """Replaces the body (head first) and rebuilds the occupancy index.
+        free_cells, if given, is used as is instead of being rebuilt."""
+        self.body = deque(body)
+        # Occupancy index: cell -> number of segments on it. Kept in step with
+        # self.body so collision and spawn checks don't have to scan the body.
+        self.cells = {}
+        self.free_cells = free_cells
+        if free_cells is None and self.board_size is not None:
+            self.free_cells = FreeCells(self.board_size)
+        for segment in self.body:
+            self._occupy(segment)
+        self.head_index = self.grid.index(self.body[0]) if self.grid is not None and self.body else -1
+
+    def _occupy(self, pos):
+        count = self.cells.get(pos, 0)
+        self.cells[pos] = count + 1
+        if count == 0 and self.free_cells is not None:
+            self.free_cells.discard(pos)
 
     def move(self):
         """Updates segment positions. The head moves one step in the current direction.
-        Each subsequent segment takes the previous position of the segment in front of it."""
+        Each subsequent segment takes the previous position of the segment in front of it.
+        Returns the vacated tail cell, or None if the snake grew this step."""
         head_x, head_y = self.body[0]
-        
-        if self.direction == "RIGHT":
-            new_head_pos = (head_x + 1, head_y)
-        elif self.direction == "LEFT":
-            new_head_pos = (head_x - 1, head_y)
-        elif self.direction == "UP": # (0,0) is top-left
-            new_head_pos = (head_x, head_y - 1) 
-        elif self.direction == "DOWN": # (0,0) is top-left
-            new_head_pos = (head_x, head_y + 1)
-        else: 
-            new_head_pos = self.body[0] # Fallback, should ideally not happen
-
-        # Insert new head
-        self.body.insert(0, new_head_pos)
+        dx, dy = _DELTAS[self.code] # (0,0) is top-left
+        x, y = head_x + dx, head_y + dy
+        if self.grid is None:
+            new_head_pos = (x, y)
+        else:
+            width, height = self.board_size
+            if 0 <= x < width and 0 <= y < height:
+                self.head_index = index = x + width * y
+                new_head_pos = self.grid.cells[index] # The board's own tuple for the cell
+            else:
+                self.head_index = -1
+                new_head_pos = (x, y)
+
+        # Insert new head; the occupancy bookkeeping is inlined, as this runs every tick
+        cells, free_cells = self.cells, self.free_cells
+        self.body.appendleft(new_head_pos)
+        count = cells.get(new_head_pos, 0)
+        cells[new_head_pos] = count + 1
+        if count == 0 and free_cells is not None:
+            free_cells.discard(new_head_pos)
 
         # Remove tail if not growing
         if self._should_grow:
             self._should_grow = False  # Reset flag
+            return None
+        tail_pos = self.body.pop()
+        count = cells[tail_pos]
+        if count == 1:
+            del cells[tail_pos]
+            if free_cells is not None:
+                free_cells.add(tail_pos)
         else:
-            self.body.pop()
+            cells[tail_pos] = count - 1
+        return tail_pos
 
     def grow(self):
         """Sets a flag to make the snake grow on the next move."""
         self._should_grow = True
 
     def change_direction(self, new_direction):
-        """Updates the snake's direction, preventing it from immediately reversing."""
-        if new_direction == "RIGHT" and self.direction != "LEFT":
-            self.direction = new_direction
-        elif new_direction == "LEFT" and self.direction != "RIGHT":
-            self.direction = new_direction
-        elif new_direction == "UP" and self.direction != "DOWN":
-            self.direction = new_direction
-        elif new_direction == "DOWN" and self.direction != "UP":
-            self.direction = new_direction
+        """Updates the snake's direction (a name from DIRECTION_NAMES),
+        preventing it from immediately reversing."""
+        code = _NAME_CODES.get(new_direction)
+        if code is not None and code != _OPPOSITE[self.code]:
+            self.code = code
+
+    def turn(self, code):
+        """change_direction() by direction code."""
+        if code != _OPPOSITE[self.code]:
+            self.code = code
 
     def check_collision_self(self):
         """Returns True if the snake's head collides with its body, False otherwise."""
         if not self.body: 
             return False
-        head = self.body[0]
-        return head in self.body[1:]
+        # The head itself accounts for one count on its cell
+        return self.cells[self.body[0]] > 1
+
+    def occupies(self, pos):
+        """Returns True if any segment of the snake is on pos."""
+        return pos in self.cells
 
 
 class Food:
-    def __init__(self, board_width, board_height, snake_body):
+    def __init__(self, board_width, board_height, snake_body, free_cells=None, rng=None):
         """Initializes food at a random (x, y) position, ensuring it's not
-        on the snake's body or outside board boundaries."""
+        on the snake's body or outside board boundaries. Positions are drawn
+        from rng (a random.Random) if given, else the global random module."""
         self.position = None 
-        self.spawn(board_width, board_height, snake_body)
+        self.rng = rng if rng is not None else random
+        self.attempts = 0 # Cells drawn by the latest spawn()
+        self.spawn(board_width, board_height, snake_body, free_cells)
 
-    def spawn(self, board_width, board_height, snake_body):
-        """Respawns food at a new random valid location."""
+    def spawn(self, board_width, board_height, snake_body, free_cells=None):
+        """Respawns food at a new random valid location.
+
+        snake_body may be any container of occupied cells; pass Snake.cells
+        for constant-time membership checks. If free_cells (Snake.free_cells)
+        is given the cell is drawn from it directly, with no retries.
+        Returns False and leaves position as None if the board is full."""
+        self.attempts = 0
+        if free_cells is not None:
+            self.attempts = 1
+            self.position = free_cells.sample(self.rng)
+            return self.position is not None
+        if len(snake_body) >= board_width * board_height:
+            self.position = None
+            return False
         while True:
-            new_pos = get_random_position(board_width, board_height)
+            new_pos = get_random_position(board_width, board_height, self.rng)
+            self.attempts += 1
             if new_pos not in snake_body: # Ensure food is not on snake
                 self.position = new_pos
-                break
+                return True
+
+
+class Game:
+    """One 2D game: snake, food and the per-tick rules of the __main__ loop.
+
+    All randomness comes from self.rng, seeded with seed, so the same seed
+    and the same directions always play out the same game. Each tick's
+    changes are published on self.stream (see event_stream). Attach an
+    instrumentation.Metrics as self.metrics to time the move, collision and
+    spawn phases of each tick.
+
+    With sparse, the board is never stored cell by cell: occupancy is only
+    the Snake.cells hash, so memory follows the snake's length rather than
+    the board's area, and food is placed by rejection sampling (quick while
+    most of the board is empty). Use it for very large boards; spawns slow
+    down as the snake fills the board."""
+
+    def __init__(self, board_width=BOARD_WIDTH, board_height=BOARD_HEIGHT, start_length=3, seed=None,
+                 sparse=False):
+        self.board_width = board_width
+        self.board_height = board_height
+        self.seed = seed
+        self.sparse = sparse
+        self.rng = random.Random(seed)
+        start_pos = (max(start_length - 1, board_width // 4), board_height // 2)
+        self.snake = Snake(start_pos=start_pos, start_length=start_length,
+                           board_size=None if sparse else (board_width, board_height))
+        self.food = Food(board_width, board_height, self.snake.cells, self.snake.free_cells, rng=self.rng)
+        self.ticks = 0
+        self.score = 0
+        self.game_over = False
+        self.won = False
+        self.stream = EventStream()
+        self.metrics = None # An instrumentation.Metrics records tick phases when set
+
+    def step(self, direction=None):
+        """Turns towards direction (a name from DIRECTION_NAMES, if given) and
+        runs one tick. Returns True if the food was eaten this tick."""
+        if self.game_over or self.won:
+            return False
+        snake = self.snake
+        if direction is not None:
+            snake.change_direction(direction)
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+        tail = snake.move()
+        head = snake.body[0]
+        if metrics is not None:
+            metrics.add_time('move', time.perf_counter() - start)
+        self.ticks += 1
+        stream = self.stream or None # Only build deltas when someone listens
+        if stream:
+            stream.publish(Moved(head, tail))
+            if tail is None:
+                stream.publish(Grew(len(snake.body)))
+
+        ate = head == self.food.position
+        if ate:
+            snake.grow()
+            self.score += 1
+            if stream:
+                stream.publish(FoodEaten(head, self.score))
+            if metrics is not None:
+                start = time.perf_counter()
+            spawned = self.food.spawn(self.board_width, self.board_height, snake.cells, snake.free_cells)
+            if metrics is not None:
+                metrics.add_time('spawn', time.perf_counter() - start)
+                metrics.count('spawn_attempts', self.food.attempts)
+            if not spawned:
+                self.won = True
+                if stream:
+                    stream.publish(GameOver(self.score, True))
+                return ate
+            if stream:
+                stream.publish(FoodSpawned(self.food.position))
+
+        if metrics is not None:
+            start = time.perf_counter()
+        if snake.grid is not None:
+            off_board = snake.head_index < 0
+        else:
+            off_board = check_collision_wall(head, self.board_width, self.board_height)
+        collided = off_board or snake.check_collision_self()
+        if metrics is not None:
+            metrics.add_time('collision', time.perf_counter() - start)
+        if collided:
+            self.game_over = True
+            if stream:
+                stream.publish(GameOver(self.score, False))
+        return ate
+
+    def snapshot(self, exact=True):
+        """Bit-packed copy of the game state; see snapshot.GameSnapshot. With
+        exact, the RNG state and free-cell order come along too, so a restored
+        game plays on exactly as this one would. Leave them out when only the
+        board matters; they cost more than the rest for a short snake."""
+        snake = self.snake
+        items = () if self.food.position is None else ((self.food.position, ItemKind.FOOD.value),)
+        return GameSnapshot.capture((self.board_width, self.board_height), snake.body,
+                                    snake.code, snake._should_grow, items,
+                                    (self.ticks, self.score, self.game_over, self.won),
+                                    self.rng.getstate() if exact else None,
+                                    snake.free_cells.order() if exact and not self.sparse else None,
+                                    with_occupancy=not self.sparse)
+
+    def restore(self, snapshot):
+        """Puts the game back in the state snapshot() captured. The RNG is
+        only rewound if the snapshot carries its state."""
+        board_size = (self.board_width, self.board_height)
+        if snapshot.board_size != board_size:
+            raise ValueError(f"Snapshot is of a {snapshot.board_size} board, not {board_size}")
+        snake = self.snake
+        free_cells = None
+        if snapshot.free_order is not None:
+            free_cells = FreeCells.from_order(board_size, snapshot.free_order)
+        snake.load_body(snapshot.body(), free_cells)
+        snake.code = snapshot.direction
+        snake._should_grow = snapshot.grow_pending
+        items = snapshot.item_cells()
+        self.food.position = items[0][0] if items else None
+        ticks, score, game_over, won = snapshot.scalars
+        self.ticks, self.score = int(ticks), int(score)
+        self.game_over, self.won = bool(game_over), bool(won)
+        if snapshot.rng_state is not None:
+            self.rng.setstate(snapshot.rng_state)
+        if self.stream:
+            self.stream.publish(RESET)
 
 if __name__ == '__main__':
-    # Initialize Snake
-    start_length = 3
-    # Ensure start_pos allows for initial length without immediate out of bounds
-    # Snake body is (start_x, y), (start_x-1, y), ..., (start_x - (length-1), y)
-    # So, start_x - (length-1) must be >= 0.  start_x >= length - 1
-    min_start_x = start_length - 1
-    
-    # Place snake somewhat centrally but ensure it fits
-    start_x = max(min_start_x, BOARD_WIDTH // 4) 
-    start_y = BOARD_HEIGHT // 2
-    
-    snake = Snake(start_pos=(start_x, start_y), start_length=start_length)
-
-    # Initialize Food
-    food = Food(BOARD_WIDTH, BOARD_HEIGHT, snake.body)
-
-    print(f"Initial Snake: {snake.body} (Head: {snake.body[0]})")
-    print(f"Initial Food: {food.position}")
+    import argparse
+
+    from autopilot import Autopilot
+    from instrumentation import Metrics, MetricsExporter, SamplingProfiler
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--metrics', metavar='PATH', help="record tick timings, appending a JSON line to PATH each second")
+    parser.add_argument('--profile', action='store_true', help="run the sampling profiler and print its report at the end")
+    args = parser.parse_args()
+
+    game = Game(BOARD_WIDTH, BOARD_HEIGHT, start_length=3)
+    snake = game.snake
+    exporter = None
+    if args.metrics:
+        game.metrics = Metrics()
+        exporter = MetricsExporter(game.metrics, args.metrics)
+    profiler = SamplingProfiler() if args.profile else None
+    if profiler:
+        profiler.start()
+
+    print(f"Initial Snake: {list(snake.body)} (Head: {snake.body[0]})")
+    print(f"Initial Food: {game.food.position}")
     print(f"Board Size: {BOARD_WIDTH}x{BOARD_HEIGHT}")
     print("Starting game loop... (Ctrl+C to stop if it runs too long or reaches max_turns)")
     print("---")
 
-    game_running = True
-    turn_count = 0
+    # Report each tick from its deltas rather than re-reading the whole body
+    def report(event):
+        if type(event) is Moved:
+            print(f"Turn {game.ticks}: Head: {event.head} (L:{len(snake.body)},D:{snake.direction}) "
+                  f"Food: {game.food.position}")
+        elif type(event) is FoodEaten:
+            print(f"Turn {game.ticks}: Food eaten at {event.cell}!")
+        elif type(event) is FoodSpawned:
+            print(f"Turn {game.ticks}: New Food at: {event.cell}. Snake length: {len(snake.body)}")
+        elif type(event) is GameOver:
+            if event.won:
+                print(f"Turn {game.ticks}: You Win - the snake fills the board!")
+            else:
+                print(f"Turn {game.ticks}: Game Over - collision at {snake.body[0]}")
+
+    game.stream.subscribe(report)
+    pilot = Autopilot((BOARD_WIDTH, BOARD_HEIGHT))
     max_turns = 100 # Safety break for the loop in this basic console environment
 
-    while game_running and turn_count < max_turns:
-        turn_count += 1
-        
-        # (Placeholder) Get user input to change snake direction
-        # Simple automatic turning logic for testing:
-        # Try to make snake circle around near the edges for more comprehensive testing
-        head_x, head_y = snake.body[0]
-        if snake.direction == "RIGHT" and head_x >= BOARD_WIDTH - 2:
-            snake.change_direction("DOWN")
-        elif snake.direction == "DOWN" and head_y >= BOARD_HEIGHT - 2:
-            snake.change_direction("LEFT")
-        elif snake.direction == "LEFT" and head_x <= 1: # Allow reaching 0 before turning
-            snake.change_direction("UP")
-        elif snake.direction == "UP" and head_y <= 1: # Allow reaching 0 before turning
-            snake.change_direction("RIGHT")
-        # Fallback: Periodically change direction if no edge is hit, to ensure movement changes
-        elif turn_count % 15 == 0: 
-            dirs = ["RIGHT", "DOWN", "LEFT", "UP"]
-            current_dir_index = dirs.index(snake.direction)
-            # Try to turn right relative to current direction
-            snake.change_direction(dirs[(current_dir_index + 1) % 4])
-
-
-        # Call snake.move()
-        snake.move()
-
-        # Check if snake head is at food position
-        if snake.body[0] == food.position:
-            print(f"Turn {turn_count}: Food eaten at {food.position}!")
-            snake.grow()
-            food.spawn(BOARD_WIDTH, BOARD_HEIGHT, snake.body)
-            print(f"Turn {turn_count}: New Food at: {food.position}. Snake length: {len(snake.body)}")
-
-        # Check for wall collision
-        if check_collision_wall(snake.body[0]):
-            print(f"Turn {turn_count}: Game Over - Wall Collision")
-            print(f"Snake hit wall at: {snake.body[0]}")
-            game_running = False
-        
-        # Check for self-collision (only if game still running)
-        if game_running and snake.check_collision_self():
-            print(f"Turn {turn_count}: Game Over - Self Collision")
-            print(f"Snake collided with itself. Head: {snake.body[0]}, Body: {snake.body}")
-            game_running = False
-            
-        if game_running:
-            # (Placeholder) Print the game state
-            # Print only head and food for brevity in logs, unless snake is very short
-            snake_display = snake.body if len(snake.body) < 5 else f"{snake.body[0]}...{snake.body[-1]}"
-            print(f"Turn {turn_count}: Head: {snake.body[0]} (L:{len(snake.body)},D:{snake.direction}) Food: {food.position}")
-            # print(f"Turn {turn_count}: Snake: {snake_display} (Dir: {snake.direction}) Food: {food.position}")
-            # print("---") # Reduce noise
-        
-        # Add a small delay
+    while not (game.game_over or game.won) and game.ticks < max_turns:
+        # The autopilot steers for testing: shortest safe path to the food,
+        # else along a Hamiltonian cycle of the board
+        if exporter:
+            start = time.perf_counter()
+            direction = pilot.direction_2d(game)
+            game.metrics.add_time('autopilot', time.perf_counter() - start)
+            exporter.poll()
+        else:
+            direction = pilot.direction_2d(game)
+        game.step(direction)
         time.sleep(0.1) # Slightly faster for testing, 0.2 is also fine
-    
+
     print("---")
     print("Game Ended.")
-    if turn_count >= max_turns:
+    if game.ticks >= max_turns:
         print(f"Reached max turns ({max_turns}).")
-    print(f"Final Snake: {snake.body}")
-    print(f"Final Food: {food.position}")
+    print(f"Final Snake: {list(snake.body)}")
+    print(f"Final Food: {game.food.position}")
     print(f"Final Snake Length: {len(snake.body)}")
+    if exporter:
+        exporter.export()
+        print(game.metrics.report())
+    if profiler:
+        profiler.stop()
+        print(profiler.report())
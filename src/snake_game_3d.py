@@ -1,32 +1,22 @@
-import random
-from enum import Enum
+from collections import deque
+from copy import copy
+from itertools import islice
+from time import perf_counter
 from ursina import *
+
+# Game rules live in snake_core_3d; this module only renders them and plays sounds.
+from snake_core_3d import (
+    BOARD_WIDTH, BOARD_HEIGHT, BOARD_DEPTH, DIRECTIONS, Game, GameEvent, GameState,
+)
+from event_stream import Moved
+from grid import board_grid
+from segment_animation import ANIMATION_BUDGET, SegmentAnimator
+from asset_manager import AssetManager
+from autopilot import Autopilot
+from instrumentation import Metrics, MetricsExporter, SamplingProfiler
 # from ursina.prefabs.first_person_controller import FirstPersonController # Or EditorCamera
 
-# --- Game Configuration ---
-BOARD_WIDTH = 10
-BOARD_HEIGHT = 10
-BOARD_DEPTH = 10
-GAME_SPEED_INITIAL = 0.20
-ORIGINAL_GAME_SPEED = GAME_SPEED_INITIAL # For power-up logic
-BOOSTED_GAME_SPEED = ORIGINAL_GAME_SPEED / 2.0
-SPEED_BOOST_DURATION = 5.0
-
-
-# --- Game States ---
-class GameState(Enum):
-    START_SCREEN = 1
-    PLAYING = 2
-    GAME_OVER = 3
-
-current_state = GameState.START_SCREEN
-
-# --- Asset Paths & Directions ---
-DIRECTIONS = {
-    "RIGHT_X": (1, 0, 0), "LEFT_X": (-1, 0, 0),
-    "UP_Y": (0, 1, 0), "DOWN_Y": (0, -1, 0),
-    "FORWARD_Z": (0, 0, 1), "BACKWARD_Z": (0, 0, -1),
-}
+# --- Asset Paths ---
 SNAKE_HEAD_MODEL = 'assets/models/snake_head.obj'
 SNAKE_SEGMENT_MODEL = 'assets/models/snake_segment.obj'
 SNAKE_TEXTURE = 'assets/textures/snake_skin.png'
@@ -34,139 +24,281 @@ FOOD_MODEL = 'assets/models/food.obj'
 FOOD_TEXTURE = 'assets/textures/food_texture.png'
 WALL_TEXTURE = 'assets/textures/wall_texture.png'
 
-# --- Audio Assets ---
-eat_sound = Audio('assets/sounds/eat_food.wav', autoplay=False, loop=False)
-game_over_sound = Audio('assets/sounds/game_over.wav', autoplay=False, loop=False)
-powerup_collect_sound = Audio('assets/sounds/powerup_collect.wav', autoplay=False, loop=False)
-background_music = Audio('assets/sounds/background_music.ogg', loop=True, autoplay=True, volume=0.5)
-
-
-# --- Power-up Variables ---
-powerup_item_entity = None
-is_powerup_item_active = False # Is the power-up item currently spawned
-powerup_spawn_timer = 5.0    # Time until next power-up spawn attempt
-speed_boost_active = False     # Is the speed boost currently active
-speed_boost_timer = 0.0        # Remaining duration of the speed boost
+EAT_SOUND = 'assets/sounds/eat_food.wav'
+GAME_OVER_SOUND = 'assets/sounds/game_over.wav'
+POWERUP_COLLECT_SOUND = 'assets/sounds/powerup_collect.wav'
+BACKGROUND_MUSIC = 'assets/sounds/background_music.ogg'
+
+# Nothing is loaded here: the manager loads each asset on first use, and the
+# start screen preloads the rest in the background (see the end of this file).
+assets = AssetManager({
+    'model': load_model,
+    'texture': load_texture,
+    'sound': lambda path, **options: Audio(path, autoplay=False, **options),
+})
+assets.scan()
+assets.register(BACKGROUND_MUSIC, loop=True, volume=0.5)
+
+def play_sound(path):
+    sound = assets.get(path)
+    if sound: # None if it couldn't be loaded, e.g. no audio device
+        sound.play()
+
+def model_copy(path):
+    """A copy of the model loaded once by the manager, for one entity: an
+    entity reparents the node it is given, so entities can't share it."""
+    model = assets.get(path)
+    return copy(model) if model is not None else None
 
 
 # --- Helper Functions ---
-def game_to_ursina_pos(game_pos):
+def world_pos(game_pos):
     return (
         game_pos[0] - BOARD_WIDTH / 2 + 0.5,
         game_pos[1] - BOARD_HEIGHT / 2 + 0.5,
         game_pos[2] - BOARD_DEPTH / 2 + 0.5,
     )
 
-def get_random_position_safe(board_width, board_height, board_depth, snake_body, food_pos, current_powerup_pos=None):
-    """Gets a random position ensuring it's not on snake, food, or existing powerup."""
-    while True:
-        pos = get_random_position(board_width, board_height, board_depth)
-        if pos not in snake_body and pos != food_pos and (current_powerup_pos is None or pos != current_powerup_pos):
-            return pos
-
-def get_random_position(board_width, board_height, board_depth): # Original remains for Food
-    x = random.randint(0, board_width - 1)
-    y = random.randint(0, board_height - 1)
-    z = random.randint(0, board_depth - 1)
-    return (x, y, z)
-
-def check_collision_wall(snake_head_position):
-    x, y, z = snake_head_position
-    return not (0 <= x < BOARD_WIDTH and 0 <= y < BOARD_HEIGHT and 0 <= z < BOARD_DEPTH)
-
-# --- Game Object Classes ---
-class Snake: # (No changes to Snake class for this feature)
-    def __init__(self, start_pos, start_length=3, initial_direction_vector=(1,0,0)):
-        self.start_pos_init = start_pos
-        self.start_length_init = start_length
-        self.initial_direction_vector_init = initial_direction_vector
+# World position of every board cell, keyed by the cell tuples the snake moves through
+WORLD_POSITIONS = {cell: world_pos(cell) for cell in board_grid((BOARD_WIDTH, BOARD_HEIGHT, BOARD_DEPTH)).cells}
+
+def game_to_ursina_pos(game_pos):
+    """World position of grid cell game_pos; looked up for board cells."""
+    pos = WORLD_POSITIONS.get(game_pos)
+    return pos if pos is not None else world_pos(game_pos)
+
+def interpolated_ursina_pos(prev_pos, game_pos, alpha):
+    """World position alpha (0..1) of the way from grid cell prev_pos to game_pos."""
+    return world_pos((
+        prev_pos[0] + (game_pos[0] - prev_pos[0]) * alpha,
+        prev_pos[1] + (game_pos[1] - prev_pos[1]) * alpha,
+        prev_pos[2] + (game_pos[2] - prev_pos[2]) * alpha,
+    ))
+
+
+# --- View Classes ---
+SNAKE_RENDER_MODE = 'entities' # 'entities': one pooled entity per segment; 'combined': body in one mesh
+ANIMATION_MODE = 'ends' # 'ends': only head and tail slide; 'full': up to ANIMATION_BUDGET segments slide
+METRICS_FILE = None # F3 turns metrics on; set a path (e.g. 'metrics.jsonl') to also append them there each second
+
+def count_metric(name, n=1):
+    if game.metrics is not None:
+        game.metrics.count(name, n)
+
+def reset_entity(entity, scale):
+    """Stops any running tweens and undoes the game-over look on a reused entity."""
+    for animation in entity.animations:
+        animation.kill()
+    entity.animations.clear()
+    entity.color = color.white
+    entity.scale = scale
+
+class EntityPool:
+    """Hands out disabled entities for reuse instead of destroying and recreating them."""
+
+    def __init__(self, model, **entity_kwargs):
+        self.model = model # Asset path
+        self.entity_kwargs = entity_kwargs
+        self.scale = entity_kwargs.get('scale', Vec3(1,1,1))
+        self._free = []
+
+    def acquire(self, position, enabled=True):
+        if self._free:
+            entity = self._free.pop()
+            reset_entity(entity, self.scale)
+            count_metric('entities_reused')
+        else:
+            entity = Entity(model=model_copy(self.model), **self.entity_kwargs)
+            count_metric('entities_created')
+        entity.position = position
+        entity.enabled = enabled
+        return entity
+
+    def release(self, entity):
+        entity.enabled = False
+        self._free.append(entity)
+
+class SnakeView:
+    """Entities mirroring a snake_core_3d.Snake, one per body segment.
+
+    The head entity lives as long as the view. On a plain move the tail
+    entity is picked up and dropped into the old head's cell, so no entity is
+    created or destroyed; growth and resets go through an EntityPool.
+
+    on_moved() takes each step's Moved delta from the game's stream as the
+    step happens: Game.update() can run several steps in one frame, and
+    entity 1 has to land on every old head in turn, not just the last."""
+
+    def __init__(self, snake, animation_mode=ANIMATION_MODE, animation_budget=ANIMATION_BUDGET):
+        self.snake = snake
+        self.animator = SegmentAnimator(snake, animation_mode, animation_budget)
         self.normal_segment_scale = Vec3(1,1,1)
-        self.entities = []
-        self.reset() 
-
-    def reset(self):
-        self.destroy_entities() 
-        self.body = [self.start_pos_init]
-        self.direction = self.initial_direction_vector_init
-        self._should_grow = False
-        
-        current_x, current_y, current_z = self.start_pos_init
-        inv_dx, inv_dy, inv_dz = -self.direction[0], -self.direction[1], -self.direction[2]
-        for i in range(1, self.start_length_init):
-            self.body.append((current_x + inv_dx * i, current_y + inv_dy * i, current_z + inv_dz * i))
-        
-        for i, segment_pos in enumerate(self.body):
-            model_path = SNAKE_HEAD_MODEL if i == 0 else SNAKE_SEGMENT_MODEL
-            entity = Entity(
-                model=model_path, texture=SNAKE_TEXTURE,
-                scale=self.normal_segment_scale,
-                position=game_to_ursina_pos(segment_pos),
-                collider='box', enabled=False 
-            )
-            self.entities.append(entity)
-
-    def move(self):
-        global game_speed 
-        head_x, head_y, head_z = self.body[0]
-        dx, dy, dz = self.direction
-        new_head_pos = (head_x + dx, head_y + dy, head_z + dz)
-        self.body.insert(0, new_head_pos)
-        
-        if self._should_grow:
-            new_head_entity = Entity(
-                model=SNAKE_HEAD_MODEL, texture=SNAKE_TEXTURE,
-                scale=Vec3(0,0,0), position=game_to_ursina_pos(new_head_pos),
-                enabled=self.entities[0].enabled if self.entities else True 
-            )
-            new_head_entity.animate_scale(self.normal_segment_scale, duration=game_speed * 2)
-            self.entities.insert(0, new_head_entity)
-            self._should_grow = False
+        self.head_entity = Entity(model=model_copy(SNAKE_HEAD_MODEL), texture=assets.get(SNAKE_TEXTURE),
+                                  scale=self.normal_segment_scale, collider='box', enabled=False)
+        self.pool = EntityPool(model=SNAKE_SEGMENT_MODEL, texture=assets.get(SNAKE_TEXTURE),
+                               scale=self.normal_segment_scale, collider='box', enabled=False)
+        self.entities = deque([self.head_entity])
+        self.visible = False
+        self.rebuild()
+
+    def rebuild(self):
+        self.release_segments()
+        self.animator.reset()
+        body = self.snake.body
+        reset_entity(self.head_entity, self.normal_segment_scale)
+        self.head_entity.position = game_to_ursina_pos(body[0])
+        for segment_pos in islice(body, 1, None):
+            self.entities.append(self.pool.acquire(game_to_ursina_pos(segment_pos), self.visible))
+
+    def on_moved(self, moved, game_speed):
+        """Moves entities to match a snake that has just moved one cell. Only
+        a constant number of entities are touched, whatever the length."""
+        grew = moved.tail is None
+        if grew:
+            segment = self.pool.acquire(game_to_ursina_pos(self.snake.body[1]), self.visible)
+            segment.scale = Vec3(0,0,0)
+            segment.animate_scale(self.normal_segment_scale, duration=game_speed * 2)
+            count_metric('tweens')
         else:
-            if self.entities:
-                tail_entity = self.entities.pop()
-                destroy(tail_entity)
-            self.body.pop()
-
-        for i, segment_pos in enumerate(self.body):
-            if i < len(self.entities): 
-                 self.entities[i].animate_position(game_to_ursina_pos(segment_pos), duration=game_speed * 0.9)
-
-    def grow(self): self._should_grow = True
-    def change_direction(self, new_direction_vector):
-        if not (new_direction_vector[0] == -self.direction[0] and \
-                new_direction_vector[1] == -self.direction[1] and \
-                new_direction_vector[2] == -self.direction[2]):
-            self.direction = new_direction_vector
-    def check_collision_self(self):
-        if not self.body: return False
-        return self.body[0] in self.body[1:]
-    def destroy_entities(self):
-        for entity in self.entities: destroy(entity)
-        self.entities = []
+            segment = self.entities.pop()
+        # Right behind the head; insert near the left end of a deque is O(1)
+        self.entities.insert(1, segment)
+        for index, cell in self.animator.on_moved(grew):
+            self.entities[index].position = game_to_ursina_pos(cell)
+
+    def render(self, alpha):
+        """Interpolates the segments the animator picks (the head and tail, or
+        up to its budget from the head) alpha of the way through the move."""
+        entities = self.entities
+        for index, prev_pos, segment_pos in self.animator.frame():
+            entities[index].position = interpolated_ursina_pos(prev_pos, segment_pos, alpha)
+
+    def release_segments(self):
+        while len(self.entities) > 1:
+            self.pool.release(self.entities.pop())
     def set_visibility(self, visible):
+        self.visible = visible
         for entity in self.entities: entity.enabled = visible
 
-class Food: # (No changes to Food class for this feature, except using get_random_position_safe if needed)
-    def __init__(self, board_width, board_height, board_depth, snake_body_initial):
-        self.board_width = board_width
-        self.board_height = board_height
-        self.board_depth = board_depth
+
+# Unit cube as 6 quads of 4 corners, so each face gets its own uvs
+_CUBE_FACES = (
+    ((.5,-.5,-.5), (.5,.5,-.5), (.5,.5,.5), (.5,-.5,.5)),
+    ((-.5,-.5,.5), (-.5,.5,.5), (-.5,.5,-.5), (-.5,-.5,-.5)),
+    ((-.5,.5,-.5), (-.5,.5,.5), (.5,.5,.5), (.5,.5,-.5)),
+    ((-.5,-.5,.5), (-.5,-.5,-.5), (.5,-.5,-.5), (.5,-.5,.5)),
+    ((.5,-.5,.5), (.5,.5,.5), (-.5,.5,.5), (-.5,-.5,.5)),
+    ((-.5,-.5,-.5), (-.5,.5,-.5), (.5,.5,-.5), (.5,-.5,-.5)),
+)
+_CUBE_CORNERS = [corner for face in _CUBE_FACES for corner in face]
+_CUBE_UVS = [(0,0), (0,1), (1,1), (1,0)] * 6
+_CUBE_TRIANGLES = [base + i for base in range(0, 24, 4) for i in (0, 1, 2, 0, 2, 3)]
+_VERTS_PER_CUBE = len(_CUBE_CORNERS)
+
+class SnakeMeshView:
+    """Draws the snake with three entities whatever its length: the head, the
+    tail, and every segment in between combined into one mesh (one draw call).
+
+    Each middle segment owns a slot of 24 vertices in the mesh. A move writes
+    one slot (the old head's cell joins the middle) and frees one (the new
+    tail's cell leaves it); the mesh is re-uploaded once per frame, however
+    many steps that frame ran. Moves come from each step's Moved delta, as
+    in SnakeView. Per frame only the head and tail entities are interpolated."""
+
+    def __init__(self, snake, capacity=64):
+        self.snake = snake
+        self.normal_segment_scale = Vec3(1,1,1)
+        texture = assets.get(SNAKE_TEXTURE)
+        self.head_entity = Entity(model=model_copy(SNAKE_HEAD_MODEL), texture=texture,
+                                  scale=self.normal_segment_scale, enabled=False)
+        self.tail_entity = Entity(model=model_copy(SNAKE_SEGMENT_MODEL), texture=texture,
+                                  scale=self.normal_segment_scale, enabled=False)
+        self.mesh = Mesh(vertices=[], triangles=[], uvs=[], static=False)
+        self.body_entity = Entity(model=self.mesh, texture=texture, double_sided=True, enabled=False)
+        self.entities = [self.head_entity, self.body_entity, self.tail_entity]
+        self._capacity = 0
+        self._free_slots = []
+        self._slots = deque()
+        self._dirty = False
+        self._grow_capacity(capacity)
+        self.rebuild()
+
+    def _grow_capacity(self, capacity):
+        hidden = [(0,0,0)] * _VERTS_PER_CUBE # Degenerate: every corner on one point
+        for _ in range(self._capacity, capacity):
+            self.mesh.vertices.extend(hidden)
+            self.mesh.uvs.extend(_CUBE_UVS)
+        self.mesh.triangles = [slot * _VERTS_PER_CUBE + i for slot in range(capacity) for i in _CUBE_TRIANGLES]
+        self._free_slots = list(range(capacity - 1, self._capacity - 1, -1)) + self._free_slots
+        self._capacity = capacity
+
+    def _write_slot(self, slot, game_pos):
+        x, y, z = game_to_ursina_pos(game_pos)
+        start = slot * _VERTS_PER_CUBE
+        self.mesh.vertices[start:start + _VERTS_PER_CUBE] = [(x + cx, y + cy, z + cz) for cx, cy, cz in _CUBE_CORNERS]
+
+    def _acquire_slot(self, game_pos):
+        if not self._free_slots:
+            self._grow_capacity(self._capacity * 2)
+        slot = self._free_slots.pop()
+        self._write_slot(slot, game_pos)
+        return slot
+
+    def _release_slot(self, slot):
+        start = slot * _VERTS_PER_CUBE
+        self.mesh.vertices[start:start + _VERTS_PER_CUBE] = [(0,0,0)] * _VERTS_PER_CUBE
+        self._free_slots.append(slot)
+
+    def rebuild(self):
+        for slot in self._slots:
+            self._release_slot(slot)
+        self._has_moved = False
+        body = self.snake.body
+        for entity in self.entities: # The body too: the game-over tweens scale and fade it
+            reset_entity(entity, self.normal_segment_scale)
+        self._head = body[0]
+        self.head_entity.position = game_to_ursina_pos(body[0])
+        self.tail_entity.position = game_to_ursina_pos(body[-1])
+        # Slots for body[1:-1], head side first
+        self._slots = deque(self._acquire_slot(pos) for pos in islice(body, 1, len(body) - 1))
+        self.mesh.generate()
+        self._dirty = False
+
+    def on_moved(self, moved, game_speed):
+        self._slots.appendleft(self._acquire_slot(self._head)) # The old head's cell
+        self._head = moved.head
+        if moved.tail is not None:
+            self._release_slot(self._slots.pop()) # That cell is the tail now
+        self._dirty = True
+        self._has_moved = True
+
+    def render(self, alpha):
+        if self._dirty:
+            self.mesh.generate()
+            self._dirty = False
+        if not self._has_moved:
+            return
+        body = self.snake.body
+        self.head_entity.position = interpolated_ursina_pos(body[1], body[0], alpha)
+        self.tail_entity.position = interpolated_ursina_pos(self.snake.last_vacated or body[-1], body[-1], alpha)
+
+    def set_visibility(self, visible):
+        for entity in self.entities: entity.enabled = visible
+
+class FoodView:
+    def __init__(self, food):
+        self.food = food
         self.original_scale = Vec3(1,1,1)
-        self.entity = Entity(model=FOOD_MODEL, texture=FOOD_TEXTURE, scale=self.original_scale, enabled=False)
-        self.spawn(snake_body_initial) 
-
-    def spawn(self, snake_body):
-        # Food can spawn where a powerup is, that's fine.
-        new_pos = get_random_position(self.board_width, self.board_height, self.board_depth)
-        while new_pos in snake_body: # Ensure not on snake
-            new_pos = get_random_position(self.board_width, self.board_height, self.board_depth)
-        self.position = new_pos
-        self.entity.position = game_to_ursina_pos(self.position)
-
-    def reset(self, snake_body): 
-        self.spawn(snake_body)
+        self.entity = Entity(model=model_copy(FOOD_MODEL), texture=assets.get(FOOD_TEXTURE), scale=self.original_scale, enabled=False)
+        self.sync()
+
+    def sync(self):
+        if self.food.position is not None:
+            self.entity.position = game_to_ursina_pos(self.food.position)
     def destroy_entity(self):
-        if self.entity: destroy(self.entity)
+        if self.entity:
+            destroy(self.entity)
+            count_metric('entities_destroyed')
     def set_visibility(self, visible):
         self.entity.enabled = visible
 
@@ -174,199 +306,189 @@ class Food: # (No changes to Food class for this feature, except using get_rando
 app = Ursina(title='3D Snake Game - Power Ups!')
 start_screen_ui, game_play_ui, game_over_ui = [], [], []
 title_text = Text(text='3D SNAKE!', origin=(0,0), scale=3, y=0.2, enabled=False); start_screen_ui.append(title_text)
-instructions_text = Text(text='Use Arrows for X/Y, W/S for Z\n\nPress Enter to Start', origin=(0,0), y=-0.1, scale=2, enabled=False, textAlign='center'); start_screen_ui.append(instructions_text)
+instructions_text = Text(text='Use Arrows for X/Y, W/S for Z\nP toggles the autopilot\nF3 metrics, F4 profiler\n\nPress Enter to Start', origin=(0,0), y=-0.1, scale=2, enabled=False, textAlign='center'); start_screen_ui.append(instructions_text)
 score_text = Text(text='Score: 0', position=(-0.65, 0.45), scale=1.5, origin=(0,0), enabled=False); game_play_ui.append(score_text)
 game_over_title_text = Text(text='GAME OVER', origin=(0,0), scale=4, y=0.2, color=color.red, enabled=False); game_over_ui.append(game_over_title_text)
 final_score_text = Text(text='Final Score: 0', origin=(0,0), scale=2, y=0, enabled=False); game_over_ui.append(final_score_text)
 restart_instructions_text = Text(text='Press R to Restart', origin=(0,0), y=-0.2, scale=2, enabled=False); game_over_ui.append(restart_instructions_text)
+metrics_text = Text(text='', position=(0.35, 0.45), scale=0.8, enabled=False) # F3 overlay
 
-score = 0
-game_speed = GAME_SPEED_INITIAL # This will be modified by power-up
-time_since_last_step = 0
-snake_start_pos_init = (BOARD_WIDTH // 2, BOARD_HEIGHT // 2, BOARD_DEPTH // 2)
-snake = Snake(start_pos=snake_start_pos_init, start_length=3)
-food = Food(BOARD_WIDTH, BOARD_HEIGHT, BOARD_DEPTH, snake.body)
+game = Game()
+# Created when the first game starts, so their models and textures come from
+# the start screen's preload instead of being loaded before it shows
+snake_view = food_view = None
+powerup_item_entity = None
 
-# --- Power-up Function ---
-def spawn_powerup():
-    global powerup_item_entity, is_powerup_item_active, snake, food
+# --- Power-up Functions ---
+def show_powerup():
+    global powerup_item_entity
+    if powerup_item_entity is None: # Created once, then moved and re-enabled
+        powerup_item_entity = Entity(
+            model='sphere', # Simple sphere for power-up
+            color=color.azure,
+            scale=food_view.original_scale # Same scale as food
+        )
+        count_metric('entities_created')
+    powerup_item_entity.position = game_to_ursina_pos(game.powerup_position)
+    powerup_item_entity.enabled = True
+
+def hide_powerup():
     if powerup_item_entity:
-        destroy(powerup_item_entity)
-    
-    # Use get_random_position_safe to avoid snake and food
-    spawn_pos_logical = get_random_position_safe(BOARD_WIDTH, BOARD_HEIGHT, BOARD_DEPTH, snake.body, food.position)
-    
-    powerup_item_entity = Entity(
-        model='sphere', # Simple sphere for power-up
-        color=color.azure,
-        position=game_to_ursina_pos(spawn_pos_logical),
-        scale=food.original_scale # Same scale as food
-    )
-    is_powerup_item_active = True
+        powerup_item_entity.enabled = False
 
 # --- Game Logic Functions ---
-def reset_game():
-    global score, snake, food, time_since_last_step, game_speed
-    global powerup_item_entity, is_powerup_item_active, speed_boost_active, powerup_spawn_timer, speed_boost_timer
-
-    score = 0
-    score_text.text = f'Score: {score}'
-    time_since_last_step = 0
-    game_speed = ORIGINAL_GAME_SPEED # Reset game speed
-    
-    start_length = 3
-    initial_direction_vec = DIRECTIONS["RIGHT_X"]
-    min_coord_vals = [(start_length - 1) * abs(d_val) for d_val in initial_direction_vec]
-    start_x = max(min_coord_vals[0], BOARD_WIDTH // 2) 
-    start_y = max(min_coord_vals[1], BOARD_HEIGHT // 2)
-    start_z = max(min_coord_vals[2], BOARD_DEPTH // 2)
-    
-    snake.start_pos_init = (start_x, start_y, start_z)
-    snake.start_length_init = start_length
-    snake.initial_direction_vector_init = initial_direction_vec
-    snake.reset() 
-    food.reset(snake.body) 
-
-    # Reset power-up state
-    if powerup_item_entity:
-        destroy(powerup_item_entity)
-        powerup_item_entity = None
-    is_powerup_item_active = False
-    speed_boost_active = False
-    powerup_spawn_timer = 5.0 # Initial delay for first power-up
-    speed_boost_timer = 0.0
-
-
 def set_game_state(new_state):
-    global current_state, score, powerup_item_entity, is_powerup_item_active, speed_boost_active
-    
+    game.set_state(new_state)
+    show_game_state(new_state)
+
+def create_views():
+    global snake_view, food_view
+    if snake_view is None:
+        snake_view = SnakeMeshView(game.snake) if SNAKE_RENDER_MODE == 'combined' else SnakeView(game.snake)
+        food_view = FoodView(game.food)
+        game.stream.subscribe(on_stream_event)
+
+def on_stream_event(event):
+    # Called inside Game.step(), once per step, so a frame that runs several steps moves the view through each
+    if type(event) is Moved:
+        snake_view.on_moved(event, game.game_speed)
+
+def set_views_visibility(visible):
+    if snake_view is not None:
+        snake_view.set_visibility(visible)
+        food_view.set_visibility(visible)
+
+def show_game_state(new_state):
+    """Updates UI and entity visibility for a state the core has entered."""
     for ui_element in start_screen_ui + game_play_ui + game_over_ui:
         ui_element.enabled = False
 
-    current_state = new_state
-
     if new_state == GameState.START_SCREEN:
         for ui_element in start_screen_ui: ui_element.enabled = True
-        snake.set_visibility(False)
-        food.set_visibility(False)
+        set_views_visibility(False)
         if powerup_item_entity: powerup_item_entity.enabled = False
     elif new_state == GameState.PLAYING:
-        reset_game() # This handles power-up reset too
+        # The core has just reset the game
+        score_text.text = f'Score: {game.score}'
+        create_views()
+        snake_view.rebuild()
+        food_view.sync()
+        hide_powerup()
         for ui_element in game_play_ui: ui_element.enabled = True
-        snake.set_visibility(True)
-        food.set_visibility(True)
+        set_views_visibility(True)
         # Power-up entity will be spawned by its timer logic in update
-    elif new_state == GameState.GAME_OVER:
-        final_score_text.text = f'Final Score: {score}'
+    elif new_state in (GameState.GAME_OVER, GameState.WON):
+        game_over_title_text.text = 'YOU WIN!' if new_state == GameState.WON else 'GAME OVER'
+        game_over_title_text.color = color.green if new_state == GameState.WON else color.red
+        final_score_text.text = f'Final Score: {game.score}'
         for ui_element in game_over_ui: ui_element.enabled = True
-        snake.set_visibility(False)
-        food.set_visibility(False)
+        set_views_visibility(False)
         if powerup_item_entity: powerup_item_entity.enabled = False # Hide active powerup
-        # Reset active speed boost effect immediately
-        is_powerup_item_active = False # Ensure no new powerups spawn
-        speed_boost_active = False
-        global game_speed
-        game_speed = ORIGINAL_GAME_SPEED
 
 
 def trigger_game_over_animations(): # (Unchanged)
-    global snake
-    for segment_entity in snake.entities:
+    for segment_entity in snake_view.entities:
         segment_entity.animate_color(color.red, duration=0.3)
-        segment_entity.animate_scale(segment_entity.scale * 1.2, duration=0.3) 
+        segment_entity.animate_scale(segment_entity.scale * 1.2, duration=0.3)
         segment_entity.animate_color(color.clear, duration=0.5, delay=0.6)
+    count_metric('tweens', 3 * len(snake_view.entities))
+
+preload_finished = False
+metrics_exporter = None
+profiler = SamplingProfiler() # Samples this (the render) thread while F4 has it on
+
+def toggle_metrics():
+    """F3: starts recording into a fresh Metrics shown in the overlay, or stops."""
+    global metrics_exporter
+    if game.metrics is None:
+        game.metrics = Metrics()
+        metrics_exporter = MetricsExporter(game.metrics, METRICS_FILE,
+                                           on_export=lambda metrics: setattr(metrics_text, 'text', metrics.report()))
+        metrics_text.enabled = True
+    else:
+        metrics_exporter.export()
+        game.metrics = metrics_exporter = None
+        metrics_text.enabled = False
+
+def toggle_profiler():
+    if not profiler.toggle():
+        print(profiler.report())
+
+def on_preload_finished():
+    play_sound(BACKGROUND_MUSIC)
+    print('Asset load times:\n' + assets.report())
 
 def update():
-    global current_state, time_since_last_step, snake, food, score, game_speed
-    global eat_sound, game_over_sound, powerup_collect_sound
-    global powerup_item_entity, is_powerup_item_active, powerup_spawn_timer
-    global speed_boost_active, speed_boost_timer, BOOSTED_GAME_SPEED, ORIGINAL_GAME_SPEED, SPEED_BOOST_DURATION
-
-    if current_state == GameState.PLAYING:
-        time_since_last_step += time.dt
-
-        # Handle movement input (unchanged)
-        if held_keys['left arrow'] or held_keys['a']: snake.change_direction(DIRECTIONS["LEFT_X"])
-        elif held_keys['right arrow'] or held_keys['d']: snake.change_direction(DIRECTIONS["RIGHT_X"])
-        # ... (other movement inputs) ...
-        elif held_keys['up arrow'] or held_keys['space']: snake.change_direction(DIRECTIONS["UP_Y"])
-        elif held_keys['down arrow'] or held_keys['control']: snake.change_direction(DIRECTIONS["DOWN_Y"])
-        elif held_keys['w']: snake.change_direction(DIRECTIONS["FORWARD_Z"])
-        elif held_keys['s']: snake.change_direction(DIRECTIONS["BACKWARD_Z"])
-
-        # Power-up Spawning Logic
-        if not is_powerup_item_active and not speed_boost_active:
-            powerup_spawn_timer -= time.dt
-            if powerup_spawn_timer <= 0:
-                spawn_powerup()
-                powerup_spawn_timer = random.uniform(10, 20) # Reset for next potential spawn
-
-        # Power-up Collection Logic
-        if is_powerup_item_active and powerup_item_entity and len(snake.entities) > 0:
-            # Using Ursina's distance function and entity world_position
-            if distance(snake.entities[0].world_position, powerup_item_entity.world_position) < snake.normal_segment_scale.x:
-                powerup_collect_sound.play()
-                destroy(powerup_item_entity)
-                powerup_item_entity = None
-                is_powerup_item_active = False
-                
-                speed_boost_active = True
-                speed_boost_timer = SPEED_BOOST_DURATION
-                game_speed = BOOSTED_GAME_SPEED
-                # powerup_spawn_timer = random.uniform(10, 20) # Reset spawn timer for next powerup after this one is used
-
-        # Speed Boost Active Timer
-        if speed_boost_active:
-            speed_boost_timer -= time.dt
-            if speed_boost_timer <= 0:
-                speed_boost_active = False
-                game_speed = ORIGINAL_GAME_SPEED
-                # Spawn timer for next powerup starts counting down AFTER boost ends.
-                powerup_spawn_timer = random.uniform(5,10) 
-
-
-        # Game Tick Logic
-        if time_since_last_step >= game_speed:
-            time_since_last_step = 0
-            snake.move() 
-
-            if snake.body[0] == food.position:
-                eat_sound.play()
-                food.entity.animate_scale(Vec3(0,0,0), duration=game_speed * 0.5) # Use current game_speed
-                snake.grow()
-                food.spawn(snake.body) 
-                food.entity.animate_scale(food.original_scale, duration=game_speed * 0.5, delay=game_speed * 0.5)
-                score += 1
-                score_text.text = f'Score: {score}'
-            
-            collision_detected = False
-            if check_collision_wall(snake.body[0]):
-                collision_detected = True
-            elif snake.check_collision_self():
-                collision_detected = True
-            
-            if collision_detected:
-                game_over_sound.play()
-                trigger_game_over_animations()
-                set_game_state(GameState.GAME_OVER)
-
-def input(key): # (Unchanged)
-    global current_state
-    if current_state == GameState.START_SCREEN:
+    global preload_finished
+    if not preload_finished and not assets.preloading:
+        preload_finished = True
+        on_preload_finished()
+    if metrics_exporter is not None:
+        metrics_exporter.poll()
+    if game.state != GameState.PLAYING:
+        return
+
+    # Handle movement input (unchanged)
+    if held_keys['left arrow'] or held_keys['a']: game.change_direction(DIRECTIONS["LEFT_X"])
+    elif held_keys['right arrow'] or held_keys['d']: game.change_direction(DIRECTIONS["RIGHT_X"])
+    # ... (other movement inputs) ...
+    elif held_keys['up arrow'] or held_keys['space']: game.change_direction(DIRECTIONS["UP_Y"])
+    elif held_keys['down arrow'] or held_keys['control']: game.change_direction(DIRECTIONS["DOWN_Y"])
+    elif held_keys['w']: game.change_direction(DIRECTIONS["FORWARD_Z"])
+    elif held_keys['s']: game.change_direction(DIRECTIONS["BACKWARD_Z"])
+
+    for event in game.update(time.dt):
+        if event == GameEvent.POWERUP_SPAWNED:
+            show_powerup()
+        elif event == GameEvent.POWERUP_COLLECTED:
+            play_sound(POWERUP_COLLECT_SOUND)
+            hide_powerup()
+        elif event == GameEvent.ATE_FOOD:
+            play_sound(EAT_SOUND)
+            score_text.text = f'Score: {game.score}'
+            food_view.entity.animate_scale(Vec3(0,0,0), duration=game.game_speed * 0.5) # Use current game_speed
+            food_view.sync()
+            food_view.entity.animate_scale(food_view.original_scale, duration=game.game_speed * 0.5, delay=game.game_speed * 0.5)
+            count_metric('tweens', 2)
+        elif event == GameEvent.WON:
+            show_game_state(GameState.WON)
+        elif event == GameEvent.GAME_OVER:
+            play_sound(GAME_OVER_SOUND)
+            trigger_game_over_animations()
+            show_game_state(GameState.GAME_OVER)
+
+    if game.state == GameState.PLAYING:
+        render_start = perf_counter()
+        snake_view.render(game.scheduler.alpha)
+        render_time = perf_counter() - render_start
+        game.scheduler.stats.record_render(render_time)
+        if game.metrics is not None:
+            game.metrics.add_time('render', render_time)
+
+def input(key):
+    if key == 'p': # Steers from the next tick on, overriding the arrow keys
+        game.autopilot = None if game.autopilot else Autopilot((BOARD_WIDTH, BOARD_HEIGHT, BOARD_DEPTH))
+    if key == 'f3':
+        toggle_metrics()
+    if key == 'f4':
+        toggle_profiler()
+    if game.state == GameState.START_SCREEN:
         if key == 'enter' or key == 'return': set_game_state(GameState.PLAYING)
-    elif current_state == GameState.GAME_OVER:
+    elif game.state in (GameState.GAME_OVER, GameState.WON):
         if key == 'r': set_game_state(GameState.PLAYING)
 
 # --- Environment and Initial Setup (Unchanged) ---
 DirectionalLight(parent=pivot, y=2, z=3, shadows=True, rotation=(45, -45, 0))
 AmbientLight(color=color.rgba(100, 100, 100, 0.2))
-camera.orthographic = True; camera.position = (BOARD_WIDTH /2, BOARD_HEIGHT*1.5, -BOARD_DEPTH*1.5); camera.rotation_x = 30; camera.fov = 20 
-Entity(model='quad', texture=WALL_TEXTURE, scale=(BOARD_WIDTH, BOARD_DEPTH), position=(0, -BOARD_HEIGHT/2, 0), rotation_x=-90)
-Entity(model='quad', texture=WALL_TEXTURE, scale=(BOARD_WIDTH, BOARD_DEPTH), position=(0, BOARD_HEIGHT/2, 0), rotation_x=90)
-Entity(model='quad', texture=WALL_TEXTURE, scale=(BOARD_DEPTH, BOARD_HEIGHT), position=(-BOARD_WIDTH/2, 0, 0), rotation_y=-90)
-Entity(model='quad', texture=WALL_TEXTURE, scale=(BOARD_DEPTH, BOARD_HEIGHT), position=(BOARD_WIDTH/2, 0, 0), rotation_y=90)
-Entity(model='quad', texture=WALL_TEXTURE, scale=(BOARD_WIDTH, BOARD_HEIGHT), position=(0, 0, BOARD_DEPTH/2), rotation_y=0)
-Entity(model='quad', texture=WALL_TEXTURE, scale=(BOARD_WIDTH, BOARD_HEIGHT), position=(0, 0, -BOARD_DEPTH/2), rotation_y=180)
-
-set_game_state(GameState.START_SCREEN) 
+camera.orthographic = True; camera.position = (BOARD_WIDTH /2, BOARD_HEIGHT*1.5, -BOARD_DEPTH*1.5); camera.rotation_x = 30; camera.fov = 20
+wall_texture = assets.get(WALL_TEXTURE)
+Entity(model='quad', texture=wall_texture, scale=(BOARD_WIDTH, BOARD_DEPTH), position=(0, -BOARD_HEIGHT/2, 0), rotation_x=-90)
+Entity(model='quad', texture=wall_texture, scale=(BOARD_WIDTH, BOARD_DEPTH), position=(0, BOARD_HEIGHT/2, 0), rotation_x=90)
+Entity(model='quad', texture=wall_texture, scale=(BOARD_DEPTH, BOARD_HEIGHT), position=(-BOARD_WIDTH/2, 0, 0), rotation_y=-90)
+Entity(model='quad', texture=wall_texture, scale=(BOARD_DEPTH, BOARD_HEIGHT), position=(BOARD_WIDTH/2, 0, 0), rotation_y=90)
+Entity(model='quad', texture=wall_texture, scale=(BOARD_WIDTH, BOARD_HEIGHT), position=(0, 0, BOARD_DEPTH/2), rotation_y=0)
+Entity(model='quad', texture=wall_texture, scale=(BOARD_WIDTH, BOARD_HEIGHT), position=(0, 0, -BOARD_DEPTH/2), rotation_y=180)
+
+set_game_state(GameState.START_SCREEN)
+assets.preload() # Loads the sounds and anything not yet used while the start screen shows
 app.run()
@@ -0,0 +1,216 @@
+"""Bit-packed, hashable snapshots of snake game state.
+
+A GameSnapshot holds everything needed to put a game back the way it was:
+
+    occupancy    in-bounds body cells as one int bitboard, bit = cell index
+                 (x + W*y [+ W*H*z]); derived from the body when asked for
+                 (to_bytes() writes it), and left out (None) for sparse
+                 games, where it would be as big as the board
+    body         head coordinates plus, for every later segment, the code of
+                 the move from it to the segment in front, packed 2 bits per
+                 segment on 2D boards and 3 bits on 3D ones
+    items        (cell index, kind code) pairs, sorted
+    scalars      game-specific numbers (score, ticks, timers...), as floats
+
+Two snapshots compare and hash equal when the game states are the same, so
+they can go straight into a set or dict to deduplicate search states.
+
+For exact rollback a snapshot can also carry the RNG state and the order of
+the free-cell list (which decides the cell a given random draw picks).
+Neither is part of the hash or of to_bytes(); a snapshot without them
+restores the same board, but later food draws may land elsewhere.
+
+snake_game_2d.Game and snake_core_3d.Game build and restore these through
+their snapshot() and restore() methods.
+"""
+import struct
+from itertools import islice
+
+from grid import DIRECTION_CODES, DIRECTION_DELTAS, cell_index, in_bounds, index_cell, strides
+
+MAGIC = b'SNKS'
+VERSION = 1
+
+CODE_BITS = {2: 2, 3: 3}
+
+_HEADER = struct.Struct('<4sBB')
+_COUNTS = struct.Struct('<IBBHB') # length, direction code, flags, item count, scalar count
+_GROW_PENDING = 1
+_NO_OCCUPANCY = 2
+_ITEM = struct.Struct('<IB')
+
+
+def _pack_codes(codes, bits):
+    """Packs codes of bits bits each into an int, first code lowest. Eight
+    codes fill whole bytes, so the int is built once from a bytearray instead
+    of being shifted and or-ed a code at a time (quadratic for long bodies)."""
+    packed = bytearray()
+    chunk = shift = 0
+    for code in codes:
+        chunk |= code << shift
+        shift += bits
+        if shift == 8 * bits:
+            packed += chunk.to_bytes(bits, 'little')
+            chunk = shift = 0
+    if shift:
+        packed += chunk.to_bytes(bits, 'little')
+    return int.from_bytes(packed, 'little')
+
+
+def _unpack_codes(packed, count, bits):
+    """Yields the first count codes of _pack_codes' int, eight at a time
+    from its bytes rather than shifting the whole int down per code."""
+    mask = (1 << bits) - 1
+    data = packed.to_bytes((count * bits + 7) // 8 + bits, 'little')
+    for start in range(0, count * bits // 8 + 1, bits):
+        chunk = int.from_bytes(data[start:start + bits], 'little')
+        for _ in range(min(8, count)):
+            yield chunk & mask
+            chunk >>= bits
+        count -= 8
+        if count <= 0:
+            return
+
+
+class GameSnapshot:
+    __slots__ = ('board_size', 'head', 'length', 'body_codes', 'direction', 'grow_pending',
+                 'with_occupancy', 'items', 'scalars', 'rng_state', 'free_order', '_hash')
+
+    def __init__(self, board_size, head, length, body_codes, direction, grow_pending,
+                 with_occupancy=True, items=(), scalars=(), rng_state=None, free_order=None):
+        self.board_size = tuple(board_size)
+        self.head = tuple(head)
+        self.length = length
+        self.body_codes = body_codes
+        self.direction = direction
+        self.grow_pending = grow_pending
+        self.with_occupancy = with_occupancy
+        self.items = tuple(items)
+        self.scalars = tuple(scalars)
+        self.rng_state = rng_state
+        self.free_order = free_order
+        self._hash = None
+
+    @classmethod
+    def capture(cls, board_size, body, direction, grow_pending=False, items=(), scalars=(),
+                rng_state=None, free_order=None, with_occupancy=True):
+        """Packs a snake body (head first) and direction code. items are
+        (cell, kind code) pairs of in-bounds cells."""
+        board_size = tuple(board_size)
+        codes_by_delta = DIRECTION_CODES[len(board_size)]
+        bits = CODE_BITS[len(board_size)]
+        if len(board_size) == 2:
+            body_codes = _pack_codes((codes_by_delta[(prev[0] - segment[0], prev[1] - segment[1])]
+                                      for prev, segment in zip(body, islice(body, 1, None))), bits)
+        else:
+            body_codes = _pack_codes((codes_by_delta[(prev[0] - segment[0], prev[1] - segment[1], prev[2] - segment[2])]
+                                      for prev, segment in zip(body, islice(body, 1, None))), bits)
+        items = sorted((cell_index(cell, board_size), kind) for cell, kind in items)
+        return cls(board_size, body[0], len(body), body_codes, direction, grow_pending,
+                   with_occupancy, items, scalars, rng_state, free_order)
+
+    def body(self):
+        """The snake's cells, head first, as a list of tuples."""
+        dims = len(self.board_size)
+        deltas = DIRECTION_DELTAS[dims]
+        codes = _unpack_codes(self.body_codes, self.length - 1, CODE_BITS[dims])
+        cells = [self.head]
+        append = cells.append
+        if dims == 2:
+            x, y = self.head
+            for code in codes:
+                dx, dy = deltas[code]
+                x -= dx
+                y -= dy
+                append((x, y))
+        else:
+            x, y, z = self.head
+            for code in codes:
+                dx, dy, dz = deltas[code]
+                x -= dx
+                y -= dy
+                z -= dz
+                append((x, y, z))
+        return cells
+
+    def _occupancy_bytes(self):
+        """The occupancy bitboard as little-endian bytes, one bit per cell."""
+        num_cells = 1
+        for d in self.board_size:
+            num_cells *= d
+        bitboard = bytearray((num_cells + 7) // 8)
+        board_size = self.board_size
+        sizes = strides(board_size)
+        for cell in self.body():
+            if in_bounds(cell, board_size):
+                index = sum(c * s for c, s in zip(cell, sizes))
+                bitboard[index >> 3] |= 1 << (index & 7)
+        return bitboard
+
+    @property
+    def occupancy(self):
+        """In-bounds body cells as an int bitboard, or None for a sparse game."""
+        if not self.with_occupancy:
+            return None
+        return int.from_bytes(self._occupancy_bytes(), 'little')
+
+    def item_cells(self):
+        """(cell, kind code) pairs."""
+        return [(index_cell(index, self.board_size), kind) for index, kind in self.items]
+
+    def key(self):
+        return (self.board_size, self.head, self.length, self.body_codes, self.direction,
+                self.grow_pending, self.items, self.scalars)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.key())
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, GameSnapshot):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def to_bytes(self):
+        dims = len(self.board_size)
+        bits = CODE_BITS[dims]
+        parts = [
+            _HEADER.pack(MAGIC, VERSION, dims),
+            struct.pack(f'<{dims}H{dims}i', *self.board_size, *self.head),
+            _COUNTS.pack(self.length, self.direction,
+                         (_GROW_PENDING if self.grow_pending else 0) | (0 if self.with_occupancy else _NO_OCCUPANCY),
+                         len(self.items), len(self.scalars)),
+            struct.pack(f'<{len(self.scalars)}d', *self.scalars),
+        ]
+        parts += [_ITEM.pack(index, kind) for index, kind in self.items]
+        parts.append(self.body_codes.to_bytes(((self.length - 1) * bits + 7) // 8, 'little'))
+        if self.with_occupancy:
+            parts.append(self._occupancy_bytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        magic, version, dims = _HEADER.unpack_from(blob)
+        if magic != MAGIC:
+            raise ValueError("Not a snake state snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        offset = _HEADER.size
+        coords = struct.Struct(f'<{dims}H{dims}i')
+        values = coords.unpack_from(blob, offset)
+        board_size, head = values[:dims], values[dims:]
+        offset += coords.size
+        length, direction, flags, num_items, num_scalars = _COUNTS.unpack_from(blob, offset)
+        offset += _COUNTS.size
+        scalars = struct.unpack_from(f'<{num_scalars}d', blob, offset)
+        offset += 8 * num_scalars
+        items = []
+        for _ in range(num_items):
+            items.append(_ITEM.unpack_from(blob, offset))
+            offset += _ITEM.size
+        body_size = ((length - 1) * CODE_BITS[dims] + 7) // 8
+        body_codes = int.from_bytes(blob[offset:offset + body_size], 'little')
+        # The occupancy bitboard, if present, follows; it is derived from the body
+        return cls(board_size, head, length, body_codes, direction, bool(flags & _GROW_PENDING),
+                   not flags & _NO_OCCUPANCY, items, scalars)
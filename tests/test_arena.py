@@ -0,0 +1,114 @@
+import random
+from collections import Counter
+
+import pytest
+
+from arena import Arena
+from grid import DIRECTION_DELTAS
+
+RIGHT, DOWN, LEFT, UP = range(4)
+
+
+def empty_arena(num_snakes, width=10, height=5):
+    arena = Arena(num_snakes, width, height, num_food=0, respawn=False, seed=0)
+    for snake in arena.snakes:
+        arena._kill(snake)
+        snake.deaths = 0
+    return arena
+
+
+def place(arena, snake_id, body, direction, grow=0):
+    snake = arena.snakes[snake_id]
+    snake.body.extend(body)
+    snake.direction = direction
+    snake.grow = grow
+    snake.alive = True
+    for cell in body:
+        arena._occupy(cell)
+    return snake
+
+
+def dead_ids(arena, actions=None):
+    return sorted(snake.id for snake in arena.step(actions))
+
+
+def reference_dead(arena, actions):
+    """The module docstring's rules, checked snake by snake against plain lists."""
+    w, h = arena.board_width, arena.board_height
+    moves = {}
+    for snake in arena.snakes:
+        if not snake.alive:
+            continue
+        direction = snake.direction
+        action = actions[snake.id] if actions is not None else None
+        if action is not None and (action ^ 2 != direction or len(snake.body) == 1):
+            direction = action
+        dx, dy = DIRECTION_DELTAS[2][direction]
+        x, y = snake.body[0]
+        moves[snake.id] = (snake, (x + dx, y + dy))
+    staying = Counter()
+    for snake, _ in moves.values():
+        body = list(snake.body)
+        staying.update(body if snake.grow else body[:-1])
+    dead = set()
+    for snake, head in moves.values():
+        x, y = head
+        if not (0 <= x < w and 0 <= y < h) or staying[head]:
+            dead.add(snake.id)
+            continue
+        for other, other_head in moves.values():
+            if other is snake:
+                continue
+            if other.body[0] == head and other_head == snake.body[0]:
+                dead.add(snake.id) # Swapped cells
+            elif other_head == head and len(other.body) >= len(snake.body):
+                dead.add(snake.id) # Head-on, not strictly the longest
+    return sorted(dead)
+
+
+def test_head_on_equal_lengths_kills_both():
+    arena = empty_arena(2)
+    place(arena, 0, [(2, 0), (1, 0)], RIGHT)
+    place(arena, 1, [(4, 0), (5, 0)], LEFT)
+    assert dead_ids(arena) == [0, 1]
+
+
+def test_head_on_longest_survives():
+    arena = empty_arena(2)
+    place(arena, 0, [(2, 0), (1, 0)], RIGHT)
+    longer = place(arena, 1, [(4, 0), (5, 0), (6, 0)], LEFT)
+    assert dead_ids(arena) == [0]
+    assert list(longer.body) == [(3, 0), (4, 0), (5, 0)]
+
+
+@pytest.mark.parametrize('grow, dies', [(0, False), (1, True)])
+def test_entering_a_leaving_tail(grow, dies):
+    arena = empty_arena(2)
+    place(arena, 0, [(2, 1), (1, 1)], RIGHT)
+    place(arena, 1, [(3, 0), (4, 0), (4, 1), (3, 1)], LEFT, grow=grow) # Tail (3, 1) is next to 0's head
+    assert dead_ids(arena) == ([0] if dies else [])
+
+
+def test_swapping_single_segments_kills_both():
+    arena = empty_arena(2)
+    place(arena, 0, [(3, 0)], RIGHT)
+    place(arena, 1, [(4, 0)], LEFT)
+    assert dead_ids(arena) == [0, 1]
+
+
+def test_swapping_with_necks_kills_both():
+    arena = empty_arena(2)
+    place(arena, 0, [(3, 0), (2, 0)], RIGHT)
+    place(arena, 1, [(4, 0), (5, 0)], LEFT)
+    assert dead_ids(arena) == [0, 1]
+
+
+def test_random_play_matches_reference():
+    rng = random.Random(1)
+    arena = Arena(8, 12, 10, num_food=6, start_length=4, seed=2)
+    for _ in range(3000):
+        actions = [rng.randrange(4) if rng.random() < 0.3 else None for _ in arena.snakes]
+        expected = reference_dead(arena, actions)
+        assert dead_ids(arena, actions) == expected
+        occupied = Counter(cell for snake in arena.snakes for cell in snake.body)
+        assert arena.cells == occupied
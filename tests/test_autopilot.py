@@ -0,0 +1,48 @@
+import pytest
+
+import snake_core_3d
+import snake_game_2d
+from autopilot import Autopilot
+
+
+def play_2d(board_size, seed):
+    game = snake_game_2d.Game(*board_size, seed=seed)
+    pilot = Autopilot(board_size)
+    cells = board_size[0] * board_size[1]
+    while not (game.game_over or game.won) and game.ticks < cells * cells:
+        game.step(pilot.direction_2d(game))
+    return game
+
+
+def play_3d(board_size, seed, max_ticks):
+    game = snake_core_3d.Game(seed=seed, board_size=board_size)
+    game.set_state(snake_core_3d.GameState.PLAYING)
+    pilot = Autopilot(board_size)
+    for _ in range(max_ticks):
+        if game.state != snake_core_3d.GameState.PLAYING:
+            break
+        game.change_direction(pilot.direction_3d(game))
+        game.step()
+    return game
+
+
+@pytest.mark.parametrize('board_size', [(4, 4), (6, 6), (8, 6), (5, 6)])
+def test_even_2d_boards_are_always_won(board_size):
+    for seed in range(30): # 6x6 seed 6 used to loop forever at length 32
+        game = play_2d(board_size, seed)
+        assert game.won, seed
+
+
+@pytest.mark.parametrize('board_size', [(4, 4, 2), (4, 3, 3)])
+def test_even_3d_boards_are_always_won(board_size):
+    cells = board_size[0] * board_size[1] * board_size[2]
+    for seed in range(10):
+        game = play_3d(board_size, seed, cells * cells)
+        assert game.state == snake_core_3d.GameState.WON, seed
+
+
+def test_odd_boards_never_stall():
+    # No Hamiltonian cycle: the snake may lose, but the idle guard ends every game
+    for seed in range(20):
+        game = play_2d((5, 5), seed)
+        assert game.game_over or game.won, seed
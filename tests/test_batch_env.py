@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from batch_env import BatchSnakeEnv
+from snake_game_2d import DIRECTION_NAMES, Food, Snake, check_collision_wall
+
+
+class ScalarGame:
+    """One game driven the way snake_game_2d's __main__ loop drives it."""
+
+    def __init__(self, width, height, start_length, food):
+        self.width, self.height = width, height
+        self.snake = Snake(start_pos=(max(start_length - 1, width // 4), height // 2), start_length=start_length,
+                           board_size=(width, height))
+        self.food = Food(width, height, self.snake.cells, self.snake.free_cells, rng=random.Random(0))
+        self.food.position = food
+
+    def step(self, action, next_food):
+        """next_food is where the batch env put the food if this step eats."""
+        snake = self.snake
+        snake.change_direction(DIRECTION_NAMES[action])
+        snake.move()
+        head = snake.body[0]
+        if check_collision_wall(head, self.width, self.height) or snake.check_collision_self():
+            return -1.0, True
+        if head == self.food.position:
+            snake.grow()
+            self.food.position = next_food
+            return 1.0, next_food is None
+        return 0.0, False
+
+
+@pytest.mark.parametrize('width, height', [(6, 5), (10, 10)])
+def test_batch_matches_scalar_rules(width, height):
+    num_games, steps = 64, 400
+    env = BatchSnakeEnv(num_games, width, height, auto_reset=False, seed=1)
+    games = [ScalarGame(width, height, 3, env.food_position(g)) for g in range(num_games)]
+    for g, game in enumerate(games):
+        assert env.body(g) == list(game.snake.body)
+    rng = np.random.default_rng(2)
+    live = np.ones(num_games, dtype=bool)
+    for _ in range(steps):
+        actions = rng.integers(0, 4, size=num_games)
+        rewards, dones = env.step(actions)
+        assert not (dones & ~live).any() # Ended games stay frozen without auto_reset
+        for g in np.flatnonzero(live):
+            reward, done = games[g].step(int(actions[g]), env.food_position(g))
+            assert rewards[g] == reward
+            assert bool(dones[g]) == done
+            if done:
+                live[g] = False
+            else:
+                assert env.body(g) == list(games[g].snake.body)
+                assert env.food_position(g) == games[g].food.position
+    assert not live.all() # The random play did end some games
@@ -0,0 +1,143 @@
+import struct
+
+from game_server import DIFF, GAME_OVER, STATE, WON, ClientMirror, Session, _DIFF_HEAD, _TICK, _CELL, NEW_FOOD
+
+
+class FakeTransport:
+    def __init__(self):
+        self.buffered = 0 # Set high to make the session hold its frames back
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def is_closing(self):
+        return False
+
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+
+class CheckedMirror(ClientMirror):
+    """A ClientMirror that asserts the protocol's ordering promises."""
+
+    def __init__(self):
+        super().__init__()
+        self.states = 0
+        self.ended = True # Nothing seen yet
+
+    def apply(self, payload):
+        if payload[0] == STATE:
+            self.states += 1
+            self.ended = False
+        else:
+            assert payload[0] == DIFF
+            _, first, count = _DIFF_HEAD.unpack_from(payload)
+            assert first == self.tick + 1 # Carries on from the last STATE or DIFF
+            offset = _DIFF_HEAD.size
+            for _ in range(count):
+                assert not self.ended # No ticks after a game's last one
+                flags = payload[offset]
+                offset += _TICK.size + (_CELL.size if flags & NEW_FOOD else 0)
+                self.ended = bool(flags & (GAME_OVER | WON))
+        super().apply(payload)
+
+    def feed(self, writer):
+        data, offset = bytes(writer.data), 0
+        writer.data.clear()
+        while offset < len(data):
+            (length,) = struct.unpack_from('<I', data, offset)
+            self.apply(data[offset + 4:offset + 4 + length])
+            offset += 4 + length
+
+
+def new_session(width=20, height=8, seed=0, max_pending_ticks=256):
+    writer = FakeWriter()
+    return Session(0, writer, width, height, 0.01, seed, max_pending_ticks), writer
+
+
+def run_games(session, games):
+    """Ticks until the session has started `games` more games (the snake
+    runs straight into the wall, so games are short)."""
+    target = session.games + games
+    while session.games < target:
+        session.tick()
+
+
+def assert_in_sync(session, mirror):
+    assert list(mirror.body) == list(session.game.snake.body)
+    assert mirror.food == session.game.food.position
+
+
+def test_restart_without_flush_keeps_games_apart():
+    session, writer = new_session()
+    mirror = CheckedMirror()
+    session.flush()
+    mirror.feed(writer)
+    run_games(session, 1)
+    for _ in range(3):
+        session.tick() # The new game's first ticks, queued behind the old game's end
+    session.flush()
+    mirror.feed(writer)
+    assert mirror.games_ended == 1
+    assert mirror.states == 2
+    assert_in_sync(session, mirror)
+
+
+def test_every_flush_between_games():
+    session, writer = new_session(seed=3)
+    mirror = CheckedMirror()
+    for _ in range(200):
+        session.tick()
+        session.flush()
+        mirror.feed(writer)
+        assert_in_sync(session, mirror)
+    assert mirror.games_ended == session.games - 1
+
+
+def test_overflow_keeps_the_final_tick():
+    session, writer = new_session(max_pending_ticks=4)
+    mirror = CheckedMirror()
+    session.flush()
+    mirror.feed(writer)
+    writer.transport.buffered = 1 << 30 # Stalled: nothing goes out
+    run_games(session, 3) # Overflows mid-game, then games start and end unseen
+    for _ in range(2):
+        session.tick()
+        session.flush()
+    assert not writer.data
+    assert session.resyncs > 0
+    writer.transport.buffered = 0
+    session.flush()
+    mirror.feed(writer)
+    assert mirror.games_ended == 1 # The game the client had seen still ends
+    assert mirror.states == 3 # First STATE, the overflow's, the current game's
+    assert_in_sync(session, mirror)
+    for _ in range(50):
+        session.tick()
+        session.flush()
+        mirror.feed(writer)
+        assert_in_sync(session, mirror)
+
+
+def test_overflow_on_the_final_tick():
+    # The game ends on the very tick that would overflow; that tick must still be sent
+    probe, _ = new_session()
+    while not probe.game.game_over:
+        probe.tick()
+    length = probe.game.ticks
+    session, writer = new_session(max_pending_ticks=length - 1)
+    mirror = CheckedMirror()
+    session.flush()
+    mirror.feed(writer)
+    while not session.game.game_over:
+        session.tick()
+    assert session.resyncs == 0
+    session.flush()
+    mirror.feed(writer)
+    assert mirror.game_over and mirror.games_ended == 1
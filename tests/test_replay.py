@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from autopilot import Autopilot
+from replay import Replay, ReplayPlayer, ReplayRecorder
+from snake_game_2d import DIRECTION_NAMES, Game
+
+
+def record(ticks=700, seed=5, width=12, height=10, sparse=False):
+    """A recorded game plus its snapshot after every tick (index = ticks played)."""
+    recorder = ReplayRecorder(Game(width, height, seed=seed, sparse=sparse))
+    pilot = Autopilot((width, height))
+    rng = random.Random(seed)
+    states = [recorder.game.snapshot()]
+    while len(recorder.replay) < ticks and not (recorder.game.game_over or recorder.game.won):
+        if rng.random() < 0.8:
+            recorder.step(pilot.direction_2d(recorder.game))
+        else:
+            recorder.step(rng.choice(DIRECTION_NAMES + (None,)))
+        states.append(recorder.game.snapshot())
+    return recorder.replay, states
+
+
+@pytest.mark.parametrize('sparse', [False, True], ids=['dense', 'sparse'])
+def test_bytes_round_trip(sparse):
+    replay, _ = record(sparse=sparse)
+    loaded = Replay.from_bytes(replay.to_bytes())
+    assert (loaded.board_width, loaded.board_height, loaded.start_length, loaded.seed, loaded.ticks,
+            loaded.sparse) == \
+           (replay.board_width, replay.board_height, replay.start_length, replay.seed, replay.ticks, sparse)
+    assert [loaded.direction_at(t) for t in range(loaded.ticks)] == \
+           [replay.direction_at(t) for t in range(replay.ticks)]
+
+
+def test_state_at_matches_recording_in_any_order():
+    replay, states = record()
+    player = ReplayPlayer(Replay.from_bytes(replay.to_bytes()), keyframe_interval=64)
+    ticks = list(range(replay.ticks + 1))
+    random.Random(0).shuffle(ticks)
+    for tick in ticks:
+        assert player.state_at(tick).snapshot() == states[tick]
+
+
+@pytest.mark.parametrize('sparse', [False, True], ids=['dense', 'sparse'])
+def test_play_matches_recording(sparse):
+    replay, states = record(sparse=sparse)
+    for tick, game in enumerate(ReplayPlayer(Replay.from_bytes(replay.to_bytes())).play(), start=1):
+        assert game.snapshot() == states[tick]
+
+
+def test_sparse_replay_reaches_the_recorded_score():
+    recorder = ReplayRecorder(Game(12, 10, seed=5, sparse=True))
+    pilot = Autopilot((12, 10))
+    for _ in range(200):
+        if recorder.game.game_over or recorder.game.won:
+            break
+        recorder.step(pilot.direction_2d(recorder.game))
+    *_, replayed = ReplayPlayer(Replay.from_bytes(recorder.replay.to_bytes())).play()
+    assert replayed.sparse
+    assert replayed.score == recorder.game.score > 1
+
+
+def test_version_1_replays_load_as_dense():
+    replay, states = record(ticks=40)
+    blob = replay.to_bytes()
+    v1 = blob[:4] + bytes([1]) + blob[5:23] + blob[24:] # Drop the flags byte
+    loaded = Replay.from_bytes(v1)
+    assert not loaded.sparse
+    assert ReplayPlayer(loaded).state_at(loaded.ticks).snapshot() == states[-1]
+
+
+def test_state_at_rejects_ticks_outside_replay():
+    replay, _ = record(ticks=10)
+    with pytest.raises(IndexError):
+        ReplayPlayer(replay).state_at(replay.ticks + 1)
+
+
+@pytest.mark.parametrize('mutate, message', [
+    (lambda blob: b'XXXX' + blob[4:], "Not a snake replay"),
+    (lambda blob: blob[:-1], "truncated"),
+])
+def test_from_bytes_rejects_bad_data(mutate, message):
+    replay, _ = record(ticks=40)
+    with pytest.raises(ValueError, match=message):
+        Replay.from_bytes(mutate(replay.to_bytes()))
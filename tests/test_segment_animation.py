@@ -0,0 +1,44 @@
+import pytest
+
+from autopilot import Autopilot
+from event_stream import Moved
+from segment_animation import ANIMATION_MODE_ENDS, ANIMATION_MODE_FULL, SegmentAnimator
+from snake_core_3d import Game, GameState
+
+
+class CellView:
+    """SnakeView's entity bookkeeping with cells standing in for entities."""
+
+    def __init__(self, snake, mode):
+        self.snake = snake
+        self.animator = SegmentAnimator(snake, mode, budget=4)
+        self.cells = list(snake.body)
+
+    def on_moved(self, moved):
+        grew = moved.tail is None
+        segment = self.snake.body[1] if grew else self.cells.pop()
+        self.cells.insert(1, segment)
+        for index, cell in self.animator.on_moved(grew):
+            self.cells[index] = cell
+
+    def render_settled(self):
+        """A frame at alpha 1, where every interpolated segment ends up."""
+        for index, _, cell in self.animator.frame():
+            self.cells[index] = cell
+
+
+@pytest.mark.parametrize('mode', [ANIMATION_MODE_ENDS, ANIMATION_MODE_FULL])
+def test_view_follows_catch_up_frames(mode):
+    game = Game(seed=2, board_size=(6, 5, 4))
+    game.set_state(GameState.PLAYING)
+    game.autopilot = Autopilot(game.board_size)
+    view = CellView(game.snake, mode)
+    game.stream.subscribe(lambda event: type(event) is Moved and view.on_moved(event))
+    frames = 0
+    while game.state == GameState.PLAYING and frames < 400:
+        # Long frames make update() run several steps before returning
+        game.update(game.game_speed * (1 + frames % 5))
+        frames += 1
+        view.render_settled()
+        assert view.cells == list(game.snake.body)
+    assert len(game.snake.body) > 10
@@ -0,0 +1,135 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from autopilot import Autopilot
+from grid import DIRECTION_DELTAS, OPPOSITE
+from item_index import ItemKind
+from snake_env import SnakeEnv2D, SnakeEnv3D
+
+NO_REWARDS = dict(reward_food=0.0, reward_death=0.0, reward_win=0.0, reward_step=0.0, reward_approach=0.0)
+
+
+def ahead(env):
+    """The cell in front of the head."""
+    snake = env.game.snake
+    delta = DIRECTION_DELTAS[len(env.board_size)][snake.code]
+    return tuple(h + d for h, d in zip(snake.body[0], delta))
+
+
+def manhattan(a, b):
+    return sum(abs(p - q) for p, q in zip(a, b))
+
+
+@pytest.mark.parametrize('env', [SnakeEnv2D(8, 6, seed=1), SnakeEnv3D((5, 4, 3), seed=1)])
+def test_step_updates_match_a_redraw(env):
+    rng = random.Random(0)
+    obs, _ = env.reset()
+    for _ in range(500):
+        out, _, terminated, truncated, _ = env.step(rng.randrange(env.num_actions))
+        assert out is obs # Updated in place
+        if terminated or truncated:
+            obs, _ = env.reset()
+            continue
+        stepped = obs.copy()
+        env._redraw()
+        np.testing.assert_array_equal(stepped, obs)
+
+
+@pytest.mark.parametrize('make', [SnakeEnv2D, SnakeEnv3D])
+@pytest.mark.parametrize('action', [-1, 6, 99])
+def test_out_of_range_actions_are_rejected(make, action):
+    env = make(seed=0)
+    env.reset()
+    with pytest.raises(ValueError):
+        env.step(action)
+
+
+def test_actions_past_the_2d_range_are_rejected():
+    env = SnakeEnv2D(seed=0)
+    env.reset()
+    with pytest.raises(ValueError):
+        env.step(4)
+
+
+@pytest.mark.parametrize('make', [SnakeEnv2D, SnakeEnv3D])
+def test_reversing_is_ignored(make):
+    env, twin = make(seed=5), make(seed=5)
+    env.reset()
+    twin.reset()
+    code = env.game.snake.code
+    obs = env.step(OPPOSITE[len(env.board_size)][code])[0]
+    np.testing.assert_array_equal(obs, twin.step(code)[0])
+    assert env.game.snake.code == code
+
+
+def test_reward_approach():
+    env = SnakeEnv2D(seed=2, **dict(NO_REWARDS, reward_approach=0.5))
+    env.reset()
+    for _ in range(30):
+        before = manhattan(env.game.snake.body[0], env.game.food.position)
+        score = env.game.score
+        _, reward, terminated, _, _ = env.step(env.game.snake.code)
+        if terminated or env.game.score > score:
+            break
+        after = manhattan(env.game.snake.body[0], env.game.food.position)
+        assert reward == 0.5 * (before - after)
+
+
+@pytest.mark.parametrize('make', [SnakeEnv2D, SnakeEnv3D])
+def test_reward_death(make):
+    env = make(seed=0, **dict(NO_REWARDS, reward_death=-3.0))
+    env.reset()
+    terminated, steps = False, 0
+    while not terminated: # Straight on into the wall
+        _, reward, terminated, _, _ = env.step(env.game.snake.code)
+        steps += 1
+    assert reward == -3.0
+    assert steps <= max(env.board_size)
+
+
+@pytest.mark.parametrize('make, board_size', [(SnakeEnv2D, (4, 4)), (SnakeEnv3D, (4, 3, 2))])
+def test_reward_win(make, board_size):
+    if make is SnakeEnv2D:
+        env = make(*board_size, seed=0, **dict(NO_REWARDS, reward_win=5.0))
+    else:
+        env = make(board_size, seed=0, **dict(NO_REWARDS, reward_win=5.0))
+    env.reset()
+    pilot = Autopilot(board_size)
+    terminated = False
+    while not terminated:
+        snake = env.game.snake
+        _, reward, terminated, _, info = env.step(pilot.decide(snake.body, env.game.food.position,
+                                                               snake._should_grow))
+    assert reward == 5.0
+    assert info['length'] == env.num_cells
+
+
+def test_reward_powerup():
+    env = SnakeEnv3D(seed=0, **dict(NO_REWARDS, reward_powerup=2.0))
+    env.reset()
+    game = env.game
+    cell = ahead(env)
+    assert cell != game.food.position
+    game.powerup_position = cell
+    game.is_powerup_item_active = True
+    game.items.add(cell, ItemKind.SPEED_BOOST)
+    _, reward, _, _, _ = env.step(game.snake.code)
+    assert reward == 2.0
+    assert game.powerup_position is None
+    _, reward, _, _, _ = env.step(game.snake.code)
+    assert reward == 0.0
+
+
+def test_max_idle_steps_truncates():
+    env = SnakeEnv2D(seed=3, max_idle_steps=4)
+    env.reset()
+    idle = 0
+    for _ in range(12): # Straight on, short of the far wall
+        score = env.game.score
+        _, _, terminated, truncated, _ = env.step(env.game.snake.code)
+        assert not terminated
+        idle = 0 if env.game.score > score else idle + 1
+        assert truncated == (idle >= 4)
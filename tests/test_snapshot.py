@@ -0,0 +1,134 @@
+import random
+
+import pytest
+
+import free_cells
+import snake_core_3d
+import snake_game_2d
+from autopilot import Autopilot
+from snapshot import GameSnapshot
+
+
+def play_2d(game, pilot, rng, ticks):
+    for _ in range(ticks):
+        if game.game_over or game.won:
+            return
+        game.step(pilot.direction_2d(game) if rng.random() < 0.9 else rng.choice(snake_game_2d.DIRECTION_NAMES))
+
+
+def play_3d(game, pilot, rng, ticks):
+    for _ in range(ticks):
+        if game.state != snake_core_3d.GameState.PLAYING:
+            return
+        game.change_direction(pilot.direction_3d(game) if rng.random() < 0.9
+                              else rng.choice(list(snake_core_3d.DIRECTIONS.values())))
+        game.advance_timers(game.game_speed)
+        game.step()
+
+
+def new_2d(sparse):
+    return snake_game_2d.Game(10, 8, seed=3, sparse=sparse)
+
+
+def new_3d(sparse):
+    game = snake_core_3d.Game(seed=3, board_size=(5, 4, 6), sparse=sparse)
+    game.set_state(snake_core_3d.GameState.PLAYING)
+    return game
+
+
+GAMES = [
+    pytest.param(new_2d, play_2d, (10, 8), id='2d'),
+    pytest.param(new_3d, play_3d, (5, 4, 6), id='3d'),
+]
+
+
+@pytest.mark.parametrize('sparse', [False, True], ids=['dense', 'sparse'])
+@pytest.mark.parametrize('new_game, play, board', GAMES)
+def test_exact_restore_plays_on_identically(new_game, play, board, sparse):
+    game = new_game(sparse)
+    play(game, Autopilot(board), random.Random(1), 150)
+    snapshot = game.snapshot()
+    copy = new_game(sparse)
+    copy.restore(snapshot)
+    assert copy.snapshot() == snapshot
+    assert list(copy.snake.body) == list(game.snake.body)
+    assert copy.snake.direction == game.snake.direction
+    assert copy.food.position == game.food.position
+    assert copy.score == game.score
+
+    play(game, Autopilot(board), random.Random(2), 300)
+    play(copy, Autopilot(board), random.Random(2), 300)
+    assert copy.snapshot() == game.snapshot()
+    assert list(copy.snake.body) == list(game.snake.body)
+
+
+@pytest.mark.parametrize('new_game, play, board', GAMES)
+def test_bytes_round_trip(new_game, play, board):
+    game = new_game(False)
+    play(game, Autopilot(board), random.Random(4), 200)
+    snapshot = game.snapshot()
+    loaded = GameSnapshot.from_bytes(snapshot.to_bytes())
+    assert loaded == snapshot
+    assert hash(loaded) == hash(snapshot)
+    assert loaded.body() == snapshot.body() == list(game.snake.body)
+    assert loaded.item_cells() == snapshot.item_cells()
+    assert loaded.to_bytes() == snapshot.to_bytes()
+
+
+@pytest.mark.parametrize('sparse', [False, True], ids=['dense', 'sparse'])
+@pytest.mark.parametrize('new_game, play, board', GAMES)
+def test_occupancy_is_the_body_bitboard(new_game, play, board, sparse):
+    game = new_game(sparse)
+    play(game, Autopilot(board), random.Random(7), 200)
+    snapshot = game.snapshot()
+    if sparse:
+        assert snapshot.occupancy is None
+        return
+    strides = [1]
+    for d in board[:-1]:
+        strides.append(strides[-1] * d)
+    expected = 0
+    for cell in game.snake.body:
+        if all(0 <= c < d for c, d in zip(cell, board)):
+            expected |= 1 << sum(c * s for c, s in zip(cell, strides))
+    assert snapshot.occupancy == expected
+    assert GameSnapshot.from_bytes(snapshot.to_bytes()).occupancy == expected
+
+
+@pytest.mark.parametrize('new_game, play, board', GAMES)
+def test_board_only_snapshot_restores_the_board(new_game, play, board):
+    game = new_game(False)
+    play(game, Autopilot(board), random.Random(5), 120)
+    snapshot = game.snapshot(exact=False)
+    assert snapshot == game.snapshot() # The RNG state and free-cell order aren't part of equality
+    copy = new_game(False)
+    copy.restore(snapshot)
+    assert list(copy.snake.body) == list(game.snake.body)
+    assert sorted(copy.snake.free_cells) == sorted(game.snake.free_cells)
+
+
+@pytest.mark.parametrize('exact', [False, True], ids=['board', 'exact'])
+@pytest.mark.parametrize('new_game, play, board', GAMES)
+def test_restores_reuse_the_full_board_table(new_game, play, board, exact, monkeypatch):
+    game = new_game(False)
+    play(game, Autopilot(board), random.Random(8), 50)
+    snapshot = game.snapshot(exact=exact)
+    built = []
+    build = free_cells._FullBoard.__init__
+    monkeypatch.setattr(free_cells._FullBoard, '__init__', lambda full, grid: built.append(build(full, grid)))
+    for _ in range(10):
+        game.restore(snapshot)
+    assert not built
+
+
+def test_equal_states_deduplicate():
+    first, second = new_2d(False), new_2d(False)
+    play_2d(first, Autopilot((10, 8)), random.Random(6), 50)
+    play_2d(second, Autopilot((10, 8)), random.Random(6), 50)
+    assert len({first.snapshot(), second.snapshot(), new_2d(False).snapshot()}) == 2
+
+
+def test_restore_rejects_other_board_sizes():
+    snapshot = new_2d(False).snapshot()
+    with pytest.raises(ValueError):
+        snake_game_2d.Game(9, 8).restore(snapshot)